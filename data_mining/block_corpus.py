@@ -0,0 +1,330 @@
+"""
+MIRA: Binary Block Corpus
+Memory-mappable single-file store for dataset block lists. Every distinct
+state string goes into one global palette; each block list is a packed
+array of little-endian ``(x, y, z, state_id)`` int16/int16/int16/uint16
+records; an offset index maps entry keys to their records and to the rest of
+the entry (JSON metadata). Looking up a circuit is a binary search over the
+mapped index, and its records are a zero-copy ``memoryview`` slice.
+
+Layout::
+
+    header   magic, version, entry count, offsets of the sections below
+    body     per entry: key, metadata JSON, one record array per block field
+    strings  JSON {"palette": [...], "fields": [...]}
+    entries  ENTRY rows in insertion order
+    slots    SLOT rows (field id, records offset, record count)
+    order    uint32 row numbers of every entry, sorted by (key, row), for lookups
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from data_mining.columnar import BLOCK_FIELDS, block_columns
+from data_mining.json_codec import dumpb, loads
+
+MAGIC = b"MIRABLK1"
+VERSION = 2
+# magic, version, entry count, strings offset/length, entries offset, slots offset, order offset
+HEADER = struct.Struct("<8sIIQQQQQ")
+RECORD = struct.Struct("<hhhH")
+# key offset, key length, meta offset, meta length, first slot, slot count
+ENTRY = struct.Struct("<QIQIII")
+# field id, records offset, record count
+SLOT = struct.Struct("<IQI")
+MAX_PALETTE = 1 << 16
+
+CORPUS_SUFFIX = ".blocks"
+
+
+def is_corpus_path(path: str) -> bool:
+    return path.endswith(CORPUS_SUFFIX)
+
+
+def corpus_key(entry: Dict[str, Any], row: int) -> str:
+    """Lookup key of a dataset entry: its id / entry_id, or a synthesized one."""
+    for name in ("id", "entry_id"):
+        value = entry.get(name)
+        if isinstance(value, str) and value:
+            return value
+    if entry.get("type") == "corruption":
+        parent = entry.get("parent_id") or entry.get("schematic_id", "")
+        return f"{parent}:corruption:{entry.get('variant', 0)}"
+    return f"#{row}"
+
+
+class BlockCorpusWriter:
+    """
+    Builds a corpus file entry by entry; nothing but the palette and the
+    index rows is kept in memory. Block lists that don't fit int16 records
+    (float coordinates, extra keys) stay in the entry's metadata JSON.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.count = 0
+        self._fh = open(path + ".tmp", "wb")
+        self._fh.write(bytes(HEADER.size))
+        self._palette: Dict[str, int] = {}
+        self._fields: Dict[str, int] = {}
+        self._entries = bytearray()
+        self._slots = bytearray()
+        self._n_slots = 0
+        self._keys: List[bytes] = []
+
+    def _append(self, data: bytes, align: int = 1) -> int:
+        pos = self._fh.tell()
+        pad = -pos % align
+        if pad:
+            self._fh.write(bytes(pad))
+            pos += pad
+        self._fh.write(data)
+        return pos
+
+    def _state_id(self, state: str) -> int:
+        sid = self._palette.get(state)
+        if sid is None:
+            sid = len(self._palette)
+            if sid >= MAX_PALETTE:
+                raise ValueError(f"Block corpus palette is limited to {MAX_PALETTE} distinct states")
+            self._palette[state] = sid
+        return sid
+
+    def write(self, entry: Dict[str, Any], key: Optional[str] = None) -> str:
+        """
+        Adds *entry* under *key* (default ``corpus_key``). Lookups of a
+        repeated key find the last entry written; iteration yields all of them.
+        """
+        key = key or corpus_key(entry, self.count)
+        meta = dict(entry)
+        first_slot, n_slots = self._n_slots, 0
+        for name in BLOCK_FIELDS:
+            cols = block_columns(entry[name]) if name in entry else None
+            if cols is None:
+                continue
+            del meta[name]
+            packed = bytearray(RECORD.size * len(cols["x"]))
+            for i, (x, y, z, state) in enumerate(zip(cols["x"], cols["y"], cols["z"], cols["state"])):
+                RECORD.pack_into(packed, i * RECORD.size, x, y, z, self._state_id(state))
+            offset = self._append(bytes(packed), align=8)
+            field_id = self._fields.setdefault(name, len(self._fields))
+            self._slots += SLOT.pack(field_id, offset, len(cols["x"]))
+            self._n_slots += 1
+            n_slots += 1
+
+        key_bytes = key.encode("utf-8")
+        key_off = self._append(key_bytes)
+        meta_bytes = dumpb(meta)
+        meta_off = self._append(meta_bytes)
+        self._keys.append(key_bytes)
+        self._entries += ENTRY.pack(key_off, len(key_bytes), meta_off, len(meta_bytes), first_slot, n_slots)
+        self.count += 1
+        return key
+
+    def commit(self) -> None:
+        strings = json.dumps(
+            {"palette": list(self._palette), "fields": list(self._fields)}, ensure_ascii=False
+        ).encode("utf-8")
+        strings_off = self._append(strings)
+        entries_off = self._append(bytes(self._entries), align=8)
+        slots_off = self._append(bytes(self._slots), align=8)
+        # Every row, repeated keys included, so the order array has one slot per entry
+        keys = self._keys
+        order = array("I", sorted(range(self.count), key=lambda row: (keys[row], row)))
+        if sys.byteorder != "little":
+            order.byteswap()
+        order_off = self._append(order.tobytes(), align=8)
+        self._fh.seek(0)
+        self._fh.write(HEADER.pack(
+            MAGIC, VERSION, self.count, strings_off, len(strings), entries_off, slots_off, order_off,
+        ))
+        self._fh.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def abort(self) -> None:
+        self._fh.close()
+        os.remove(self.path + ".tmp")
+
+
+class BlockCorpus:
+    """
+    Read-only, memory-mapped view of a corpus file.
+
+    ``records`` returns the raw packed records of one block list without
+    copying; ``array`` wraps them as a numpy structured array when numpy is
+    available; ``blocks`` / ``entry`` / iteration materialize dicts in the
+    JSONL shape. Release any views taken from ``records`` before ``close``.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, version, count, strings_off, strings_len, entries_off, slots_off, order_off = (
+            HEADER.unpack_from(self._mm, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a block corpus (version {VERSION})")
+        strings = json.loads(bytes(self._view[strings_off:strings_off + strings_len]))
+        self.palette: List[str] = strings["palette"]
+        self.fields: List[str] = strings["fields"]
+        self._count = count
+        self._entries_off = entries_off
+        self._slots_off = slots_off
+        self._order_off = order_off
+
+    def __enter__(self) -> "BlockCorpus":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.entries()
+
+    def entries(self, start: int = 0, end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Entries in insertion order, optionally only rows ``[start, end)``."""
+        stop = self._count if end is None else min(end, self._count)
+        for row in range(start, stop):
+            yield self._entry(row)
+
+    def _row(self, row: int) -> Tuple[int, int, int, int, int, int]:
+        return ENTRY.unpack_from(self._mm, self._entries_off + row * ENTRY.size)
+
+    def _key(self, row: int) -> bytes:
+        key_off, key_len = self._row(row)[:2]
+        return self._mm[key_off:key_off + key_len]
+
+    def _find(self, key: str) -> Optional[int]:
+        """Row of the last entry written under *key* (rows with equal keys are in row order)."""
+        target = key.encode("utf-8")
+        ordered = _SortedKeys(self)
+        i = bisect.bisect_right(ordered, target) - 1
+        if i >= 0 and ordered[i] == target:
+            return ordered.row(i)
+        return None
+
+    def _slots(self, row: int) -> Dict[str, Tuple[int, int]]:
+        first, n = self._row(row)[4:6]
+        slots = {}
+        for s in range(first, first + n):
+            field_id, offset, count = SLOT.unpack_from(self._mm, self._slots_off + s * SLOT.size)
+            slots[self.fields[field_id]] = (offset, count)
+        return slots
+
+    def keys(self) -> Iterator[str]:
+        """Entry keys in insertion order; a repeated key appears once per entry."""
+        for row in range(self._count):
+            yield self._key(row).decode("utf-8")
+
+    def block_counts(self, field: str = "blocks") -> Iterator[Optional[int]]:
+        """Length of one block list per row, in insertion order, read from the index alone."""
+        for row in range(self._count):
+            slot = self._slots(row).get(field)
+            yield slot[1] if slot else None
+
+    def block_count(self, key: str, field: str = "blocks") -> Optional[int]:
+        """Length of one block list, read from the index alone."""
+        row = self._find(key)
+        if row is None:
+            return None
+        slot = self._slots(row).get(field)
+        return slot[1] if slot else None
+
+    def records(self, key: str, field: str = "blocks") -> Optional[memoryview]:
+        """Zero-copy packed ``(x, y, z, state_id)`` records (``RECORD`` layout), or None."""
+        row = self._find(key)
+        if row is None:
+            return None
+        slot = self._slots(row).get(field)
+        if slot is None:
+            return None
+        offset, count = slot
+        return self._view[offset:offset + count * RECORD.size]
+
+    def array(self, key: str, field: str = "blocks") -> Any:
+        """Records as a zero-copy numpy array with fields x, y, z, state (needs numpy)."""
+        import numpy as np
+
+        recs = self.records(key, field)
+        if recs is None:
+            return None
+        dtype = np.dtype([("x", "<i2"), ("y", "<i2"), ("z", "<i2"), ("state", "<u2")])
+        return np.frombuffer(recs, dtype=dtype)
+
+    def _decode(self, recs: memoryview) -> List[Dict[str, Any]]:
+        palette = self.palette
+        return [
+            {"x": x, "y": y, "z": z, "state": palette[s]}
+            for x, y, z, s in RECORD.iter_unpack(recs)
+        ]
+
+    def blocks(self, key: str, field: str = "blocks") -> Optional[List[Dict[str, Any]]]:
+        recs = self.records(key, field)
+        return self._decode(recs) if recs is not None else None
+
+    def _entry(self, row: int) -> Dict[str, Any]:
+        meta_off, meta_len = self._row(row)[2:4]
+        entry = loads(self._view[meta_off:meta_off + meta_len])
+        for name, (offset, count) in self._slots(row).items():
+            entry[name] = self._decode(self._view[offset:offset + count * RECORD.size])
+        return entry
+
+    def entry_at(self, row: int) -> Dict[str, Any]:
+        """The entry in insertion-order position *row*."""
+        if not 0 <= row < self._count:
+            raise IndexError(f"corpus row {row} out of range")
+        return self._entry(row)
+
+    def entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """The full entry stored under *key* (the last one, if the key repeats)."""
+        row = self._find(key)
+        return self._entry(row) if row is not None else None
+
+    def close(self) -> None:
+        self._view.release()
+        self._mm.close()
+        self._fh.close()
+
+
+class _SortedKeys:
+    """Sequence view of corpus keys in sorted order, for ``bisect``."""
+
+    def __init__(self, corpus: BlockCorpus) -> None:
+        self._corpus = corpus
+
+    def __len__(self) -> int:
+        return self._corpus._count
+
+    def row(self, i: int) -> int:
+        return struct.unpack_from("<I", self._corpus._mm, self._corpus._order_off + 4 * i)[0]
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._corpus._key(self.row(i))
+
+
+def build_corpus(entries: Any, path: str) -> int:
+    """Writes an iterable of entries to a corpus file; returns the entry count."""
+    writer = BlockCorpusWriter(path)
+    try:
+        for entry in entries:
+            writer.write(entry)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+    return writer.count
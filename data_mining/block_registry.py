@@ -0,0 +1,131 @@
+"""
+MIRA: Block / Property Registry
+Offline knowledge of which block ids exist and which values each block-state
+property accepts, extracted once from the server's data generator
+(``java -DbundlerMainClass=net.minecraft.data.Main -jar server.jar --reports``).
+Lets schematics with unknown blocks or impossible states be rejected without
+pasting them into the live server.
+"""
+
+import json
+import os
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from data_mining.support_graph import parse_properties
+
+REPORTS_BLOCKS = os.path.join("reports", "blocks.json")
+
+
+def generate_reports(server_jar: str, output_dir: str, java: str = "java", timeout: int = 600) -> str:
+    """
+    Runs the vanilla data generator bundled in *server_jar* and returns the
+    path of the resulting ``blocks.json`` report.
+    """
+    server_jar = os.path.abspath(server_jar)
+    output_dir = os.path.abspath(output_dir)
+    subprocess.run(
+        [java, "-DbundlerMainClass=net.minecraft.data.Main", "-jar", server_jar, "--reports", "--output", output_dir],
+        cwd=os.path.dirname(server_jar),
+        check=True,
+        timeout=timeout,
+    )
+    path = os.path.join(output_dir, REPORTS_BLOCKS)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Data generator did not write {path}")
+    return path
+
+
+def _namespaced(name: str) -> str:
+    return name if ":" in name else f"minecraft:{name}"
+
+
+class BlockRegistry:
+    """
+    ``block id -> {property: allowed values}`` table.
+
+    ``check_state`` answers for one state string and memoizes per distinct
+    state, so a schematic costs one dict lookup per block after the first
+    occurrence of each state. Properties left out of a state are fine (the
+    game fills in defaults); entity pseudo-states are not checked.
+    """
+
+    def __init__(self, blocks: Dict[str, Dict[str, List[str]]], version: Optional[str] = None):
+        self.blocks = {bid: {p: frozenset(v) for p, v in props.items()} for bid, props in blocks.items()}
+        self.version = version
+        self._cache: Dict[str, Optional[str]] = {}
+
+    def __contains__(self, block: str) -> bool:
+        return _namespaced(block) in self.blocks
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    @classmethod
+    def from_reports(cls, blocks_json: str, version: Optional[str] = None) -> "BlockRegistry":
+        """Builds the registry from the data generator's ``reports/blocks.json``."""
+        with open(blocks_json, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        blocks = {
+            bid: {p: [str(v) for v in values] for p, values in (entry.get("properties") or {}).items()}
+            for bid, entry in report.items()
+        }
+        return cls(blocks, version=version)
+
+    @classmethod
+    def load(cls, path: str) -> "BlockRegistry":
+        """Loads a registry written by ``save`` (or a raw ``blocks.json`` report)."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "blocks" in data and isinstance(data["blocks"], dict):
+            return cls(data["blocks"], version=data.get("version"))
+        return cls.from_reports(path)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "version": self.version,
+            "blocks": {bid: {p: sorted(v) for p, v in props.items()} for bid, props in sorted(self.blocks.items())},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    def check_state(self, state: Any) -> Optional[str]:
+        """
+        Returns None if *state* is a valid block state, otherwise a reason:
+        ``unknown_block:<id>``, ``unknown_property:<id>.<prop>`` or
+        ``bad_value:<id>.<prop>=<value>``.
+        """
+        text = str(state)
+        if text in self._cache:
+            return self._cache[text]
+
+        error = None
+        if not text.startswith("entity:"):
+            if "[" in text and not text.endswith("]"):
+                error = f"malformed_state:{text}"
+            else:
+                bid = _namespaced(text.split("[", 1)[0].strip())
+                allowed = self.blocks.get(bid)
+                if allowed is None:
+                    error = f"unknown_block:{bid}"
+                else:
+                    for prop, value in parse_properties(text).items():
+                        values = allowed.get(prop)
+                        if values is None:
+                            error = f"unknown_property:{bid}.{prop}"
+                            break
+                        if value not in values:
+                            error = f"bad_value:{bid}.{prop}={value}"
+                            break
+
+        self._cache[text] = error
+        return error
+
+    def first_invalid(self, blocks: Iterable[Tuple[Any, Any, Any, Any, Any]]) -> Optional[str]:
+        """Returns the reason for the first invalid state in parsed *blocks*, or None if all are valid."""
+        for _, _, _, state, _ in blocks:
+            error = self.check_state(state)
+            if error:
+                return error
+        return None
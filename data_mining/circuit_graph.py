@@ -0,0 +1,311 @@
+"""
+MIRA: Redstone Component Adjacency Graph
+Builds a sparse graph over the redstone-relevant blocks of a circuit (wire,
+repeaters, comparators, pistons, observers, torches, ...) and the blocks that
+support them. The world slicer uses it to cut redstone-aware components and
+writes each component's graph as a small JSON sidecar (output only; no
+pipeline stage reads it back).
+"""
+
+import json
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+Pos = Tuple[int, int, int]
+
+# Category -> block-id substrings (matched against the id without namespace).
+# Order matters: the first matching category wins.
+REDSTONE_CATEGORIES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("wire", ("redstone_wire",)),
+    ("torch", ("redstone_torch", "redstone_wall_torch")),
+    ("repeater", ("repeater",)),
+    ("comparator", ("comparator",)),
+    ("observer", ("observer",)),
+    ("piston", ("piston",)),
+    ("lever", ("lever",)),
+    ("button", ("_button",)),
+    ("pressure_plate", ("pressure_plate",)),
+    ("redstone_block", ("redstone_block",)),
+    ("lamp", ("redstone_lamp",)),
+    ("container", ("dropper", "dispenser", "hopper")),
+    ("target", ("target",)),
+]
+
+SUPPORT = "support"
+# A support block that is powered by one redstone node and feeds another, so
+# it carries the signal between them (a torch inverter's block, say).
+CONDUCTOR = "conductor"
+
+FACE_OFFSETS: List[Pos] = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)]
+DIRECTIONS: Dict[str, Pos] = {
+    "north": (0, 0, -1),
+    "south": (0, 0, 1),
+    "east": (1, 0, 0),
+    "west": (-1, 0, 0),
+    "up": (0, 1, 0),
+    "down": (0, -1, 0),
+}
+# Categories whose output strongly powers the block they point into or sit under,
+# so the block can in turn power adjacent wire.
+STRONG_SOURCES = ("repeater", "comparator", "torch", "lever", "button")
+# Categories activated by any adjacent powered block.
+POWERED_BY_BLOCK = ("lamp", "piston", "container")
+# Redstone wire also connects one block up or down a step.
+WIRE_STEP_OFFSETS: List[Pos] = [
+    (dx, dy, dz)
+    for dx, dz in ((1, 0), (-1, 0), (0, 1), (0, -1))
+    for dy in (1, -1)
+]
+
+
+def block_id(state: Any) -> str:
+    """Returns the namespaced block id of a state string or litemapy BlockState."""
+    if hasattr(state, "id"):
+        return state.id
+    return str(state).split("[", 1)[0]
+
+
+def parse_properties(state: Any) -> Dict[str, str]:
+    """Returns the block-state properties of a state string or litemapy BlockState."""
+    if hasattr(state, "properties") and callable(state.properties):
+        return dict(state.properties())
+    text = str(state)
+    if "[" not in text or not text.endswith("]"):
+        return {}
+    props = {}
+    for p in text.split("[", 1)[1][:-1].split(","):
+        if "=" in p:
+            k, v = p.split("=", 1)
+            props[k.strip()] = v.strip()
+    return props
+
+
+def _attached_to(category: str, state: Any, props: Dict[str, str]) -> Optional[Pos]:
+    """Offset of the block a torch, lever or button hangs on, relative to itself."""
+    facing = DIRECTIONS.get(props.get("facing", ""))
+    if category == "torch":
+        if "wall" in block_id(state):
+            return (-facing[0], -facing[1], -facing[2]) if facing else None
+        return (0, -1, 0)
+    face = props.get("face", "floor")
+    if face == "ceiling":
+        return (0, 1, 0)
+    if face == "wall":
+        return (-facing[0], -facing[1], -facing[2]) if facing else None
+    return (0, -1, 0)
+
+
+def _powers(category: str, state: Any, delta: Pos) -> bool:
+    """Whether a redstone node powers the solid block at *delta* from it."""
+    props = parse_properties(state)
+    if category == "wire":
+        if delta == (0, -1, 0):
+            return True
+        sides = {d: props.get(d, "none") for d in ("north", "south", "east", "west")}
+        if all(v == "none" for v in sides.values()):
+            # A dot (or a state without properties) powers every side
+            return delta[1] == 0
+        return any(DIRECTIONS[d] == delta and v != "none" for d, v in sides.items())
+    if category in ("repeater", "comparator"):
+        # facing points at the input; the output is on the opposite side
+        facing = DIRECTIONS.get(props.get("facing", ""))
+        return facing is not None and delta == (-facing[0], -facing[1], -facing[2])
+    if category == "torch":
+        return delta == (0, 1, 0)
+    if category in ("lever", "button"):
+        return delta == _attached_to(category, state, props)
+    return False
+
+
+def _fed_by(category: str, state: Any, delta: Pos, strong: bool) -> bool:
+    """Whether a redstone node takes input from a powered block at *delta* from it."""
+    props = parse_properties(state)
+    if category == "torch":
+        return delta == _attached_to(category, state, props)
+    if category in ("repeater", "comparator"):
+        return DIRECTIONS.get(props.get("facing", "")) == delta
+    if category == "wire":
+        # Only a strongly powered block powers the wire around it
+        return strong
+    return category in POWERED_BY_BLOCK
+
+
+def redstone_category(state: Any) -> Optional[str]:
+    """Returns the redstone category of a block state, or None for plain blocks."""
+    name = block_id(state).split(":", 1)[-1]
+    for category, needles in REDSTONE_CATEGORIES:
+        if any(n in name for n in needles):
+            return category
+    return None
+
+
+class CircuitGraph:
+    def __init__(self, nodes: Optional[Dict[Pos, str]] = None, adjacency: Optional[Dict[Pos, Set[Pos]]] = None):
+        """
+        Args:
+            nodes: Position -> category (a redstone category, "support" or "conductor").
+            adjacency: Position -> set of adjacent node positions.
+        """
+        self.nodes: Dict[Pos, str] = nodes or {}
+        self.adjacency: Dict[Pos, Set[Pos]] = adjacency or {p: set() for p in self.nodes}
+
+    @classmethod
+    def build(cls, blocks: Iterable[Tuple[Any, Any, Any, Any, Any]]) -> "CircuitGraph":
+        """
+        Builds the graph from (x, y, z, state, nbt) tuples. Entities and
+        non-integer positions are ignored.
+        """
+        solid: Set[Pos] = set()
+        redstone: Dict[Pos, str] = {}
+        states: Dict[Pos, Any] = {}
+        for x, y, z, state, _ in blocks:
+            if isinstance(state, str) and state.startswith("entity:"):
+                continue
+            if x != int(x) or y != int(y) or z != int(z):
+                continue
+            pos = (int(x), int(y), int(z))
+            category = redstone_category(state)
+            if category:
+                redstone[pos] = category
+                states[pos] = state
+            else:
+                solid.add(pos)
+
+        graph = cls(dict(redstone))
+        for pos, category in redstone.items():
+            x, y, z = pos
+            offsets = FACE_OFFSETS + WIRE_STEP_OFFSETS if category == "wire" else FACE_OFFSETS
+            for dx, dy, dz in offsets:
+                neighbor = (x + dx, y + dy, z + dz)
+                if neighbor in redstone:
+                    if (dx, dy, dz) in WIRE_STEP_OFFSETS and redstone[neighbor] != "wire":
+                        continue
+                    graph._link(pos, neighbor)
+                elif neighbor in solid and (dx, dy, dz) in FACE_OFFSETS:
+                    # Face-adjacent plain blocks carry, hold up or get pushed by the component.
+                    graph.nodes.setdefault(neighbor, SUPPORT)
+                    graph._link(pos, neighbor)
+
+        for pos in [p for p, c in graph.nodes.items() if c == SUPPORT]:
+            if graph._conducts(pos, states):
+                graph.nodes[pos] = CONDUCTOR
+        return graph
+
+    def _conducts(self, pos: Pos, states: Dict[Pos, Any]) -> bool:
+        """Whether a support block is powered by one adjacent node and feeds another."""
+        sources = []
+        for n in self.adjacency.get(pos, ()):
+            delta = (pos[0] - n[0], pos[1] - n[1], pos[2] - n[2])
+            if _powers(self.nodes[n], states[n], delta):
+                sources.append(n)
+        if not sources:
+            return False
+        strong = any(self.nodes[n] in STRONG_SOURCES for n in sources)
+        for n in self.adjacency.get(pos, ()):
+            delta = (pos[0] - n[0], pos[1] - n[1], pos[2] - n[2])
+            if any(s != n for s in sources) and _fed_by(self.nodes[n], states[n], delta, strong):
+                return True
+        return False
+
+    def _link(self, a: Pos, b: Pos):
+        self.adjacency.setdefault(a, set()).add(b)
+        self.adjacency.setdefault(b, set()).add(a)
+
+    def positions(self, category: str) -> List[Pos]:
+        """Returns the sorted positions of all nodes in a category."""
+        return sorted(p for p, c in self.nodes.items() if c == category)
+
+    def categories(self) -> Dict[str, List[Pos]]:
+        """Returns a category -> sorted positions index."""
+        index: Dict[str, List[Pos]] = {}
+        for pos, category in self.nodes.items():
+            index.setdefault(category, []).append(pos)
+        for positions in index.values():
+            positions.sort()
+        return index
+
+    def components(self) -> List[Set[Pos]]:
+        """
+        Returns connected groups of redstone nodes, each with its support blocks.
+        Components are connected through redstone-to-redstone edges and through
+        conductor blocks, which carry power from one node to another. A support
+        block that carries no power and is shared by two machines joins the
+        first one that claims it and never merges them.
+        """
+        visited: Set[Pos] = set()
+        claimed: Set[Pos] = set()
+        groups: List[Set[Pos]] = []
+
+        for start in sorted(p for p, c in self.nodes.items() if c not in (SUPPORT, CONDUCTOR)):
+            if start in visited:
+                continue
+            group: Set[Pos] = set()
+            queue = deque([start])
+            visited.add(start)
+            while queue:
+                curr = queue.popleft()
+                group.add(curr)
+                for neighbor in self.adjacency.get(curr, ()):
+                    if self.nodes[neighbor] == SUPPORT:
+                        if neighbor not in claimed:
+                            claimed.add(neighbor)
+                            group.add(neighbor)
+                    elif neighbor not in visited:
+                        visited.add(neighbor)
+                        queue.append(neighbor)
+            groups.append(group)
+
+        return groups
+
+    def subgraph(self, positions: Iterable[Pos], offset: Pos = (0, 0, 0)) -> "CircuitGraph":
+        """Returns the induced subgraph on *positions*, shifted by -offset."""
+        keep = set(p for p in positions if p in self.nodes)
+        ox, oy, oz = offset
+
+        def shift(p: Pos) -> Pos:
+            return (p[0] - ox, p[1] - oy, p[2] - oz)
+
+        nodes = {shift(p): self.nodes[p] for p in keep}
+        adjacency = {
+            shift(p): {shift(n) for n in self.adjacency.get(p, ()) if n in keep}
+            for p in keep
+        }
+        return CircuitGraph(nodes, adjacency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        order = sorted(self.nodes, key=lambda p: (p[1], p[0], p[2]))
+        ids = {p: i for i, p in enumerate(order)}
+        edges = sorted(
+            (ids[a], ids[b])
+            for a, neighbors in self.adjacency.items()
+            for b in neighbors
+            if ids[a] < ids[b]
+        )
+        return {
+            "nodes": [{"pos": list(p), "category": self.nodes[p]} for p in order],
+            "edges": [list(e) for e in edges],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CircuitGraph":
+        order = [tuple(n["pos"]) for n in data.get("nodes", [])]
+        graph = cls({p: n["category"] for p, n in zip(order, data.get("nodes", []))})
+        for a, b in data.get("edges", []):
+            graph._link(order[a], order[b])
+        return graph
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "CircuitGraph":
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
+
+
+def graph_index_path(component_path: str) -> str:
+    """Returns the sidecar graph index path for a component file."""
+    return os.path.splitext(component_path)[0] + ".graph.json"
+
@@ -0,0 +1,255 @@
+"""
+MIRA: Columnar Dataset Storage
+Parquet/Arrow form of the JSONL training datasets. Every block-list field
+(``blocks``, ``block_list``, ``original_blocks``, ``corrupted_blocks``) is
+stored as three ``list<int16>`` coordinate columns plus a ``list<string>``
+state column, which Parquet dictionary-encodes on disk (a circuit uses a few
+dozen distinct states). Common string metadata gets its own column and
+everything else rides along as a JSON ``extra`` column, so entries round-trip
+exactly.
+
+pyarrow is optional: it is imported on first use.
+"""
+
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from data_mining.json_codec import dumps, loads
+
+BLOCK_FIELDS = ("blocks", "block_list", "original_blocks", "corrupted_blocks")
+# Top-level string fields promoted to their own columns
+STRING_FIELDS = (
+    "id", "type", "entry_id", "schematic_id", "parent_id", "record",
+    "category", "difficulty", "description", "corruption_type",
+)
+INT16_MIN, INT16_MAX = -(1 << 15), (1 << 15) - 1
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Parquet datasets need pyarrow (pip install pyarrow)") from exc
+    return pa, pq
+
+
+def is_parquet_path(path: str) -> bool:
+    return path.endswith((".parquet", ".pq"))
+
+
+def dataset_schema():
+    """Arrow schema shared by every columnar dataset file."""
+    pa, _ = _pyarrow()
+    coord = pa.list_(pa.int16())
+    # Plain strings in Arrow: list<dictionary> columns can't be read back across row groups
+    state = pa.list_(pa.string())
+    fields = [pa.field(name, pa.string()) for name in STRING_FIELDS]
+    fields.append(pa.field("variant", pa.int32()))
+    for name in BLOCK_FIELDS:
+        fields += [
+            pa.field(f"{name}.x", coord),
+            pa.field(f"{name}.y", coord),
+            pa.field(f"{name}.z", coord),
+            pa.field(f"{name}.state", state),
+        ]
+    fields.append(pa.field("extra", pa.string()))
+    return pa.schema(fields)
+
+
+def _parquet_writer(path: str):
+    _, pq = _pyarrow()
+    return pq.ParquetWriter(path, dataset_schema(), compression="zstd", use_dictionary=True)
+
+
+def block_columns(blocks: Any) -> Optional[Dict[str, List[Any]]]:
+    """Returns x/y/z/state lists for *blocks*, or None if it doesn't fit int16 columns."""
+    if not isinstance(blocks, list):
+        return None
+    xs: List[int] = []
+    ys: List[int] = []
+    zs: List[int] = []
+    states: List[str] = []
+    for block in blocks:
+        if not isinstance(block, dict) or set(block) != {"x", "y", "z", "state"}:
+            return None
+        x, y, z, state = block["x"], block["y"], block["z"], block["state"]
+        for v in (x, y, z):
+            if type(v) is not int or not INT16_MIN <= v <= INT16_MAX:
+                return None
+        if not isinstance(state, str):
+            return None
+        xs.append(x)
+        ys.append(y)
+        zs.append(z)
+        states.append(state)
+    return {"x": xs, "y": ys, "z": zs, "state": states}
+
+
+def entries_to_batch(entries: List[Dict[str, Any]]):
+    """Converts entry dicts to a ``RecordBatch`` with ``dataset_schema()``."""
+    pa, _ = _pyarrow()
+    schema = dataset_schema()
+    columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+
+    for entry in entries:
+        extra = dict(entry)
+        for name in STRING_FIELDS:
+            value = entry.get(name)
+            if isinstance(value, str):
+                columns[name].append(value)
+                del extra[name]
+            else:
+                columns[name].append(None)
+        variant = entry.get("variant")
+        if type(variant) is int and -(1 << 31) <= variant < (1 << 31):
+            columns["variant"].append(variant)
+            del extra["variant"]
+        else:
+            columns["variant"].append(None)
+        for name in BLOCK_FIELDS:
+            # Block lists with float coordinates (entities) or extra keys stay in `extra`
+            cols = block_columns(entry[name]) if name in entry else None
+            if cols is not None:
+                del extra[name]
+            for axis in ("x", "y", "z", "state"):
+                columns[f"{name}.{axis}"].append(cols[axis] if cols is not None else None)
+        columns["extra"].append(dumps(extra) if extra else None)
+
+    return pa.RecordBatch.from_arrays(
+        [pa.array(columns[f.name], type=f.type) for f in schema], schema=schema
+    )
+
+
+def batch_to_entries(batch) -> Iterator[Dict[str, Any]]:
+    """Inverse of ``entries_to_batch``; accepts batches holding any subset of the columns."""
+    names = batch.schema.names
+    cols = {name: batch.column(i).to_pylist() for i, name in enumerate(names)}
+    for row in range(batch.num_rows):
+        entry: Dict[str, Any] = {}
+        extra = cols["extra"][row] if "extra" in cols else None
+        if extra:
+            entry.update(loads(extra))
+        for name in STRING_FIELDS + ("variant",):
+            if name in cols and cols[name][row] is not None:
+                entry[name] = cols[name][row]
+        for name in BLOCK_FIELDS:
+            xs = cols.get(f"{name}.x")
+            if xs is None or xs[row] is None:
+                continue
+            entry[name] = [
+                {"x": x, "y": y, "z": z, "state": s}
+                for x, y, z, s in zip(
+                    xs[row], cols[f"{name}.y"][row], cols[f"{name}.z"][row], cols[f"{name}.state"][row]
+                )
+            ]
+        yield entry
+
+
+class ParquetDatasetWriter:
+    """
+    Streams entries into a Parquet file, one row group per *batch_size*
+    entries. Same interface as ``JsonlWriter`` in ``scripts/convert_dataset.py``:
+    rows go to ``<path>.tmp``, which ``commit`` renames into place.
+    """
+
+    def __init__(self, path: str, always_create: bool = False, batch_size: int = 1024) -> None:
+        self.path = path
+        self.always_create = always_create
+        self.batch_size = batch_size
+        self.count = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._writer = None
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        if self._writer is None:
+            self._writer = _parquet_writer(self.path + ".tmp")
+        self._writer.write_batch(entries_to_batch(self._pending))
+        self._pending = []
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        self._pending.append(entry)
+        self.count += 1
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def commit(self) -> None:
+        self._flush()
+        if self._writer is None and self.always_create:
+            self._writer = _parquet_writer(self.path + ".tmp")
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self.path + ".tmp", self.path)
+
+    def abort(self) -> None:
+        self._pending = []
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.remove(self.path + ".tmp")
+
+
+def write_parquet(entries: Iterable[Dict[str, Any]], path: str, batch_size: int = 1024) -> int:
+    """Writes *entries* to a Parquet file and returns how many were written."""
+    writer = ParquetDatasetWriter(path, always_create=True, batch_size=batch_size)
+    try:
+        for entry in entries:
+            writer.write(entry)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+    return writer.count
+
+
+def merge_parquet(parts: List[str], dest: str) -> int:
+    """Concatenates Parquet files row group by row group into *dest*; returns the row count."""
+    _, pq = _pyarrow()
+    rows = 0
+    writer = _parquet_writer(dest + ".tmp")
+    try:
+        for part in parts:
+            if not os.path.exists(part):
+                continue
+            pf = pq.ParquetFile(part)
+            for i in range(pf.num_row_groups):
+                table = pf.read_row_group(i)
+                writer.write_table(table)
+                rows += table.num_rows
+    finally:
+        writer.close()
+    os.replace(dest + ".tmp", dest)
+    return rows
+
+
+def read_table(path: str, columns: Optional[List[str]] = None):
+    """
+    Memory-maps a dataset file as an Arrow ``Table`` for direct column
+    access, e.g. ``read_table(p, ["blocks.x", "blocks.state"])``.
+    """
+    _, pq = _pyarrow()
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def parquet_row_groups(path: str) -> int:
+    """Number of row groups in a Parquet dataset (the unit of parallel reads)."""
+    _, pq = _pyarrow()
+    return pq.ParquetFile(path).num_row_groups
+
+
+def iter_parquet_entries(
+    path: str,
+    batch_size: int = 1024,
+    row_groups: Optional[List[int]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the entry dicts of a Parquet dataset, one row group batch at a
+    time; *row_groups* restricts the read to those row groups.
+    """
+    _, pq = _pyarrow()
+    pf = pq.ParquetFile(path, memory_map=True)
+    for batch in pf.iter_batches(batch_size=batch_size, row_groups=row_groups):
+        yield from batch_to_entries(batch)
@@ -1,16 +1,102 @@
+import json
 import random
 import re
-import copy
 
-class CircuitCorruptor:
+WIRE_TYPES = ["minecraft:redstone_wire"]
+ROTATABLE_TYPES = ["repeater", "comparator", "observer", "piston", "dropper", "dispenser", "hopper"]
+HORIZONTAL_TYPES = ["repeater", "comparator"]
+SOURCE_TYPES = ["redstone_torch", "lever", "redstone_block", "target"]
+CORRUPTION_TYPES = ("break_wire", "rotate_component", "remove_source")
+
+
+def apply_modifications(blocks, modifications):
+    """
+    Materializes a corrupted block list from the original blocks and a
+    modification log (as produced by CircuitCorruptor / iter_batch).
+    """
+    changes = {tuple(mod["pos"]): mod["new"] for mod in modifications}
+    corrupted = []
+    for x, y, z, state, nbt in blocks:
+        new_state = changes.get((x, y, z))
+        if new_state is None:
+            corrupted.append((x, y, z, state, nbt))
+        elif new_state == "minecraft:air":
+            corrupted.append((x, y, z, new_state, None))
+        else:
+            corrupted.append((x, y, z, new_state, nbt))
+    return corrupted
+
+
+def normalize_batch_options(mix=None, faults=1):
+    """
+    Validates and normalizes the mix / faults options shared by iter_batch and
+    from_seed. Returns (mix, faults) with mix defaulting to equal weights over
+    CORRUPTION_TYPES and faults as an int or an inclusive (min, max) tuple.
+    """
+    mix = mix or {t: 1 for t in CORRUPTION_TYPES}
+    unknown = set(mix) - set(CORRUPTION_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown corruption types in mix: {sorted(unknown)}")
+    if isinstance(faults, (tuple, list)):
+        if len(faults) != 2 or not 1 <= faults[0] <= faults[1]:
+            raise ValueError(f"faults range must be (min, max) with 1 <= min <= max, got {faults!r}")
+        faults = (int(faults[0]), int(faults[1]))
+    elif faults < 1:
+        raise ValueError(f"faults must be at least 1, got {faults!r}")
+    return mix, faults
+
+
+class CandidateIndex:
+    """
+    Per-circuit index of block positions (list indices) eligible for each
+    corruption type. Built with a single scan and shared by every variant of
+    the same circuit.
+    """
+
     def __init__(self, blocks):
+        self.wire = []
+        self.rotatable = []
+        self.source = []
+        for i, (x, y, z, state, nbt) in enumerate(blocks):
+            if any(t in state for t in WIRE_TYPES):
+                self.wire.append(i)
+            if "facing=" in state and any(t in state for t in ROTATABLE_TYPES):
+                self.rotatable.append(i)
+            if any(t in state for t in SOURCE_TYPES):
+                self.source.append(i)
+
+
+class CircuitCorruptor:
+    def __init__(self, blocks, index=None):
         """
         blocks: List of (x, y, z, block_state, nbt) tuples.
+        index: Optional CandidateIndex for blocks, to share between variants.
+
+        The block list is never copied or mutated; changes are kept as a sparse
+        overlay of list index -> replacement tuple.
         """
-        self.original_blocks = copy.deepcopy(blocks)
-        self.corrupted_blocks = copy.deepcopy(blocks)
+        self.original_blocks = blocks
+        self.index = index if index is not None else CandidateIndex(blocks)
+        self.overlay = {}
         self.modifications = []
 
+    def fork(self):
+        """
+        Returns a fresh corruptor over the same circuit and candidate index,
+        with no modifications applied.
+        """
+        return CircuitCorruptor(self.original_blocks, index=self.index)
+
+    @property
+    def corrupted_blocks(self):
+        """Materializes the full corrupted block list."""
+        if not self.overlay:
+            return list(self.original_blocks)
+        return [self.overlay.get(i, b) for i, b in enumerate(self.original_blocks)]
+
+    def _current(self, idx):
+        return self.overlay.get(idx, self.original_blocks[idx])
+
     def corrupt(self, mode="random"):
         """
         Applies a random corruption.
@@ -19,107 +105,177 @@ class CircuitCorruptor:
         options = [self.break_redstone_dust, self.rotate_repeater, self.remove_power_source]
         # Shuffle options to try random ones
         random.shuffle(options)
-        
+
         success = False
         for opt in options:
             if opt():
                 success = True
                 break
-        
+
         return self.corrupted_blocks, self.modifications
 
     def break_redstone_dust(self):
-        # Find all redstone wire
-        candidates = []
-        for i, (x, y, z, state, nbt) in enumerate(self.corrupted_blocks):
-            if "minecraft:redstone_wire" in state:
-                candidates.append(i)
-        
-        if not candidates:
-            return False
-
-        idx = random.choice(candidates)
-        x, y, z, state, nbt = self.corrupted_blocks[idx]
-        
-        # Action: Remove it (Set to Air)
-        self.corrupted_blocks[idx] = (x, y, z, "minecraft:air", None)
-        self.modifications.append({
-            "type": "break_wire",
-            "pos": (x, y, z),
-            "original": state,
-            "new": "minecraft:air"
-        })
-        return True
+        return self._apply_random("break_wire")
 
     def rotate_repeater(self):
-        # Find repeaters or comparators or observers
-        candidates = []
-        target_types = ["repeater", "comparator", "observer", "piston", "dropper", "dispenser", "hopper"]
-        for i, (x, y, z, state, nbt) in enumerate(self.corrupted_blocks):
-            if "facing=" in state and any(t in state for t in target_types):
-                candidates.append(i)
-        
+        return self._apply_random("rotate_component")
+
+    def remove_power_source(self):
+        return self._apply_random("remove_source")
+
+    def _apply_random(self, corruption_type, rng=random):
+        candidates = self._candidates(corruption_type)
         if not candidates:
             return False
-            
-        idx = random.choice(candidates)
-        x, y, z, state, nbt = self.corrupted_blocks[idx]
-        
-        # Parse facing
-        match = re.search(r"facing=([a-z]+)", state)
-        if not match:
-            return False
-        
-        current_facing = match.group(1)
-        directions = ["north", "east", "south", "west", "up", "down"]
-        
-        # Filter valid directions based on block type
-        # Most redstone components are horizontal only
-        is_horizontal = any(t in state for t in ["repeater", "comparator"])
-        if is_horizontal:
-            valid_dirs = ["north", "east", "south", "west"]
+        return self._apply(corruption_type, rng.choice(candidates), rng)
+
+    def _candidates(self, corruption_type):
+        if corruption_type == "break_wire":
+            # Wires already replaced by an earlier modification are no longer candidates
+            return [i for i in self.index.wire if i not in self.overlay]
+        if corruption_type == "rotate_component":
+            # Repeaters, comparators, observers and other directional components
+            return [
+                i for i in self.index.rotatable
+                if i not in self.overlay or "facing=" in self.overlay[i][3]
+            ]
+        if corruption_type == "remove_source":
+            # Torches, levers, blocks of redstone
+            return [i for i in self.index.source if i not in self.overlay]
+        raise ValueError(f"Unknown corruption type: {corruption_type}")
+
+    def _apply(self, corruption_type, idx, rng=random):
+        x, y, z, state, nbt = self._current(idx)
+
+        if corruption_type == "rotate_component":
+            # Parse facing
+            match = re.search(r"facing=([a-z]+)", state)
+            if not match:
+                return False
+
+            current_facing = match.group(1)
+            directions = ["north", "east", "south", "west", "up", "down"]
+
+            # Filter valid directions based on block type
+            # Most redstone components are horizontal only
+            is_horizontal = any(t in state for t in HORIZONTAL_TYPES)
+            if is_horizontal:
+                valid_dirs = ["north", "east", "south", "west"]
+            else:
+                valid_dirs = directions
+
+            possible_dirs = [d for d in valid_dirs if d != current_facing]
+            if not possible_dirs:
+                return False
+
+            new_facing = rng.choice(possible_dirs)
+            new_state = state.replace(f"facing={current_facing}", f"facing={new_facing}")
+            self.overlay[idx] = (x, y, z, new_state, nbt)
         else:
-            valid_dirs = directions
+            # Action: Remove it (Set to Air)
+            new_state = "minecraft:air"
+            self.overlay[idx] = (x, y, z, new_state, None)
 
-        possible_dirs = [d for d in valid_dirs if d != current_facing]
-        if not possible_dirs:
-            return False
-            
-        new_facing = random.choice(possible_dirs)
-        
-        new_state = state.replace(f"facing={current_facing}", f"facing={new_facing}")
-        self.corrupted_blocks[idx] = (x, y, z, new_state, nbt)
-        
         self.modifications.append({
-            "type": "rotate_component",
+            "type": corruption_type,
             "pos": (x, y, z),
             "original": state,
             "new": new_state
         })
         return True
 
-    def remove_power_source(self):
-        # Find torches, levers, blocks of redstone
-        candidates = []
-        target_blocks = ["redstone_torch", "lever", "redstone_block", "target"]
-        for i, (x, y, z, state, nbt) in enumerate(self.corrupted_blocks):
-            if any(t in state for t in target_blocks):
-                candidates.append(i)
-                
-        if not candidates:
-            return False
-            
-        idx = random.choice(candidates)
-        x, y, z, state, nbt = self.corrupted_blocks[idx]
-        
-        self.corrupted_blocks[idx] = (x, y, z, "minecraft:air", None)
-        self.modifications.append({
-            "type": "remove_source",
-            "pos": (x, y, z),
-            "original": state,
-            "new": "minecraft:air"
-        })
-        return True
+    # ------------------------------------------------------------------ #
+    # Batch generation
+    # ------------------------------------------------------------------ #
+    def iter_batch(self, n, seed=0, mix=None, faults=1, max_attempts=None):
+        """
+        Yields up to n distinct corruption variants of the original circuit.
+
+        Args:
+            n: Number of variants to produce.
+            seed: Batch seed. The same seed, mix and faults always yield the same variants.
+            mix: Optional {corruption_type: weight} dict; defaults to equal weights
+                 over CORRUPTION_TYPES.
+            faults: Number of simultaneous modifications per variant (int), or an
+                    inclusive (min, max) range drawn per variant.
+            max_attempts: Cap on draws before giving up on finding new distinct
+                          variants (small circuits have few). Defaults to 20 * n.
+
+        Each variant is a diff against the original, not a block list:
+            {"variant", "seed", "corruption_type", "modifications"}
+        Re-running a single variant with CircuitCorruptor.from_seed reproduces it.
+        """
+        mix, faults = normalize_batch_options(mix, faults)
+
+        batch_rng = random.Random(seed)
+        max_attempts = max_attempts if max_attempts is not None else 20 * n
+        seen = set()
+        produced = 0
+        attempts = 0
+
+        while produced < n and attempts < max_attempts:
+            attempts += 1
+            variant_seed = batch_rng.getrandbits(32)
+            variant = self._draw_variant(variant_seed, mix, faults)
+            if variant is None:
+                continue
+
+            # With faults > 1 a later rotation can turn a block back to its
+            # original facing; such entries change nothing and must not make
+            # otherwise identical variants look distinct.
+            key = tuple(sorted(
+                (i, b[3]) for i, b in variant.overlay.items()
+                if b[3] != self.original_blocks[i][3]
+            ))
+            if not key or key in seen:
+                continue
+            seen.add(key)
+
+            changed = {tuple(self.original_blocks[i][:3]) for i, _ in key}
+            first = next(m for m in variant.modifications if tuple(m["pos"]) in changed)
 
+            yield {
+                "variant": produced,
+                "seed": variant_seed,
+                "corruption_type": first["type"],
+                "modifications": variant.modifications,
+            }
+            produced += 1
 
+    def generate_batch(self, n, seed=0, mix=None, faults=1, max_attempts=None):
+        """Returns iter_batch(...) as a list."""
+        return list(self.iter_batch(n, seed=seed, mix=mix, faults=faults, max_attempts=max_attempts))
+
+    def write_batch_jsonl(self, fh, n, seed=0, mix=None, faults=1, max_attempts=None, **fields):
+        """
+        Streams variants from iter_batch to an open text file, one JSON line
+        each, merged with any extra *fields* (e.g. schematic_id). Returns the
+        number of variants written.
+        """
+        written = 0
+        for variant in self.iter_batch(n, seed=seed, mix=mix, faults=faults, max_attempts=max_attempts):
+            fh.write(json.dumps({**fields, **variant}) + "\n")
+            written += 1
+        return written
+
+    @classmethod
+    def from_seed(cls, blocks, variant_seed, mix=None, faults=1, index=None):
+        """Rebuilds the corruptor state of a single batch variant from its seed."""
+        mix, faults = normalize_batch_options(mix, faults)
+        base = cls(blocks, index=index)
+        return base._draw_variant(variant_seed, mix, faults)
+
+    def _draw_variant(self, variant_seed, mix, faults):
+        rng = random.Random(variant_seed)
+        k = rng.randint(faults[0], faults[1]) if isinstance(faults, tuple) else faults
+        variant = self.fork()
+
+        for _ in range(k):
+            # Restrict the draw to types that still have candidates left
+            available = [t for t in mix if mix[t] > 0 and variant._candidates(t)]
+            if not available:
+                break
+            corruption_type = rng.choices(available, weights=[mix[t] for t in available])[0]
+            variant._apply(corruption_type, rng.choice(variant._candidates(corruption_type)), rng)
 
+        return variant if variant.modifications else None
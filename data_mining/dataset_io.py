@@ -0,0 +1,27 @@
+"""
+MIRA: Dataset I/O Helpers
+Small file-level helpers shared by the dataset scripts (convert_dataset,
+analyze_dataset) for reading JSONL datasets in parallel.
+"""
+
+import os
+from typing import List, Tuple
+
+
+def find_shards(input_path: str, count: int) -> List[Tuple[int, int]]:
+    """Split a JSONL file into up to *count* ``(start, end)`` byte ranges on line boundaries."""
+    size = os.path.getsize(input_path)
+    bounds = [0]
+    with open(input_path, "rb") as fh:
+        for k in range(1, count):
+            pos = size * k // count
+            if pos <= bounds[-1]:
+                continue
+            # Step back one byte so a range starting exactly on a line keeps that line
+            fh.seek(pos - 1)
+            fh.readline()
+            pos = fh.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
@@ -0,0 +1,128 @@
+"""
+MIRA: JSON Codec
+Shared JSON encode/decode for the dataset pipeline. Uses orjson when it is
+installed and the stdlib ``json`` module otherwise. For ordinary dataset
+values both backends decode to the same data (orjson writes compact
+separators and raw UTF-8), but they differ at the edges: orjson encodes
+NaN and Infinity as ``null`` where ``json`` writes the non-standard
+``NaN`` / ``Infinity`` tokens, and orjson raises ``TypeError`` for
+integers outside the 64-bit range, which ``json`` writes as-is.
+
+NBT values (nbtlib tags from litemapy / mcschematic) are converted to plain
+JSON structures -- compounds to objects, lists and int/long/byte arrays to
+arrays, numeric tags to numbers -- instead of being emitted as SNBT strings.
+
+``JsonlStream`` writes JSON lines through a large write buffer.
+"""
+
+import json
+from typing import IO, Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+# orjson.JSONDecodeError subclasses this, so one except clause covers both backends
+JSONDecodeError = json.JSONDecodeError
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+if orjson is not None:
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+
+
+def to_native(obj: Any) -> Any:
+    """
+    Converts one value the encoders don't know natively. NBT tags are
+    unpacked to builtin types (nbtlib's ``unpack``), arrays via ``tolist``;
+    anything else falls back to ``str`` as the old encoder did.
+    """
+    if hasattr(obj, "unpack"):
+        try:
+            return obj.unpack()
+        except TypeError:
+            pass
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if isinstance(obj, float):
+        return float(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+class NativeJSONEncoder(json.JSONEncoder):
+    """Stdlib encoder with the same fallback conversion as the orjson path."""
+
+    def default(self, obj: Any) -> Any:
+        return to_native(obj)
+
+
+def dumpb(obj: Any) -> bytes:
+    """Encodes *obj* as UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=to_native, option=_ORJSON_OPTS)
+    return json.dumps(obj, cls=NativeJSONEncoder, ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Encodes *obj* as a JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=to_native, option=_ORJSON_OPTS).decode("utf-8")
+    return json.dumps(obj, cls=NativeJSONEncoder, ensure_ascii=False)
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Decodes a JSON document from text or UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+
+class JsonlStream:
+    """
+    Buffered JSON-lines writer. Encodes straight to bytes and lets the file
+    buffer (*buffer_size*, 1 MiB by default) batch the writes; call
+    ``flush`` where the lines must be on disk.
+    """
+
+    def __init__(self, path: str, mode: str = "w", buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        if mode not in ("w", "a"):
+            raise ValueError(f"JsonlStream mode must be 'w' or 'a', not {mode!r}")
+        self.path = path
+        self.count = 0
+        self._fh: Optional[IO[bytes]] = open(path, mode + "b", buffering=buffer_size)
+
+    def __enter__(self) -> "JsonlStream":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def write(self, obj: Any) -> None:
+        self._fh.write(dumpb(obj) + b"\n")
+        self.count += 1
+
+    def write_line(self, line: Union[str, bytes]) -> None:
+        """Writes an already encoded JSON line (without the trailing newline)."""
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        self._fh.write(line + b"\n")
+        self.count += 1
+
+    def tell(self) -> int:
+        return self._fh.tell()
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
@@ -9,6 +9,22 @@ import re
 from litemapy import Schematic, Region, BlockState
 import mcschematic
 
+def split_block_state(state_str):
+    """
+    Converts a state string like 'minecraft:repeater[delay=2,facing=east]'
+    into a litemapy BlockState.
+    """
+    if "[" in state_str and state_str.endswith("]"):
+        base_id, props_str = state_str.split("[", 1)
+        props_str = props_str[:-1]
+        props = {}
+        for p in props_str.split(","):
+            if "=" in p:
+                k, v = p.split("=", 1)
+                props[k.strip()] = v.strip()
+        return BlockState(base_id, **props)
+    return BlockState(state_str)
+
 class SchematicParser:
     def __init__(self, file_path):
         self.file_path = file_path
@@ -90,10 +106,14 @@ class SchematicParser:
             
         return ((int(min_x), int(min_y), int(min_z)), (int(max_x), int(max_y), int(max_z)))
 
-    def parse_blocks(self):
+    def parse_blocks(self, structured=False):
         """
         Yields tuples of (x, y, z, block_state_string, nbt)
         Coordinates are relative to the schematic origin.
+
+        With structured=True the state slot holds a litemapy BlockState instead
+        of a string, so callers that write litematics back out (e.g. the
+        WorldSlicer) never have to re-parse the state string.
         """
         if not self.is_litematic:
             blocks = []
@@ -116,7 +136,8 @@ class SchematicParser:
                     if match:
                         nbt_data = match.group(2)
                 
-                blocks.append((x, y, z, block_state_str, nbt_data))
+                state = split_block_state(block_state_str) if structured else block_state_str
+                blocks.append((x, y, z, state, nbt_data))
             return blocks
 
         blocks = []
@@ -189,18 +210,22 @@ class SchematicParser:
                         if block.id != "minecraft:air":
                             block_str = block.id
                             
-                            try:
-                                props_dict = {}
-                                if callable(block.properties):
-                                    props_items = block.properties()
-                                    props_dict = dict(props_items)
-                                
-                                if props_dict:
-                                    props = ",".join([f"{k}={v}" for k, v in sorted(props_dict.items())])
-                                    block_str = f"{block_str}[{props}]"
-                            except Exception as e:
-                                print(f"Error parsing properties for {block}: {e}")
-                                pass
+                            if structured:
+                                # Region palette entries are already BlockStates
+                                block_str = block
+                            else:
+                                try:
+                                    props_dict = {}
+                                    if callable(block.properties):
+                                        props_items = block.properties()
+                                        props_dict = dict(props_items)
+                                    
+                                    if props_dict:
+                                        props = ",".join([f"{k}={v}" for k, v in sorted(props_dict.items())])
+                                        block_str = f"{block_str}[{props}]"
+                                except Exception as e:
+                                    print(f"Error parsing properties for {block}: {e}")
+                                    pass
                             
                             nbt_data = None
                             
@@ -0,0 +1,91 @@
+"""
+MIRA: Dataset Record Helpers
+Content hashing and diff materialization for dataset entries written as
+JSONL. Corruption entries can be stored as a diff against their parent
+generation entry (referenced by ``parent_id`` and ``parent_hash``) instead of
+embedding both the original and corrupted block lists.
+Also provides an origin-independent block hash for near-duplicate detection.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def block_list_hash(block_list: List[Dict[str, Any]]) -> str:
+    """SHA-256 over the canonical JSON of a ``{"x","y","z","state"}`` block list."""
+    canonical = json.dumps(
+        [[b.get("x"), b.get("y"), b.get("z"), b.get("state")] for b in block_list],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def canonical_block_hash(blocks: Iterable[Tuple[Any, Any, Any, Any, Any]]) -> str:
+    """SHA-256 over the placed blocks of ``(x, y, z, state, nbt)`` tuples, ignoring origin.
+
+    Positions are taken relative to the minimum corner and sorted, so the same
+    build saved at a different offset or with a different region layout hashes
+    the same. Air, entities and block-entity NBT are ignored.
+    """
+    placed = [
+        (x, y, z, str(state))
+        for x, y, z, state, _ in blocks
+        if not str(state).startswith("entity:") and str(state) != "minecraft:air"
+    ]
+    if not placed:
+        return hashlib.sha256(b"").hexdigest()
+    min_x = min(b[0] for b in placed)
+    min_y = min(b[1] for b in placed)
+    min_z = min(b[2] for b in placed)
+    canonical = json.dumps(
+        sorted([x - min_x, y - min_y, z - min_z, state] for x, y, z, state in placed),
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def apply_block_diff(
+    block_list: List[Dict[str, Any]],
+    modifications: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Return a new block list with each modification's ``new`` state applied at its ``pos``."""
+    changes = {tuple(mod["pos"]): mod["new"] for mod in modifications}
+    out = []
+    for b in block_list:
+        new_state = changes.get((b["x"], b["y"], b["z"]))
+        if new_state is None:
+            out.append(b)
+        else:
+            out.append({**b, "state": new_state})
+    return out
+
+
+def is_diff_record(entry: Dict[str, Any]) -> bool:
+    """Return True if *entry* is a diff-based corruption record."""
+    return entry.get("type") == "corruption" and entry.get("record") == "diff"
+
+
+def materialize_corruption(
+    entry: Dict[str, Any],
+    parent: Optional[Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """Expand a corruption entry to the full ``original_blocks``/``corrupted_blocks`` form.
+
+    Full-format entries are returned unchanged.  Diff records need their
+    parent generation entry; ``None`` is returned if it is missing or its
+    block list no longer matches ``parent_hash``.
+    """
+    if not is_diff_record(entry):
+        return entry
+    if parent is None:
+        return None
+
+    original = parent.get("block_list", [])
+    if entry.get("parent_hash") and block_list_hash(original) != entry["parent_hash"]:
+        return None
+
+    full = dict(entry)
+    full["original_blocks"] = original
+    full["corrupted_blocks"] = apply_block_diff(original, entry.get("modifications", []))
+    return full
@@ -0,0 +1,134 @@
+"""
+MIRA: Support / Attachment Dependency Graph
+Derives which blocks rest on or hang from which other blocks (wire and
+repeaters on the block below, wall torches and buttons on the block behind,
+piston heads on their base, door halves, ceiling levers...) and peels a
+structure into removal layers that never take away a block something else
+still depends on.
+"""
+
+import heapq
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+from data_mining.circuit_graph import DIRECTIONS, block_id, parse_properties
+
+Pos = Tuple[Any, Any, Any]
+
+BELOW = (0, -1, 0)
+ABOVE = (0, 1, 0)
+
+# Block-id substrings of blocks that need the block underneath them. Signs are
+# matched by exact suffix in supporters_of, since "sign" alone would also catch
+# wall and hanging signs.
+FLOOR_SUPPORTED = (
+    "redstone_wire", "repeater", "comparator", "rail", "pressure_plate",
+    "carpet", "torch", "door", "banner", "sapling", "flower_pot",
+)
+# Block-id substrings of blocks attached to the block behind their facing.
+WALL_ATTACHED = ("wall_torch", "wall_sign", "wall_banner", "ladder", "tripwire_hook")
+# Blocks whose face property (floor / wall / ceiling) decides what holds them.
+FACE_ATTACHED = ("lever", "_button")
+
+
+def _offset(pos: Pos, delta: Tuple[int, int, int], sign: int = 1) -> Pos:
+    return (pos[0] + sign * delta[0], pos[1] + sign * delta[1], pos[2] + sign * delta[2])
+
+
+def supporters_of(pos: Pos, state: Any) -> List[Pos]:
+    """Returns the positions a block at *pos* must be attached to, whether or not they exist."""
+    name = block_id(state).split(":", 1)[-1]
+    props = parse_properties(state)
+    facing = DIRECTIONS.get(props.get("facing", ""))
+
+    if any(t in name for t in FACE_ATTACHED):
+        face = props.get("face", "floor")
+        if face == "ceiling":
+            return [_offset(pos, ABOVE)]
+        if face == "wall" and facing:
+            return [_offset(pos, facing, -1)]
+        return [_offset(pos, BELOW)]
+
+    if name.endswith("_wall_hanging_sign"):
+        # Held by its bracket, which spans the blocks on either side of its facing
+        if not facing or facing[1]:
+            return []
+        side = (facing[2], 0, facing[0])
+        return [_offset(pos, side), _offset(pos, side, -1)]
+
+    if name.endswith("_hanging_sign"):
+        return [_offset(pos, ABOVE)]
+
+    if any(t in name for t in WALL_ATTACHED):
+        return [_offset(pos, facing, -1)] if facing else []
+
+    if name == "piston_head" and facing:
+        return [_offset(pos, facing, -1)]
+
+    if "lantern" in name and props.get("hanging") == "true":
+        return [_offset(pos, ABOVE)]
+
+    if name.endswith("_sign") or (any(t in name for t in FLOOR_SUPPORTED) and "trapdoor" not in name):
+        return [_offset(pos, BELOW)]
+
+    return []
+
+
+def build_support_dag(blocks: Iterable[Tuple[Any, Any, Any, Any, Any]]) -> Dict[Pos, Set[Pos]]:
+    """
+    Returns position -> set of positions it depends on, limited to blocks that
+    are present. A dependent must be removed before any of its supporters.
+    """
+    states = {(x, y, z): state for x, y, z, state, _ in blocks}
+    dag: Dict[Pos, Set[Pos]] = {}
+    for pos, state in states.items():
+        dag[pos] = {s for s in supporters_of(pos, state) if s in states and s != pos}
+    return dag
+
+
+def peel_layers(blocks: Iterable[Tuple[Any, Any, Any, Any, Any]]) -> Iterator[Tuple[Any, List[Pos]]]:
+    """
+    Yields (y, positions) removal layers in a valid deconstruction order.
+
+    Each layer is every currently removable block (nothing remaining depends
+    on it) at the highest Y that has one. If a dependency cycle leaves no
+    removable block, the highest remaining block is forced out on its own.
+    """
+    dag = build_support_dag(blocks)
+    dependents: Dict[Pos, int] = {pos: 0 for pos in dag}
+    for supports in dag.values():
+        for s in supports:
+            dependents[s] += 1
+
+    removable: Dict[Any, Set[Pos]] = {}
+    heap: List[Any] = []
+
+    def mark_removable(pos: Pos):
+        bucket = removable.setdefault(pos[1], set())
+        if not bucket:
+            heapq.heappush(heap, -pos[1])
+        bucket.add(pos)
+
+    for pos, count in dependents.items():
+        if count == 0:
+            mark_removable(pos)
+
+    remaining = set(dag)
+    while remaining:
+        layer: List[Pos] = []
+        while heap and not layer:
+            y = -heapq.heappop(heap)
+            layer = sorted(removable.pop(y, set()), key=lambda p: (p[0], p[2]))
+
+        if not layer:
+            # Dependency cycle: force out the highest remaining block
+            forced = max(remaining, key=lambda p: (p[1], p[0], p[2]))
+            y, layer = forced[1], [forced]
+
+        for pos in layer:
+            remaining.discard(pos)
+            for s in dag[pos]:
+                dependents[s] -= 1
+                if dependents[s] == 0 and s in remaining:
+                    mark_removable(s)
+
+        yield y, layer
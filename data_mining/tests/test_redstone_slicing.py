@@ -0,0 +1,65 @@
+import os
+import sys
+import unittest
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from data_mining.circuit_graph import CONDUCTOR, CircuitGraph
+from data_mining.world_slicer import WorldSlicer
+
+
+def _islands(blocks):
+    slicer = WorldSlicer(distance_threshold=2, min_size=1, mode="redstone")
+    return slicer._find_redstone_islands(blocks, CircuitGraph.build(blocks))
+
+
+class TestRedstoneSlicing(unittest.TestCase):
+    def test_torch_not_gate_is_one_component(self):
+        # Lever -> wire -> block -> wall torch -> wire
+        blocks = [
+            (0, 0, 0, "minecraft:stone", None),
+            (1, 0, 0, "minecraft:stone", None),
+            (2, 0, 0, "minecraft:stone", None),
+            (3, 0, 0, "minecraft:stone", None),
+            (0, 1, 0, "minecraft:lever[face=floor,facing=east,powered=false]", None),
+            (1, 1, 0, "minecraft:redstone_wire[east=side,north=none,south=none,west=side]", None),
+            (2, 1, 0, "minecraft:stone", None),
+            (3, 1, 0, "minecraft:redstone_wall_torch[facing=east,lit=true]", None),
+            (4, 1, 0, "minecraft:redstone_wire[east=none,north=none,south=none,west=side]", None),
+            (4, 0, 0, "minecraft:stone", None),
+        ]
+        graph = CircuitGraph.build(blocks)
+        self.assertEqual(graph.nodes[(2, 1, 0)], CONDUCTOR)
+        self.assertEqual(len(graph.components()), 1)
+        self.assertEqual(len(_islands(blocks)), 1)
+
+    def test_repeater_into_block_into_wire_is_one_component(self):
+        # Repeater (input from the west) -> block -> wire on the far side
+        blocks = [
+            (0, 0, 0, "minecraft:stone", None),
+            (1, 0, 0, "minecraft:stone", None),
+            (2, 0, 0, "minecraft:stone", None),
+            (3, 0, 0, "minecraft:stone", None),
+            (4, 0, 0, "minecraft:stone", None),
+            (0, 1, 0, "minecraft:redstone_wire[east=side,north=none,south=none,west=none]", None),
+            (1, 1, 0, "minecraft:repeater[delay=1,facing=west,locked=false,powered=false]", None),
+            (2, 1, 0, "minecraft:stone", None),
+            (3, 1, 0, "minecraft:redstone_wire[east=side,north=none,south=none,west=side]", None),
+            (4, 1, 0, "minecraft:redstone_wire[east=none,north=none,south=none,west=side]", None),
+        ]
+        self.assertEqual(len(CircuitGraph.build(blocks).components()), 1)
+        self.assertEqual(len(_islands(blocks)), 1)
+
+    def test_unpowered_shared_block_does_not_merge(self):
+        # Two wires meeting a block from opposite sides without pointing into it
+        blocks = [
+            (0, 1, 0, "minecraft:redstone_wire[east=none,north=side,south=side,west=none]", None),
+            (1, 1, 0, "minecraft:stone", None),
+            (2, 1, 0, "minecraft:redstone_wire[east=none,north=side,south=side,west=none]", None),
+        ]
+        self.assertEqual(len(CircuitGraph.build(blocks).components()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
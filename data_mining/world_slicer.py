@@ -4,46 +4,136 @@ Parses a large schematic containing multiple spaced-out redstone contraptions
 and slices them into independent, normalized circuit components.
 """
 
+import json
 import os
 import sys
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Tuple, Dict, Any, Set
 
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from data_mining.parser import SchematicParser
+from data_mining.circuit_graph import CircuitGraph, graph_index_path
+from data_mining.parser import SchematicParser, split_block_state
 from litemapy import Schematic, Region, BlockState
 
+EXPORT_LAYOUTS = ("files", "multi_region", "archive")
+SLICE_MODES = ("proximity", "redstone")
+
+
+def _to_block_state(state: Any) -> BlockState:
+    if isinstance(state, BlockState):
+        return state
+    return split_block_state(state)
+
+
+def _build_region(comp: List[Tuple[int, int, int, Any, Any]], x: int = 0, y: int = 0, z: int = 0) -> Region:
+    max_x = max(b[0] for b in comp)
+    max_y = max(b[1] for b in comp)
+    max_z = max(b[2] for b in comp)
+
+    reg = Region(x, y, z, max_x + 1, max_y + 1, max_z + 1)
+    for bx, by, bz, state, _ in comp:
+        try:
+            reg[bx, by, bz] = _to_block_state(state)
+        except Exception as e:
+            print(f"Error parsing block state {state} in slice saving: {e}")
+    return reg
+
+
+def _write_component(job: Tuple[int, List[Tuple[int, int, int, Any, Any]], str, str]) -> Tuple[int, int, str]:
+    """Worker entry point: writes one component to its own .litematic file."""
+    idx, comp, output_dir, base_name = job
+    schem = Schematic(name=f"{base_name}_{idx}", author="MIRA Slicer", regions={"Main": _build_region(comp)})
+    out_path = os.path.join(output_dir, f"{base_name}_{idx}.litematic")
+    schem.save(out_path)
+    return idx, len(comp), out_path
+
+
+def _shard_path(output_dir: str, base_name: str, shard_idx: int, num_shards: int) -> str:
+    return os.path.join(output_dir, f"{base_name}-{shard_idx + 1:05d}-of-{num_shards:05d}.zip")
+
+
+def _write_shard(job: Tuple[int, int, List[Tuple[int, List[Tuple[int, int, int, Any, Any]]]], str, str]) -> Tuple[int, int, str]:
+    """Worker entry point: writes a batch of components into one zip shard."""
+    shard_idx, num_shards, batch, output_dir, base_name = job
+    out_path = _shard_path(output_dir, base_name, shard_idx, num_shards)
+    with tempfile.TemporaryDirectory() as tmp_dir, zipfile.ZipFile(out_path, "w", zipfile.ZIP_STORED) as zf:
+        for idx, comp in batch:
+            # Litematics are already gzipped, so the archive only stores them.
+            _, _, tmp_path = _write_component((idx, comp, tmp_dir, base_name))
+            zf.write(tmp_path, arcname=os.path.basename(tmp_path))
+            os.remove(tmp_path)
+    return shard_idx, len(batch), out_path
+
+
 class WorldSlicer:
-    def __init__(self, distance_threshold: int = 2, min_size: int = 3):
+    def __init__(self, distance_threshold: int = 2, min_size: int = 3, mode: str = "proximity"):
         """
         Args:
             distance_threshold: Maximum distance between two blocks to consider them connected.
                                 Default of 2 is ideal for redstone networks.
             min_size: Minimum number of blocks in a component to save it (filters out noise).
+            mode: "proximity" groups any blocks within distance_threshold.
+                  "redstone" cuts components along the redstone adjacency graph
+                  (see data_mining.circuit_graph) and only attaches other blocks
+                  within distance_threshold of that graph, so shared terrain or
+                  decoration no longer merges unrelated machines.
         """
+        if mode not in SLICE_MODES:
+            raise ValueError(f"Unknown slice mode '{mode}', expected one of {SLICE_MODES}")
         self.distance_threshold = distance_threshold
         self.min_size = min_size
+        self.mode = mode
 
-    def slice_schematic(self, file_path: str) -> List[List[Tuple[int, int, int, str, Any]]]:
+    def slice_schematic(self, file_path: str, structured: bool = False) -> List[List[Tuple[int, int, int, str, Any]]]:
         """
         Parses a schematic file, slices it into distinct components, and returns them.
+
+        With structured=True the components carry litemapy BlockStates instead of
+        state strings, which save_components_parallel writes back without re-parsing.
+        """
+        return [comp for comp, _ in self._slice(file_path, structured, with_graphs=False)]
+
+    def slice_with_graphs(self, file_path: str, structured: bool = False) -> List[Tuple[List[Tuple[int, int, int, str, Any]], CircuitGraph]]:
+        """
+        Like slice_schematic, but pairs every component with its redstone
+        adjacency graph in the component's normalized coordinates.
         """
+        return self._slice(file_path, structured, with_graphs=True)
+
+    def _slice(self, file_path: str, structured: bool, with_graphs: bool) -> List[Tuple[List[Tuple[int, int, int, str, Any]], Any]]:
+        """Returns (component, graph) pairs; graphs are only built with with_graphs=True, otherwise None."""
         print(f"Loading schematic from {file_path}...")
         parser = SchematicParser(file_path)
-        blocks = parser.parse_blocks()
+        blocks = parser.parse_blocks(structured=structured)
         print(f"Parsed {len(blocks)} total non-air blocks from schematic.")
 
-        raw_islands = self._find_islands(blocks)
-        print(f"Connected component BFS discovered {len(raw_islands)} total islands.")
+        if self.mode == "redstone":
+            graph = CircuitGraph.build(blocks)
+            raw_islands = self._find_redstone_islands(blocks, graph)
+            print(f"Redstone graph ({len(graph.nodes)} nodes) split into {len(raw_islands)} total islands.")
+        else:
+            graph = None
+            raw_islands = self._find_islands(blocks)
+            print(f"Connected component BFS discovered {len(raw_islands)} total islands.")
 
         # Filter and normalize islands
         valid_islands = []
         for island in raw_islands:
             if len(island) >= self.min_size:
                 normalized = self._normalize_island(island)
-                valid_islands.append(normalized)
+                origin = (min(b[0] for b in island), min(b[1] for b in island), min(b[2] for b in island))
+                if not with_graphs:
+                    comp_graph = None
+                elif graph is not None:
+                    comp_graph = graph.subgraph((b[:3] for b in island), offset=origin)
+                else:
+                    comp_graph = CircuitGraph.build(normalized)
+                valid_islands.append((normalized, comp_graph))
 
         print(f"Filtered down to {len(valid_islands)} components of size >= {self.min_size}.")
         return valid_islands
@@ -80,6 +170,78 @@ class WorldSlicer:
 
         return islands
 
+    def _find_redstone_islands(self, blocks: List[Tuple[int, int, int, str, Any]], graph: CircuitGraph) -> List[List[Tuple[int, int, int, str, Any]]]:
+        block_dict = {b[:3]: b for b in blocks}
+        groups = graph.components()
+        owner: Dict[Tuple[int, int, int], int] = {}
+        for group_idx, group in enumerate(groups):
+            for pos in group:
+                owner[pos] = group_idx
+
+        # Attach plain blocks within distance_threshold of a graph node, first claim wins.
+        # This is a single hop, so contiguous terrain is not pulled in transitively.
+        d = self.distance_threshold
+        for group_idx, group in enumerate(groups):
+            for cx, cy, cz in sorted(group):
+                for nx in range(cx - d, cx + d + 1):
+                    for ny in range(cy - d, cy + d + 1):
+                        for nz in range(cz - d, cz + d + 1):
+                            neighbor = (nx, ny, nz)
+                            if neighbor in block_dict and neighbor not in owner:
+                                owner[neighbor] = group_idx
+
+        islands: List[List[Tuple[int, int, int, str, Any]]] = [[] for _ in groups]
+        for pos, group_idx in owner.items():
+            islands[group_idx].append(block_dict[pos])
+        return islands
+
+    def save_graph_index(self, graphs: List[CircuitGraph], output_dir: str, base_name: str,
+                         components: List[List[Tuple[int, int, int, Any, Any]]] = None,
+                         layout: str = "files", shard_size: int = 256) -> List[str]:
+        """
+        Writes the adjacency graphs as sidecars of the files written by
+        save_components_parallel with the same layout (and shard_size):
+
+            files:        <base_name>_<idx>.graph.json next to each component litematic.
+            multi_region: <base_name>.graph.json, one graph over all regions in the
+                          litematic's coordinates (needs the components for the offsets).
+            archive:      <base_name>_<idx>.graph.json stored inside the component's
+                          zip shard, which must already have been written.
+        """
+        if layout not in EXPORT_LAYOUTS:
+            raise ValueError(f"Unknown export layout '{layout}', expected one of {EXPORT_LAYOUTS}")
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+
+        if layout == "files":
+            for idx, graph in enumerate(graphs):
+                out_path = graph_index_path(os.path.join(output_dir, f"{base_name}_{idx}.litematic"))
+                graph.save(out_path)
+                paths.append(out_path)
+        elif layout == "multi_region":
+            if components is None:
+                raise ValueError("multi_region graph index needs the components to place each graph")
+            merged = CircuitGraph()
+            for graph, offset_x in zip(graphs, self._region_offsets(components)):
+                shifted = graph.subgraph(graph.nodes, offset=(-offset_x, 0, 0))
+                merged.nodes.update(shifted.nodes)
+                merged.adjacency.update(shifted.adjacency)
+            out_path = graph_index_path(os.path.join(output_dir, f"{base_name}.litematic"))
+            merged.save(out_path)
+            paths.append(out_path)
+        else:
+            num_shards = (len(graphs) + shard_size - 1) // shard_size
+            for shard_idx in range(num_shards):
+                out_path = _shard_path(output_dir, base_name, shard_idx, num_shards)
+                with zipfile.ZipFile(out_path, "a", zipfile.ZIP_DEFLATED) as zf:
+                    for idx in range(shard_idx * shard_size, min((shard_idx + 1) * shard_size, len(graphs))):
+                        zf.writestr(graph_index_path(f"{base_name}_{idx}.litematic"),
+                                    json.dumps(graphs[idx].to_dict(), separators=(",", ":")))
+                paths.append(out_path)
+
+        print(f"  Saved {len(graphs)} graph indexes to {output_dir} (layout={layout})")
+        return paths
+
     def _normalize_island(self, island: List[Tuple[int, int, int, str, Any]]) -> List[Tuple[int, int, int, str, Any]]:
         min_x = min(b[0] for b in island)
         min_y = min(b[1] for b in island)
@@ -99,44 +261,94 @@ class WorldSlicer:
         print(f"Saving {len(components)} components to {output_dir}...")
 
         for idx, comp in enumerate(components):
-            # Calculate bounds
-            max_x = max(b[0] for b in comp)
-            max_y = max(b[1] for b in comp)
-            max_z = max(b[2] for b in comp)
-
-            reg = Region(0, 0, 0, max_x + 1, max_y + 1, max_z + 1)
-            schem = Schematic(name=f"{base_name}_{idx}", author="MIRA Slicer", regions={"Main": reg})
-
-            for x, y, z, state_str, _ in comp:
-                try:
-                    if "[" in state_str and state_str.endswith("]"):
-                        base_id, props_str = state_str.split("[", 1)
-                        props_str = props_str[:-1]
-                        props = {}
-                        for p in props_str.split(","):
-                            if "=" in p:
-                                k, v = p.split("=", 1)
-                                props[k.strip()] = v.strip()
-                        reg[x, y, z] = BlockState(base_id, **props)
-                    else:
-                        reg[x, y, z] = BlockState(state_str)
-                except Exception as e:
-                    print(f"Error parsing block state {state_str} in slice saving: {e}")
-
-            out_path = os.path.join(output_dir, f"{base_name}_{idx}.litematic")
-            schem.save(out_path)
+            _, _, out_path = _write_component((idx, comp, output_dir, base_name))
             print(f"  Saved component {idx} ({len(comp)} blocks) -> {out_path}")
 
+    def save_components_parallel(self, components: List[List[Tuple[int, int, int, Any, Any]]], output_dir: str, base_name: str,
+                                 workers: int = None, layout: str = "files", shard_size: int = 256) -> List[str]:
+        """
+        Saves sliced components from a process pool.
+
+        Layouts:
+            files:        one .litematic per component (same output as save_components_to_litematic).
+            multi_region: a single .litematic with one region per component, laid out along X.
+            archive:      zip shards of up to shard_size component litematics each.
+
+        Components sliced with structured=True are written without any state-string parsing.
+        Returns the list of written paths.
+        """
+        if layout not in EXPORT_LAYOUTS:
+            raise ValueError(f"Unknown export layout '{layout}', expected one of {EXPORT_LAYOUTS}")
+
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"Saving {len(components)} components to {output_dir} (layout={layout})...")
+
+        if layout == "multi_region":
+            return [self._save_multi_region(components, output_dir, base_name)]
+
+        if layout == "files":
+            worker_fn = _write_component
+            jobs = [(idx, comp, output_dir, base_name) for idx, comp in enumerate(components)]
+        else:
+            worker_fn = _write_shard
+            indexed = list(enumerate(components))
+            batches = [indexed[i:i + shard_size] for i in range(0, len(indexed), shard_size)]
+            jobs = [(shard_idx, len(batches), batch, output_dir, base_name) for shard_idx, batch in enumerate(batches)]
+
+        label, unit = ("component", "blocks") if layout == "files" else ("shard", "components")
+        paths = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for idx, count, out_path in pool.map(worker_fn, jobs):
+                print(f"  Saved {label} {idx} ({count} {unit}) -> {out_path}")
+                paths.append(out_path)
+        return paths
+
+    def _save_multi_region(self, components: List[List[Tuple[int, int, int, Any, Any]]], output_dir: str, base_name: str) -> str:
+        regions = {}
+        for idx, (comp, offset_x) in enumerate(zip(components, self._region_offsets(components))):
+            regions[f"{base_name}_{idx}"] = _build_region(comp, x=offset_x)
+
+        schem = Schematic(name=base_name, author="MIRA Slicer", regions=regions)
+        out_path = os.path.join(output_dir, f"{base_name}.litematic")
+        schem.save(out_path)
+        print(f"  Saved {len(components)} components as regions -> {out_path}")
+        return out_path
+
+    def _region_offsets(self, components: List[List[Tuple[int, int, int, Any, Any]]]) -> List[int]:
+        """X origin of each component's region in a multi_region litematic."""
+        # Keep a gap wider than distance_threshold so re-slicing the file yields the same components
+        gap = self.distance_threshold + 1
+        offsets = []
+        offset_x = 0
+        for comp in components:
+            offsets.append(offset_x)
+            offset_x += max(b[0] for b in comp) + 1 + gap
+        return offsets
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python world_slicer.py <schematic_file> [output_dir] [base_name]")
+        print("Usage: python world_slicer.py <schematic_file> [output_dir] [base_name] [files|multi_region|archive] [proximity|redstone]")
         sys.exit(1)
 
     schem_file = sys.argv[1]
     out_dir = sys.argv[2] if len(sys.argv) > 2 else "data/sliced_components"
     b_name = sys.argv[3] if len(sys.argv) > 3 else "sliced"
+    layout = sys.argv[4] if len(sys.argv) > 4 else None
+    mode = sys.argv[5] if len(sys.argv) > 5 else "proximity"
 
-    slicer = WorldSlicer(distance_threshold=2, min_size=3)
-    sliced = slicer.slice_schematic(schem_file)
-    slicer.save_components_to_litematic(sliced, out_dir, b_name)
+    slicer = WorldSlicer(distance_threshold=2, min_size=3, mode=mode)
+    if mode == "redstone":
+        pairs = slicer.slice_with_graphs(schem_file, structured=layout is not None)
+        sliced = [comp for comp, _ in pairs]
+    else:
+        pairs = None
+        sliced = slicer.slice_schematic(schem_file, structured=layout is not None)
+    if layout:
+        slicer.save_components_parallel(sliced, out_dir, b_name, layout=layout)
+    else:
+        slicer.save_components_to_litematic(sliced, out_dir, b_name)
+    if pairs is not None:
+        # After the components, so archive sidecars can go into the written shards
+        slicer.save_graph_index([graph for _, graph in pairs], out_dir, b_name,
+                                components=sliced, layout=layout or "files")
     print("Done!")
@@ -15,15 +15,27 @@ import json
 import os
 import re
 import sys
+import threading
 import time
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+from queue import Queue
 from typing import Any, Iterator
+from urllib.parse import parse_qs, urlparse
 
 # Add project root to sys.path for cross-package imports (simulation, data_mining)
 sys.path.append(str(Path(__file__).parent.parent))
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from discord_scraper.export_stream import ExportMessageStream
+from discord_scraper.id_index import MessageIdIndex, sidecar_path
+from discord_scraper.message_store import MessageStore, default_store_path
+from discord_scraper.schematic_store import SchematicStore, default_schematic_store_path
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
@@ -37,6 +49,10 @@ CLEAN_MESSAGES_DIR = DATA_DIR / "clean_messages"
 CLEAN_SCHEMATICS_DIR = DATA_DIR / "clean_schematics"
 METADATA_DIR = DATA_DIR / "metadata"
 RAW_EXPORT_DIR = SCRIPT_DIR / "raw_data"
+MESSAGE_STORE_PATH = default_store_path(DATA_DIR)
+SCHEMATIC_STORE_DIR = default_schematic_store_path(DATA_DIR)
+# Written by scripts/build_block_registry.py from the server's data generator.
+BLOCK_REGISTRY_PATH = METADATA_DIR / "block_registry.json"
 
 SCHEMATIC_EXTENSIONS = [".litematic", ".schematic", ".schem", ".nbt"]
 
@@ -45,25 +61,155 @@ SCHEMATIC_EXTENSIONS = [".litematic", ".schematic", ".schem", ".nbt"]
 # Skip text (0), voice (2), category (4), announcement (5), stage (13), etc.
 SCRAPABLE_CHANNEL_TYPES = {11, 15}
 
+# clean --dedup modes: off, identical files only, or same blocks at any origin.
+DEDUP_MODES = ("off", "exact", "near")
+
+# X of the first clean validation paste plot (a chunk boundary); plot k is --plot-spacing * k further
+VALIDATION_PLOT_X = 10000
+
 
 class RateLimiter:
     """
-    Simple time-based rate limiter.
+    Token-bucket rate limiter.
 
-    Conservative default is 0.5 req/s (1 request every 2 seconds).
+    A global bucket refills at ``requests_per_second`` and holds up to
+    ``burst`` tokens, so idle time buys a short burst instead of being lost.
+    Routes additionally get their own bucket once Discord reports it through
+    ``X-RateLimit-*`` response headers (see ``update_from_headers``).
+
+    Conservative default is 0.5 req/s with no burst (1 request every 2 seconds).
+    Thread-safe. With ``state_path`` the bucket state lives in a JSON file
+    guarded by an exclusive file lock, so scrapers running in several
+    processes draw from one shared budget.
     """
 
-    def __init__(self, requests_per_second: float) -> None:
+    def __init__(
+        self,
+        requests_per_second: float,
+        *,
+        burst: int = 1,
+        state_path: Path | None = None,
+    ) -> None:
         if requests_per_second <= 0:
             raise ValueError("requests_per_second must be > 0")
-        self._min_interval_s = 1.0 / requests_per_second
-        self._next_allowed = 0.0
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+        self._rate = requests_per_second
+        self._burst = burst
+        self._state_path = state_path
+        self._lock = threading.Lock()
+        self._state = self._fresh_state()
+
+    def _fresh_state(self) -> dict[str, Any]:
+        return {"tokens": float(self._burst), "updated": time.time(), "blocked_until": 0.0, "routes": {}}
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[dict[str, Any]]:
+        with self._lock:
+            if self._state_path is None:
+                yield self._state
+                return
+
+            import fcntl
+
+            self._state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._state_path, "a+") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    fh.seek(0)
+                    raw = fh.read()
+                    try:
+                        state = json.loads(raw) if raw.strip() else self._fresh_state()
+                    except json.JSONDecodeError:
+                        state = self._fresh_state()
+                    yield state
+                    fh.seek(0)
+                    fh.truncate()
+                    fh.write(json.dumps(state))
+                    fh.flush()
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _try_acquire(self, state: dict[str, Any], route: str | None, now: float) -> float:
+        """Takes a token if one is available now; otherwise returns how long to wait."""
+        state["tokens"] = min(float(self._burst), state["tokens"] + (now - state["updated"]) * self._rate)
+        state["updated"] = now
+
+        delay = state["blocked_until"] - now
+        if state["tokens"] < 1.0:
+            delay = max(delay, (1.0 - state["tokens"]) / self._rate)
+
+        bucket = state["routes"].get(route) if route else None
+        if bucket is not None:
+            if now >= bucket["reset_at"]:
+                bucket["remaining"] = bucket["limit"]
+            elif bucket["remaining"] <= 0:
+                delay = max(delay, bucket["reset_at"] - now)
+
+        if delay > 0:
+            return delay
+        state["tokens"] -= 1.0
+        if bucket is not None:
+            bucket["remaining"] -= 1
+        return 0.0
+
+    def wait(self, route: str | None = None) -> None:
+        while True:
+            with self._locked_state() as state:
+                delay = self._try_acquire(state, route, time.time())
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def defer(self, delay_s: float, route: str | None = None) -> None:
+        """Holds back callers for *delay_s* seconds (e.g. a 429 Retry-After): all of them, or one route."""
+        with self._locked_state() as state:
+            until = time.time() + delay_s
+            if route is None:
+                state["blocked_until"] = max(state["blocked_until"], until)
+            else:
+                bucket = state["routes"].setdefault(route, {"limit": 1, "remaining": 0, "reset_at": 0.0})
+                bucket["remaining"] = 0
+                bucket["reset_at"] = max(bucket["reset_at"], until)
+
+    def update_from_headers(self, route: str, headers: Any) -> None:
+        """Adopts the route bucket Discord reports in ``X-RateLimit-*`` headers, if any."""
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is None or reset_after is None:
+            return
+        try:
+            bucket = {
+                "limit": int(headers.get("X-RateLimit-Limit") or remaining),
+                "remaining": int(remaining),
+                "reset_at": time.time() + float(reset_after),
+            }
+        except ValueError:
+            return
+        with self._locked_state() as state:
+            state["routes"][route] = bucket
 
-    def wait(self) -> None:
-        now = time.monotonic()
-        if now < self._next_allowed:
-            time.sleep(self._next_allowed - now)
-        self._next_allowed = time.monotonic() + self._min_interval_s
+    def backoff(self, resp: requests.Response, route: str, sleep_s: float) -> None:
+        """Applies a 429 to the global bucket (``X-RateLimit-Global``) or just the route's."""
+        is_global = str(resp.headers.get("X-RateLimit-Global", "")).lower() == "true"
+        self.defer(sleep_s, route=None if is_global else route)
+
+
+def rate_limit_route(url: str) -> str:
+    """
+    Returns the rate-limit route key for a request URL: the API path with its
+    major parameter (channel / guild id) kept and other ids collapsed, or the
+    host for non-API URLs such as the CDN.
+    """
+    parsed = urlparse(url)
+    if not parsed.path.startswith("/api/"):
+        return parsed.netloc
+    parts = re.sub(r"^/api/v\d+/", "", parsed.path).strip("/").split("/")
+    route = [
+        "{id}" if p.isdigit() and not (i > 0 and parts[i - 1] in ("channels", "guilds")) else p
+        for i, p in enumerate(parts)
+    ]
+    return "/".join(route)
 
 
 @dataclass(frozen=True)
@@ -96,13 +242,16 @@ class DiscordApi:
             "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
         }
 
+        route = rate_limit_route(url)
         attempt = 0
         sleep_s = 1.0
         while True:
             attempt += 1
             if self._rate_limiter:
-                self._rate_limiter.wait()
+                self._rate_limiter.wait(route)
             resp = requests.get(url, headers=headers, timeout=timeout_s)
+            if self._rate_limiter:
+                self._rate_limiter.update_from_headers(route, resp.headers)
             if resp.status_code != 429 or not self._retry_on_429 or attempt > self._max_retries:
                 return resp
 
@@ -112,7 +261,11 @@ class DiscordApi:
                     sleep_s = max(sleep_s, float(retry_after))
                 except Exception:
                     pass
-            time.sleep(sleep_s)
+            if self._rate_limiter:
+                # The next wait() sleeps this out, for every caller sharing the bucket
+                self._rate_limiter.backoff(resp, route, sleep_s)
+            else:
+                time.sleep(sleep_s)
             sleep_s *= self._backoff_multiplier
 
     def list_guild_channels(self, guild_id: str) -> list[ChannelInfo]:
@@ -292,23 +445,32 @@ class DiscordCdnDownloader:
         retry_on_429: bool = True,
         max_retries: int = 5,
         backoff_multiplier: float = 2.0,
+        store: SchematicStore | None = None,
+        pool_size: int = 10,
     ) -> None:
         self._token = token
         self._rate_limiter = rate_limiter
+        self._store = store
         self._retry_on_429 = retry_on_429
         self._max_retries = max_retries
         self._backoff_multiplier = backoff_multiplier
+        # One keep-alive session shared by all download threads
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.cookies.update({"token": self._token, "__discord_locale": "en-US"})
 
     def _get(self, url: str, *, timeout_s: int = 30) -> requests.Response:
-        cookies = {"token": self._token, "__discord_locale": "en-US"}
-
+        route = rate_limit_route(url)
         attempt = 0
         sleep_s = 1.0
         while True:
             attempt += 1
             if self._rate_limiter:
-                self._rate_limiter.wait()
-            resp = requests.get(url, cookies=cookies, timeout=timeout_s)
+                self._rate_limiter.wait(route)
+            resp = self._session.get(url, timeout=timeout_s)
+            if self._rate_limiter:
+                self._rate_limiter.update_from_headers(route, resp.headers)
             if resp.status_code != 429 or not self._retry_on_429 or attempt > self._max_retries:
                 return resp
 
@@ -318,7 +480,11 @@ class DiscordCdnDownloader:
                     sleep_s = max(sleep_s, float(retry_after))
                 except Exception:
                     pass
-            time.sleep(sleep_s)
+            if self._rate_limiter:
+                # Other download threads must back off too; the next wait() sleeps it out
+                self._rate_limiter.backoff(resp, route, sleep_s)
+            else:
+                time.sleep(sleep_s)
             sleep_s *= self._backoff_multiplier
 
     def download_file(
@@ -347,13 +513,52 @@ class DiscordCdnDownloader:
             if resp.status_code == 404 or b"no longer available" in resp.content:
                 return DownloadResult(filepath=None, status="deleted", url=url)
             resp.raise_for_status()
-            filepath.write_bytes(resp.content)
+            if self._store is not None:
+                # Reposted files share one stored object; filepath becomes an alias of it
+                self._store.put_bytes(resp.content, filepath)
+            else:
+                filepath.write_bytes(resp.content)
             return DownloadResult(filepath=filepath, status="success", url=url)
         except Exception as e:
             return DownloadResult(filepath=None, status=f"error: {e}", url=url)
 
+    def close(self) -> None:
+        """Closes the pooled connections; the downloader can't be used afterwards."""
+        self._session.close()
+
+
+def signed_url_expiry(url: str) -> float | None:
+    """Returns the unix expiry of a signed Discord CDN URL (its hex ``ex`` param), if any."""
+    ex = parse_qs(urlparse(url).query).get("ex")
+    if not ex:
+        return None
+    try:
+        return float(int(ex[0], 16))
+    except ValueError:
+        return None
+
+
+@dataclass
+class ChannelAttachmentMap:
+    """attachment_id -> signed URL for the part of a channel's history paged so far."""
+
+    urls: dict[str, str] = field(default_factory=dict)
+    before: str | None = None
+    batches: int = 0
+    exhausted: bool = False
+
 
 class DiscordSignedUrlResolver:
+    """
+    Resolves attachment IDs to signed CDN URLs.
+
+    Each channel's history is paged at most once: every attachment on every
+    fetched page goes into a per-channel map, and paging resumes from where
+    the last lookup stopped. Cached URLs are served until shortly before
+    their signature expires; an expired hit drops that channel's map so it
+    is re-paged from the newest message.
+    """
+
     def __init__(
         self,
         token: str,
@@ -362,12 +567,15 @@ class DiscordSignedUrlResolver:
         retry_on_429: bool = True,
         max_retries: int = 5,
         backoff_multiplier: float = 2.0,
+        expiry_margin_s: float = 300.0,
     ) -> None:
         self._token = token
         self._rate_limiter = rate_limiter
         self._retry_on_429 = retry_on_429
         self._max_retries = max_retries
         self._backoff_multiplier = backoff_multiplier
+        self._expiry_margin_s = expiry_margin_s
+        self._channels: dict[str, ChannelAttachmentMap] = {}
 
     def _get(self, url: str, *, timeout_s: int = 30) -> requests.Response:
         headers = {
@@ -375,13 +583,16 @@ class DiscordSignedUrlResolver:
             "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
         }
 
+        route = rate_limit_route(url)
         attempt = 0
         sleep_s = 1.0
         while True:
             attempt += 1
             if self._rate_limiter:
-                self._rate_limiter.wait()
+                self._rate_limiter.wait(route)
             resp = requests.get(url, headers=headers, timeout=timeout_s)
+            if self._rate_limiter:
+                self._rate_limiter.update_from_headers(route, resp.headers)
             if resp.status_code != 429 or not self._retry_on_429 or attempt > self._max_retries:
                 return resp
 
@@ -391,9 +602,22 @@ class DiscordSignedUrlResolver:
                     sleep_s = max(sleep_s, float(retry_after))
                 except Exception:
                     pass
-            time.sleep(sleep_s)
+            if self._rate_limiter:
+                # The next wait() sleeps this out, for every caller sharing the bucket
+                self._rate_limiter.backoff(resp, route, sleep_s)
+            else:
+                time.sleep(sleep_s)
             sleep_s *= self._backoff_multiplier
 
+    def _is_fresh(self, url: str) -> bool:
+        expiry = signed_url_expiry(url)
+        return expiry is None or expiry - self._expiry_margin_s > time.time()
+
+    def remember(self, channel_id: str, attachment_id: str, url: str) -> None:
+        """Seeds the map with a signed URL already known from an export, saving an API page."""
+        if url and signed_url_expiry(url) is not None:
+            self._channels.setdefault(str(channel_id), ChannelAttachmentMap()).urls[str(attachment_id)] = url
+
     def get_signed_url(
         self,
         channel_id: str,
@@ -401,32 +625,46 @@ class DiscordSignedUrlResolver:
         *,
         max_batches: int = 200,
     ) -> str | None:
-        before: str | None = None
-        batch = 0
-
-        while batch < max_batches:
-            batch += 1
-            if before:
-                url = f"https://discord.com/api/v9/channels/{channel_id}/messages?limit=100&before={before}"
+        channel_id = str(channel_id)
+        attachment_id = str(attachment_id)
+        chmap = self._channels.get(channel_id)
+        if chmap is not None and attachment_id in chmap.urls:
+            if self._is_fresh(chmap.urls[attachment_id]):
+                return chmap.urls[attachment_id]
+            # Signatures on this channel's map are going stale; start over
+            chmap = None
+        if chmap is None:
+            chmap = self._channels[channel_id] = ChannelAttachmentMap()
+
+        while not chmap.exhausted and chmap.batches < max_batches:
+            chmap.batches += 1
+            if chmap.before:
+                url = f"https://discord.com/api/v9/channels/{channel_id}/messages?limit=100&before={chmap.before}"
             else:
                 url = f"https://discord.com/api/v9/channels/{channel_id}/messages?limit=100"
 
             resp = self._get(url)
             if resp.status_code == 403:
+                chmap.exhausted = True
                 return None
             if resp.status_code != 200:
+                # Possibly transient; let a later lookup retry this page
+                chmap.batches -= 1
                 return None
 
             messages: list[dict[str, Any]] = resp.json()
             if not messages:
-                return None
+                chmap.exhausted = True
+                break
 
             for msg in messages:
                 for att in msg.get("attachments", []):
-                    if str(att.get("id")) == str(attachment_id):
-                        return att.get("url")
+                    if att.get("id") and att.get("url"):
+                        chmap.urls[str(att["id"])] = str(att["url"])
+            chmap.before = str(messages[-1]["id"])
 
-            before = str(messages[-1]["id"])
+            if attachment_id in chmap.urls:
+                return chmap.urls[attachment_id]
 
         return None
 
@@ -574,7 +812,21 @@ def validate_schematic_with_minecraft(
     max_entities: int = 0,
     max_containers: int = 0,
     max_blocks: int = 0,
+    registry: Any = None,
+    plot_width: int = 0,
+    manage_world: bool = True,
 ) -> SchematicValidationResult:
+    """
+    Parses *schematic_path*, applies the offline checks (entities, containers,
+    size, and — given a ``BlockRegistry`` — block ids and states), and only
+    then pastes it into the live server at *paste_origin*.
+
+    With *plot_width*, *paste_origin* is the start of a plot that wide along X:
+    the paste (including its cleared border) is shifted to begin there, and
+    wider schematics are rejected. The pasted chunks are forceloaded for the
+    duration of the paste. *manage_world* is passed on to ``replicate_blocks``;
+    concurrent callers set it to False and freeze the world once around them.
+    """
     try:
         # Import lazily so `--help` works without deps.
         from data_mining.parser import SchematicParser
@@ -632,10 +884,40 @@ def validate_schematic_with_minecraft(
                 bounds=bounds,
             )
 
+        # Unknown blocks or impossible states would only fail in-game; reject them statically
+        if registry is not None:
+            invalid = registry.first_invalid(blocks)
+            if invalid:
+                return SchematicValidationResult(
+                    valid=False,
+                    error=f"static_invalid:{invalid}",
+                    block_count=block_count,
+                    bounds=bounds,
+                )
+
+        # The paste clears one extra block below min_x (see replicate_blocks)
+        paste_width = max_x - min_x + 2
+        if plot_width > 0:
+            if paste_width > plot_width:
+                return SchematicValidationResult(
+                    valid=False,
+                    error=f"skipped_wider_than_plot:{paste_width}",
+                    block_count=block_count,
+                    bounds=bounds,
+                )
+            px, py, pz = paste_origin
+            paste_origin = (px - min_x + 1, py, pz)
+
+        ox, _, oz = paste_origin
+        chunks = f"{ox + min_x - 1} {oz + min_z - 1} {ox + max_x} {oz + max_z}"
         bridge = MinecraftBridge()
         bridge.connect()
         try:
-            replicate_blocks(blocks, paste_origin, bounds, bridge)
+            bridge.run_command(f"forceload add {chunks}")
+            try:
+                replicate_blocks(blocks, paste_origin, bounds, bridge, manage_world=manage_world)
+            finally:
+                bridge.run_command(f"forceload remove {chunks}")
         finally:
             bridge.disconnect()
 
@@ -695,23 +977,9 @@ def _migrate_legacy_dirs() -> None:
         legacy_schematics.rename(RAW_SCHEMATICS_DIR)
 
 
-def _read_existing_message_ids(jsonl_path: Path) -> set[str]:
-    if not jsonl_path.exists():
-        return set()
-    ids: set[str] = set()
-    with jsonl_path.open("r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-                mid = obj.get("message_id")
-                if mid:
-                    ids.add(str(mid))
-            except Exception:
-                continue
-    return ids
+def _read_existing_message_ids(jsonl_path: Path) -> MessageIdIndex:
+    """Loads the IDs already in *jsonl_path* from its sidecar index (see MessageIdIndex)."""
+    return MessageIdIndex(jsonl_path)
 
 
 def _iter_process_export_json(
@@ -725,134 +993,193 @@ def _iter_process_export_json(
     max_retries: int,
     backoff_multiplier: float,
     max_new_messages: int,
-    existing_ids: set[str],
+    existing_ids: MessageIdIndex,
+    schematic_store: SchematicStore | None = None,
+    download_workers: int = 4,
+    resolver: DiscordSignedUrlResolver | None = None,
+    downloader: DiscordCdnDownloader | None = None,
+    start_offset: int | None = None,
+    progress: dict[str, Any] | None = None,
 ) -> Iterator[dict[str, Any]]:
-    data = json.loads(export_json_path.read_text())
+    """
+    Streams messages out of an export file (see ExportMessageStream), starting
+    at *start_offset* if given. If *progress* is passed, it is kept updated
+    with ``offset`` (resume point just past the last yielded message) and
+    ``complete`` (the whole messages array has been consumed).
 
-    channel_data = data.get("channel", {}) or {}
-    guild_data = data.get("guild", {}) or {}
+    Pass a run-wide *downloader* to share its connection pool across export
+    files; without one, a downloader is created and closed for this file.
+    """
+    stream = ExportMessageStream(export_json_path, start_offset=start_offset)
+    progress = progress if progress is not None else {}
+    progress.update(offset=stream.offset, complete=False)
 
-    resolver = DiscordSignedUrlResolver(
-        token,
-        rate_limiter=rate_limiter,
-        retry_on_429=retry_on_429,
-        max_retries=max_retries,
-        backoff_multiplier=backoff_multiplier,
-    )
-    downloader = DiscordCdnDownloader(
-        token,
-        rate_limiter=rate_limiter,
-        retry_on_429=retry_on_429,
-        max_retries=max_retries,
-        backoff_multiplier=backoff_multiplier,
-    )
+    channel_data = stream.header.get("channel", {}) or {}
+    guild_data = stream.header.get("guild", {}) or {}
+
+    if resolver is None:
+        resolver = DiscordSignedUrlResolver(
+            token,
+            rate_limiter=rate_limiter,
+            retry_on_429=retry_on_429,
+            max_retries=max_retries,
+            backoff_multiplier=backoff_multiplier,
+        )
+    own_downloader = downloader is None
+    if downloader is None:
+        downloader = DiscordCdnDownloader(
+            token,
+            rate_limiter=rate_limiter,
+            retry_on_429=retry_on_429,
+            max_retries=max_retries,
+            backoff_multiplier=backoff_multiplier,
+            store=schematic_store,
+            pool_size=download_workers,
+        )
 
-    raw_msgs = data.get("messages", []) or []
-    _log(f"Processing export json: {export_json_path.name} ({len(raw_msgs)} message(s))")
+    _log(f"Processing export json: {export_json_path.name} (from byte {stream.offset})")
     last_heartbeat = time.monotonic()
     added = 0
-    for i, msg in enumerate(raw_msgs):
-        msg_id = str(msg.get("id"))
-        if max_new_messages > 0 and added >= max_new_messages:
-            break
-        if msg_id in existing_ids:
-            continue
-
-        content = msg.get("content") or ""
-        embeds = msg.get("embeds") or []
-        attachments = msg.get("attachments") or []
-
-        schematic_info = extract_schematic_links_from_content(str(content))
-
-        for att in attachments:
-            # DiscordChatExporter uses camelCase "fileName"; Discord API uses "filename"
-            filename = str(att.get("fileName") or att.get("filename") or "")
-            if any(filename.lower().endswith(ext) for ext in SCHEMATIC_EXTENSIONS):
-                schematic_info.append(
-                    {
-                        "filename": filename,
-                        "channel_id": str(channel_data.get("id") or ""),
-                        "attachment_id": str(att.get("id") or ""),
-                        "type": filename.split(".")[-1],
-                        "url": str(att.get("url") or ""),
-                    }
-                )
+    # Attachment downloads run on a thread pool while later messages are parsed;
+    # the shared rate limiter still spaces out the actual requests.
+    pool = ThreadPoolExecutor(max_workers=download_workers, thread_name_prefix="download")
+    pending: deque[tuple[dict[str, Any], list[tuple[int, dict[str, Any], Future]], int]] = deque()
+    max_pending = 4 * download_workers
+    try:
+        for i, msg in enumerate(stream):
+            msg_id = str(msg.get("id"))
+            if max_new_messages > 0 and added >= max_new_messages:
+                break
+            if msg_id in existing_ids:
+                if not pending:
+                    progress["offset"] = stream.offset
+                continue
 
-        image_urls = extract_image_urls(str(content), embeds if isinstance(embeds, list) else [])
-
-        message_record: dict[str, Any] = {
-            "message_id": msg_id,
-            "server_id": str(guild_data.get("id") or ""),
-            "channel_id": str(channel_data.get("id") or ""),
-            "channel_name": channel_data.get("name", "") or "",
-            "category": channel_data.get("category", "") or "",
-            "author_id": str((msg.get("author") or {}).get("id") or ""),
-            "author_name": (msg.get("author") or {}).get("name"),
-            "timestamp": msg.get("timestamp"),
-            "content": content,
-            "schematics": [],
-            "images": image_urls,
-            "reactions": msg.get("reactions", []) or [],
-            "reply_to_message_id": (msg.get("reference") or {}).get("message_id") if msg.get("reference") else None,
-        }
+            content = msg.get("content") or ""
+            embeds = msg.get("embeds") or []
+            attachments = msg.get("attachments") or []
 
-        for idx, sch in enumerate(schematic_info):
-            url = sch.get("url")
-            if not url and sch.get("channel_id") and sch.get("attachment_id"):
-                url = resolver.get_signed_url(
-                    sch["channel_id"],
-                    sch["attachment_id"],
-                    max_batches=signed_url_batches,
-                )
+            schematic_info = extract_schematic_links_from_content(str(content))
 
-            if url:
-                res = downloader.download_file(
-                    url,
-                    schematics_out_dir,
-                    msg_id,
-                    idx + 1,
-                    original_filename=sch.get("filename"),
-                )
-                if res.filepath:
-                    message_record["schematics"].append(
+            for att in attachments:
+                # DiscordChatExporter uses camelCase "fileName"; Discord API uses "filename"
+                filename = str(att.get("fileName") or att.get("filename") or "")
+                if att.get("id") and att.get("url"):
+                    resolver.remember(str(channel_data.get("id") or ""), str(att["id"]), str(att["url"]))
+                if any(filename.lower().endswith(ext) for ext in SCHEMATIC_EXTENSIONS):
+                    schematic_info.append(
                         {
-                            "filename": res.filepath.name,
-                            "type": sch.get("type"),
-                            "original_url": res.url,
-                            "status": res.status,
+                            "filename": filename,
+                            "channel_id": str(channel_data.get("id") or ""),
+                            "attachment_id": str(att.get("id") or ""),
+                            "type": filename.split(".")[-1],
+                            "url": str(att.get("url") or ""),
                         }
                     )
+
+            image_urls = extract_image_urls(str(content), embeds if isinstance(embeds, list) else [])
+
+            message_record: dict[str, Any] = {
+                "message_id": msg_id,
+                "server_id": str(guild_data.get("id") or ""),
+                "channel_id": str(channel_data.get("id") or ""),
+                "channel_name": channel_data.get("name", "") or "",
+                "category": channel_data.get("category", "") or "",
+                "author_id": str((msg.get("author") or {}).get("id") or ""),
+                "author_name": (msg.get("author") or {}).get("name"),
+                "timestamp": msg.get("timestamp"),
+                "content": content,
+                "schematics": [],
+                "images": image_urls,
+                "reactions": msg.get("reactions", []) or [],
+                "reply_to_message_id": (msg.get("reference") or {}).get("message_id") if msg.get("reference") else None,
+            }
+
+            downloads: list[tuple[int, dict[str, Any], Future]] = []
+            for idx, sch in enumerate(schematic_info):
+                url = sch.get("url")
+                if not url and sch.get("channel_id") and sch.get("attachment_id"):
+                    url = resolver.get_signed_url(
+                        sch["channel_id"],
+                        sch["attachment_id"],
+                        max_batches=signed_url_batches,
+                    )
+
+                if url:
+                    fut = pool.submit(
+                        downloader.download_file,
+                        url,
+                        schematics_out_dir,
+                        msg_id,
+                        idx + 1,
+                        original_filename=sch.get("filename"),
+                    )
+                    downloads.append((len(message_record["schematics"]), sch, fut))
+                    message_record["schematics"].append(None)
                 else:
                     message_record["schematics"].append(
                         {
                             "filename": sch.get("filename"),
                             "type": sch.get("type"),
-                            "original_url": res.url,
-                            "status": res.status,
+                            "status": "error: could not get signed URL",
                             "downloaded": False,
                         }
                     )
-            else:
-                message_record["schematics"].append(
-                    {
-                        "filename": sch.get("filename"),
-                        "type": sch.get("type"),
-                        "status": "error: could not get signed URL",
-                        "downloaded": False,
-                    }
-                )
 
-        yield message_record
-        added += 1
-
-        now = time.monotonic()
-        if now - last_heartbeat >= 5.0:
-            _log(f"Still working... parsed {i+1}/{len(raw_msgs)} messages from {export_json_path.name}")
-            last_heartbeat = now
+            pending.append((message_record, downloads, stream.offset))
+            added += 1
+
+            # Emit finished messages in export order, keeping a bounded download backlog
+            while pending and (len(pending) > max_pending or all(f.done() for _, _, f in pending[0][1])):
+                record, record_downloads, offset = pending.popleft()
+                progress["offset"] = offset
+                yield _finish_message_record(record, record_downloads)
+
+            now = time.monotonic()
+            if now - last_heartbeat >= 5.0:
+                _log(f"Still working... parsed {i+1} messages from {export_json_path.name}")
+                last_heartbeat = now
+
+        while pending:
+            record, record_downloads, offset = pending.popleft()
+            progress["offset"] = offset
+            yield _finish_message_record(record, record_downloads)
+        if not (max_new_messages > 0 and added >= max_new_messages):
+            progress.update(offset=stream.offset, complete=stream.complete)
+    finally:
+        # On early close (e.g. --max-messages) drop queued downloads, finish running ones
+        pool.shutdown(wait=True, cancel_futures=True)
+        if own_downloader:
+            downloader.close()
 
     return
 
 
+def _finish_message_record(
+    message_record: dict[str, Any],
+    downloads: list[tuple[int, dict[str, Any], Future]],
+) -> dict[str, Any]:
+    """Waits for a message's attachment downloads and fills in their schematic entries."""
+    for slot, sch, fut in downloads:
+        res: DownloadResult = fut.result()
+        if res.filepath:
+            message_record["schematics"][slot] = {
+                "filename": res.filepath.name,
+                "type": sch.get("type"),
+                "original_url": res.url,
+                "status": res.status,
+            }
+        else:
+            message_record["schematics"][slot] = {
+                "filename": sch.get("filename"),
+                "type": sch.get("type"),
+                "original_url": res.url,
+                "status": res.status,
+                "downloaded": False,
+            }
+    return message_record
+
+
 def _load_scrape_status(server_id: str) -> dict[str, Any]:
     return _read_json(METADATA_DIR / server_id / "scrape_status.json", default={})
 
@@ -880,6 +1207,13 @@ class ScrapeSettings:
     retry_on_429: bool
     max_retries: int
     backoff_multiplier: float
+    download_workers: int = 4
+    burst: int = 1
+    rate_limit_state_file: str | None = None
+
+    def make_rate_limiter(self) -> RateLimiter:
+        state_path = Path(self.rate_limit_state_file) if self.rate_limit_state_file else None
+        return RateLimiter(self.requests_per_second, burst=self.burst, state_path=state_path)
 
 
 def _scrape_channel(
@@ -894,8 +1228,11 @@ def _scrape_channel(
     export_after: str | None,
     export_before: str | None,
     export_filter: str | None,
+    rate_limiter: RateLimiter | None = None,
+    downloader: DiscordCdnDownloader | None = None,
 ) -> str:
-    rate_limiter = RateLimiter(settings.requests_per_second)
+    if rate_limiter is None:
+        rate_limiter = settings.make_rate_limiter()
 
     RAW_EXPORT_DIR.mkdir(parents=True, exist_ok=True)
     RAW_MESSAGES_DIR.mkdir(parents=True, exist_ok=True)
@@ -927,270 +1264,304 @@ def _scrape_channel(
 
     schematics_out_dir = RAW_SCHEMATICS_DIR / server_id
     schematics_out_dir.mkdir(parents=True, exist_ok=True)
+    # A run-wide downloader brings its own store; otherwise each export file gets a downloader
+    schematic_store = SchematicStore(SCHEMATIC_STORE_DIR) if downloader is None else None
+    try:
+        # One resolver per channel scrape so its attachment maps survive across export files
+        resolver = DiscordSignedUrlResolver(
+            token,
+            rate_limiter=rate_limiter,
+            retry_on_429=settings.retry_on_429,
+            max_retries=settings.max_retries,
+            backoff_multiplier=settings.backoff_multiplier,
+        )
 
-    total_messages = 0
-    total_schematics = 0
-    downloaded_schematics = 0
-
-    # For quick tests: export newest-first so our early stop hits quickly.
-    # We do NOT rely on `--partition` to cap total messages because it splits output,
-    # it doesn't stop the exporter from exporting the entire channel.
-    reverse = max_messages > 0
-    partition = None
-
-    with messages_path.open("a") as out_f:
-        if max_messages > 0:
-            proc, export_start_monotonic = exporter.export_channel_json_process(
-                token,
-                channel_id,
-                export_dir,
-                after=export_after,
-                before=export_before,
-                message_filter=export_filter,
-                reverse=reverse,
-                partition=partition,
-            )
+        total_messages = 0
+        total_schematics = 0
+        downloaded_schematics = 0
 
-            processed_files: set[str] = set()
-            json_decode_retries: dict[str, int] = {}  # track per-file JSONDecodeError retries
-            export_start_wall = time.time()
-            heartbeat_last = time.monotonic()
-            last_progress_monotonic = time.monotonic()  # detect stale progress
-            MAX_JSON_RETRIES = 10
-            MAX_EXPORT_TIMEOUT_S = 1800  # 30 min hard timeout per channel
-            STALE_PROGRESS_TIMEOUT_S = 300  # 5 min with no new messages = stuck
+        # For quick tests: export newest-first so our early stop hits quickly.
+        # We do NOT rely on `--partition` to cap total messages because it splits output,
+        # it doesn't stop the exporter from exporting the entire channel.
+        reverse = max_messages > 0
+        partition = None
 
-            while True:
-                json_paths = sorted([p for p in export_dir.glob("*.json") if p.is_file()])
-                for jf in json_paths:
-                    jf_key = str(jf)
-                    if jf_key in processed_files:
-                        continue
-                    try:
-                        if jf.stat().st_mtime < export_start_wall:
-                            continue
-                    except Exception:
-                        continue
+        with messages_path.open("a") as out_f:
+            if max_messages > 0:
+                proc, export_start_monotonic = exporter.export_channel_json_process(
+                    token,
+                    channel_id,
+                    export_dir,
+                    after=export_after,
+                    before=export_before,
+                    message_filter=export_filter,
+                    reverse=reverse,
+                    partition=partition,
+                )
 
-                    try:
-                        _log(f"Parsing export file {jf.name}")
-                        remaining = max_messages - total_messages
-                        processed_iter = _iter_process_export_json(
-                            jf,
-                            token=token,
-                            schematics_out_dir=schematics_out_dir,
-                            rate_limiter=rate_limiter,
-                            signed_url_batches=settings.signed_url_max_batches,
-                            retry_on_429=settings.retry_on_429,
-                            max_retries=settings.max_retries,
-                            backoff_multiplier=settings.backoff_multiplier,
-                            max_new_messages=remaining if remaining > 0 else 0,
-                            existing_ids=existing_ids,
-                        )
-                        for msg in processed_iter:
-                            mid = str(msg.get("message_id"))
-                            if mid in existing_ids:
+                processed_files: set[str] = set()
+                # Export files are streamed while the exporter writes them; keep each
+                # file's resume offset and how many polls in a row it made no progress.
+                file_offsets: dict[str, int | None] = {}
+                stalled_polls: dict[str, int] = {}
+                export_start_wall = time.time()
+                heartbeat_last = time.monotonic()
+                last_progress_monotonic = time.monotonic()  # detect stale progress
+                MAX_STALLED_POLLS = 10
+                MAX_EXPORT_TIMEOUT_S = 1800  # 30 min hard timeout per channel
+                STALE_PROGRESS_TIMEOUT_S = 300  # 5 min with no new messages = stuck
+
+                while True:
+                    json_paths = sorted([p for p in export_dir.glob("*.json") if p.is_file()])
+                    for jf in json_paths:
+                        jf_key = str(jf)
+                        if jf_key in processed_files:
+                            continue
+                        try:
+                            if jf.stat().st_mtime < export_start_wall:
                                 continue
-                            existing_ids.add(mid)
-                            out_f.write(json.dumps(msg) + "\n")
-                            out_f.flush()
-                            total_messages += 1
-                            total_schematics += len(msg.get("schematics") or [])
-                            downloaded_schematics += sum(
-                                1
-                                for s in (msg.get("schematics") or [])
-                                if isinstance(s, dict) and s.get("status") == "success"
+                        except Exception:
+                            continue
+
+                        try:
+                            _log(f"Parsing export file {jf.name}")
+                            remaining = max_messages - total_messages
+                            progress: dict[str, Any] = {}
+                            processed_iter = _iter_process_export_json(
+                                jf,
+                                token=token,
+                                schematics_out_dir=schematics_out_dir,
+                                rate_limiter=rate_limiter,
+                                signed_url_batches=settings.signed_url_max_batches,
+                                retry_on_429=settings.retry_on_429,
+                                max_retries=settings.max_retries,
+                                backoff_multiplier=settings.backoff_multiplier,
+                                max_new_messages=remaining if remaining > 0 else 0,
+                                existing_ids=existing_ids,
+                                schematic_store=schematic_store,
+                                download_workers=settings.download_workers,
+                                resolver=resolver,
+                                downloader=downloader,
+                                start_offset=file_offsets.get(jf_key),
+                                progress=progress,
                             )
-                            if total_messages >= max_messages:
-                                break
-                        # Successfully parsed — clear retry counter and mark done
-                        json_decode_retries.pop(jf_key, None)
-                        processed_files.add(jf_key)
-                    except json.JSONDecodeError:
-                        # File likely isn't fully written yet; retry with backoff.
-                        retries = json_decode_retries.get(jf_key, 0) + 1
-                        json_decode_retries[jf_key] = retries
-                        if retries >= MAX_JSON_RETRIES:
-                            _log(f"Skipping {jf.name} after {MAX_JSON_RETRIES} JSON decode failures")
-                            processed_files.add(jf_key)  # don't retry again
-                        else:
-                            _log(f"JSON decode fail #{retries} for {jf.name}, will retry")
-                        continue
-                    except Exception as e:
-                        _log(f"Error processing export file {jf.name}: {e}")
-                        processed_files.add(jf_key)  # don't retry
-                        continue
+                            for msg in processed_iter:
+                                mid = str(msg.get("message_id"))
+                                if mid in existing_ids:
+                                    continue
+                                existing_ids.add(mid)
+                                out_f.write(json.dumps(msg) + "\n")
+                                out_f.flush()
+                                existing_ids.flush(out_f.tell())
+                                total_messages += 1
+                                total_schematics += len(msg.get("schematics") or [])
+                                downloaded_schematics += sum(
+                                    1
+                                    for s in (msg.get("schematics") or [])
+                                    if isinstance(s, dict) and s.get("status") == "success"
+                                )
+                                if total_messages >= max_messages:
+                                    break
+                            processed_iter.close()
+
+                            if progress.get("complete"):
+                                processed_files.add(jf_key)
+                            elif progress.get("offset") != file_offsets.get(jf_key):
+                                # File still being written; continue from here on the next poll
+                                file_offsets[jf_key] = progress.get("offset")
+                                stalled_polls[jf_key] = 0
+                            else:
+                                stalled = stalled_polls.get(jf_key, 0) + 1
+                                stalled_polls[jf_key] = stalled
+                                if stalled >= MAX_STALLED_POLLS:
+                                    _log(f"Skipping rest of {jf.name} after {MAX_STALLED_POLLS} polls without progress")
+                                    processed_files.add(jf_key)  # don't retry again
+                                else:
+                                    _log(f"No complete new messages in {jf.name} yet (#{stalled}), will retry")
+                        except Exception as e:
+                            _log(f"Error processing export file {jf.name}: {e}")
+                            processed_files.add(jf_key)  # don't retry
+                            continue
 
-                    if total_messages >= max_messages:
-                        break
+                        if total_messages >= max_messages:
+                            break
 
-                if total_messages >= max_messages:
-                    _log(
-                        f"Reached --max-messages {max_messages}; terminating exporter "
-                        f"and stopping parse/download."
-                    )
-                    try:
-                        proc.terminate()
-                    except Exception:
-                        pass
-                    try:
-                        proc.wait(timeout=20)
-                    except Exception:
+                    if total_messages >= max_messages:
+                        _log(
+                            f"Reached --max-messages {max_messages}; terminating exporter "
+                            f"and stopping parse/download."
+                        )
                         try:
-                            proc.kill()
+                            proc.terminate()
                         except Exception:
                             pass
-                    break
+                        try:
+                            proc.wait(timeout=20)
+                        except Exception:
+                            try:
+                                proc.kill()
+                            except Exception:
+                                pass
+                        break
 
-                rc = proc.poll()
-                if rc is not None:
-                    _log(f"Exporter process exited with code {rc}")
-                    if rc != 0 and total_messages == 0:
-                        # Likely a forbidden or inaccessible channel
-                        channels_status[channel_id] = {
-                            "status": "forbidden" if rc != 0 else "error",
-                            "total_messages_added": 0,
-                            "total_schematics_found": 0,
-                            "downloaded_schematics": 0,
-                            "last_scraped": _utc_now_iso(),
-                            "errors": [f"exporter_exit_code_{rc}"],
-                        }
-                        status["channels"] = channels_status
-                        _save_scrape_status(server_id, status)
-                        _log(f"Channel {channel_id} inaccessible (exit code {rc}), marking as forbidden")
-                        return "forbidden"
-                    break
+                    rc = proc.poll()
+                    if rc is not None:
+                        _log(f"Exporter process exited with code {rc}")
+                        if rc != 0 and total_messages == 0:
+                            # Likely a forbidden or inaccessible channel
+                            channels_status[channel_id] = {
+                                "status": "forbidden" if rc != 0 else "error",
+                                "total_messages_added": 0,
+                                "total_schematics_found": 0,
+                                "downloaded_schematics": 0,
+                                "last_scraped": _utc_now_iso(),
+                                "errors": [f"exporter_exit_code_{rc}"],
+                            }
+                            status["channels"] = channels_status
+                            _save_scrape_status(server_id, status)
+                            _log(f"Channel {channel_id} inaccessible (exit code {rc}), marking as forbidden")
+                            return "forbidden"
+                        break
 
-                now = time.monotonic()
-                elapsed = now - export_start_monotonic
+                    now = time.monotonic()
+                    elapsed = now - export_start_monotonic
 
-                # Hard timeout: bail if export takes too long
-                if elapsed > MAX_EXPORT_TIMEOUT_S:
-                    _log(f"Export timeout ({MAX_EXPORT_TIMEOUT_S}s) for channel {channel_id}, terminating")
-                    try:
-                        proc.terminate()
-                    except Exception:
-                        pass
-                    try:
-                        proc.wait(timeout=10)
-                    except Exception:
+                    # Hard timeout: bail if export takes too long
+                    if elapsed > MAX_EXPORT_TIMEOUT_S:
+                        _log(f"Export timeout ({MAX_EXPORT_TIMEOUT_S}s) for channel {channel_id}, terminating")
                         try:
-                            proc.kill()
+                            proc.terminate()
                         except Exception:
                             pass
-                    break
+                        try:
+                            proc.wait(timeout=10)
+                        except Exception:
+                            try:
+                                proc.kill()
+                            except Exception:
+                                pass
+                        break
 
-                # Stale progress: if no new messages for a long time, likely stuck
-                if total_messages > 0 or len(processed_files) > 0:
-                    last_progress_monotonic = now
-                if now - last_progress_monotonic > STALE_PROGRESS_TIMEOUT_S:
-                    _log(
-                        f"No progress for {STALE_PROGRESS_TIMEOUT_S}s on channel {channel_id}, "
-                        f"terminating exporter"
-                    )
-                    try:
-                        proc.terminate()
-                    except Exception:
-                        pass
-                    try:
-                        proc.wait(timeout=10)
-                    except Exception:
+                    # Stale progress: if no new messages for a long time, likely stuck
+                    if total_messages > 0 or len(processed_files) > 0:
+                        last_progress_monotonic = now
+                    if now - last_progress_monotonic > STALE_PROGRESS_TIMEOUT_S:
+                        _log(
+                            f"No progress for {STALE_PROGRESS_TIMEOUT_S}s on channel {channel_id}, "
+                            f"terminating exporter"
+                        )
                         try:
-                            proc.kill()
+                            proc.terminate()
                         except Exception:
                             pass
-                    break
+                        try:
+                            proc.wait(timeout=10)
+                        except Exception:
+                            try:
+                                proc.kill()
+                            except Exception:
+                                pass
+                        break
 
-                if now - heartbeat_last >= 5.0:
-                    _log(
-                        f"Still working... added_messages={total_messages}/{max_messages} "
-                        f"parsed_json_files={len(processed_files)} "
-                        f"export_elapsed={elapsed:.1f}s"
-                    )
-                    heartbeat_last = now
+                    if now - heartbeat_last >= 5.0:
+                        _log(
+                            f"Still working... added_messages={total_messages}/{max_messages} "
+                            f"parsed_json_files={len(processed_files)} "
+                            f"export_elapsed={elapsed:.1f}s"
+                        )
+                        heartbeat_last = now
 
-                time.sleep(2)
+                    time.sleep(2)
 
-        else:
-            # Check if export files already exist — skip re-export if so
-            existing_jsons = sorted([p for p in export_dir.glob("*.json") if p.is_file()]) if export_dir.exists() else []
-            if existing_jsons:
-                _log(f"Found {len(existing_jsons)} existing export files for channel {channel_id}, skipping re-export")
-                json_files = existing_jsons
             else:
-                json_files = exporter.export_channel_json(
-                    token,
-                    channel_id,
-                    export_dir,
-                    after=export_after,
-                    before=export_before,
-                    message_filter=export_filter,
-                    reverse=reverse,
-                    partition=partition,
-                )
-            if not json_files:
-                channels_status[channel_id] = {
-                    "status": "error",
-                    "error": "no_json_files_exported",
-                    "last_scraped": _utc_now_iso(),
-                }
-                status["channels"] = channels_status
-                _save_scrape_status(server_id, status)
-                _log(f"Scrape failed server_id={server_id} channel_id={channel_id} reason=no_json_files_exported")
-                return "error"
-
-            for jf in json_files:
-                _log(f"Parsing export file {jf.name}")
-                try:
-                    processed = _iter_process_export_json(
-                        jf,
-                        token=token,
-                        schematics_out_dir=schematics_out_dir,
-                        rate_limiter=rate_limiter,
-                        signed_url_batches=settings.signed_url_max_batches,
-                        retry_on_429=settings.retry_on_429,
-                        max_retries=settings.max_retries,
-                        backoff_multiplier=settings.backoff_multiplier,
-                        max_new_messages=0,
-                        existing_ids=existing_ids,
+                # Check if export files already exist — skip re-export if so
+                existing_jsons = sorted([p for p in export_dir.glob("*.json") if p.is_file()]) if export_dir.exists() else []
+                if existing_jsons:
+                    _log(f"Found {len(existing_jsons)} existing export files for channel {channel_id}, skipping re-export")
+                    json_files = existing_jsons
+                else:
+                    json_files = exporter.export_channel_json(
+                        token,
+                        channel_id,
+                        export_dir,
+                        after=export_after,
+                        before=export_before,
+                        message_filter=export_filter,
+                        reverse=reverse,
+                        partition=partition,
                     )
-                except json.JSONDecodeError as e:
-                    _log(f"Skipping corrupt export file {jf.name}: {e}")
-                    continue
-                except Exception as e:
-                    _log(f"Error processing export file {jf.name}: {e}")
-                    continue
-                for msg in processed:
-                    mid = str(msg.get("message_id"))
-                    if mid in existing_ids:
+                if not json_files:
+                    channels_status[channel_id] = {
+                        "status": "error",
+                        "error": "no_json_files_exported",
+                        "last_scraped": _utc_now_iso(),
+                    }
+                    status["channels"] = channels_status
+                    _save_scrape_status(server_id, status)
+                    _log(f"Scrape failed server_id={server_id} channel_id={channel_id} reason=no_json_files_exported")
+                    return "error"
+
+                for jf in json_files:
+                    _log(f"Parsing export file {jf.name}")
+                    progress = {}
+                    try:
+                        processed = _iter_process_export_json(
+                            jf,
+                            token=token,
+                            schematics_out_dir=schematics_out_dir,
+                            rate_limiter=rate_limiter,
+                            signed_url_batches=settings.signed_url_max_batches,
+                            retry_on_429=settings.retry_on_429,
+                            max_retries=settings.max_retries,
+                            backoff_multiplier=settings.backoff_multiplier,
+                            max_new_messages=0,
+                            existing_ids=existing_ids,
+                            schematic_store=schematic_store,
+                            download_workers=settings.download_workers,
+                            resolver=resolver,
+                            downloader=downloader,
+                            progress=progress,
+                        )
+                    except Exception as e:
+                        _log(f"Error processing export file {jf.name}: {e}")
                         continue
-                    existing_ids.add(mid)
-                    out_f.write(json.dumps(msg) + "\n")
-                    out_f.flush()
-                    total_messages += 1
-                    total_schematics += len(msg.get("schematics") or [])
-                    downloaded_schematics += sum(
-                        1
-                        for s in (msg.get("schematics") or [])
-                        if isinstance(s, dict) and s.get("status") == "success"
-                    )
-
-    limited = max_messages > 0 and total_messages >= max_messages
-    channels_status[channel_id] = {
-        "status": "partial" if limited else "complete",
-        "total_messages_added": total_messages,
-        "total_schematics_found": total_schematics,
-        "downloaded_schematics": downloaded_schematics,
-        "last_scraped": _utc_now_iso(),
-        "errors": [],
-    }
-    status["channels"] = channels_status
-    _save_scrape_status(server_id, status)
-    _log(
-        f"Scrape done server_id={server_id} channel_id={channel_id} "
-        f"added_messages={total_messages} schematics_found={total_schematics} downloaded={downloaded_schematics}"
-    )
-    return "partial" if limited else "complete"
+                    for msg in processed:
+                        mid = str(msg.get("message_id"))
+                        if mid in existing_ids:
+                            continue
+                        existing_ids.add(mid)
+                        out_f.write(json.dumps(msg) + "\n")
+                        out_f.flush()
+                        existing_ids.flush(out_f.tell())
+                        total_messages += 1
+                        total_schematics += len(msg.get("schematics") or [])
+                        downloaded_schematics += sum(
+                            1
+                            for s in (msg.get("schematics") or [])
+                            if isinstance(s, dict) and s.get("status") == "success"
+                        )
+                    if not progress.get("complete"):
+                        _log(f"Export file {jf.name} is truncated or corrupt after byte {progress.get('offset')}; kept the messages before it")
+
+        limited = max_messages > 0 and total_messages >= max_messages
+        channels_status[channel_id] = {
+            "status": "partial" if limited else "complete",
+            "total_messages_added": total_messages,
+            "total_schematics_found": total_schematics,
+            "downloaded_schematics": downloaded_schematics,
+            "last_scraped": _utc_now_iso(),
+            "errors": [],
+        }
+        status["channels"] = channels_status
+        _save_scrape_status(server_id, status)
+        _log(
+            f"Scrape done server_id={server_id} channel_id={channel_id} "
+            f"added_messages={total_messages} schematics_found={total_schematics} downloaded={downloaded_schematics}"
+        )
+        return "partial" if limited else "complete"
+    finally:
+        if schematic_store is not None:
+            schematic_store.close()
 
 
 def _iter_raw_message_files(*, server_id: str | None = None) -> list[Path]:
@@ -1202,6 +1573,69 @@ def _iter_raw_message_files(*, server_id: str | None = None) -> list[Path]:
     return list(root.glob("*/*/messages.jsonl"))
 
 
+def _clean_message_file(job: tuple[str, str, bool]) -> dict[str, Any]:
+    """
+    Cleans one raw ``messages.jsonl`` into its clean counterpart and returns
+    the counts. Top-level so it can run in a worker process; the message
+    store is updated by the caller.
+    """
+    server_id, raw_path_str, force = job
+    raw_path = Path(raw_path_str)
+    # .../raw_messages/{server_id}/{channel_id}/messages.jsonl
+    channel_id = raw_path.parts[-2]
+    out_dir = CLEAN_MESSAGES_DIR / server_id / channel_id
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / "messages.jsonl"
+    rewritten = False
+    if out_path.exists() and force:
+        out_path.unlink()
+        sidecar_path(out_path).unlink(missing_ok=True)
+        rewritten = True
+
+    cleaned_total = 0
+    filtered_total = 0
+    filtered_reasons: dict[str, int] = {}
+    existing_ids = _read_existing_message_ids(out_path)
+    with raw_path.open("r") as in_f, out_path.open("a") as out_f:
+        for line in in_f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                raw_msg = json.loads(line)
+            except Exception:
+                filtered_total += 1
+                filtered_reasons["invalid_json"] = filtered_reasons.get("invalid_json", 0) + 1
+                continue
+
+            mid = str(raw_msg.get("message_id") or "")
+            if mid and mid in existing_ids and not force:
+                continue
+
+            res = clean_message(raw_msg)
+            if res.cleaned is None:
+                filtered_total += 1
+                r = res.filtered_reason or "filtered"
+                filtered_reasons[r] = filtered_reasons.get(r, 0) + 1
+                continue
+
+            existing_ids.add(str(res.cleaned.get("message_id") or ""))
+            out_f.write(json.dumps(res.cleaned) + "\n")
+            cleaned_total += 1
+
+        out_f.flush()
+        existing_ids.flush(out_f.tell())
+
+    return {
+        "channel_id": channel_id,
+        "out_path": str(out_path),
+        "rewritten": rewritten,
+        "cleaned": cleaned_total,
+        "filtered": filtered_total,
+        "filtered_reasons": filtered_reasons,
+    }
+
+
 def _clean_server(
     *,
     server_id: str,
@@ -1211,7 +1645,25 @@ def _clean_server(
     max_entities: int = 0,
     max_containers: int = 0,
     max_blocks: int = 5000,
+    dedup: str = "exact",
+    workers: int = 1,
+    validation_workers: int = 1,
+    plot_spacing: int = 2048,
+    registry: Any = None,
 ) -> None:
+    """
+    Validates raw schematics and cleans raw messages for one server.
+
+    Message files are cleaned in up to *workers* processes, one channel file
+    per job. Schematics are validated by up to *validation_workers* threads,
+    each with its own RCON connection and its own paste plot, *plot_spacing*
+    blocks apart along X (rounded up to whole chunks); schematics wider than
+    the spacing are rejected, so concurrent pastes never overlap. The world
+    is frozen once around the whole pool rather than per paste. With a
+    *registry*, schematics with unknown blocks or states are rejected before
+    reaching the server. Counters in
+    cleaning_status.json are refreshed as results come in.
+    """
     status = _load_cleaning_status(server_id)
     status.setdefault("messages", {})
     status.setdefault("schematics", {})
@@ -1223,32 +1675,114 @@ def _clean_server(
         raw_files = sorted([p for p in raw_s_dir.glob("*") if p.is_file()]) if raw_s_dir.exists() else []
         validated = 0
         errors: list[dict[str, str]] = []
+        duplicates: list[dict[str, str]] = []
+        to_validate: list[Path] = []
 
         clean_s_dir.mkdir(parents=True, exist_ok=True)
 
+        # Dedup stage: only the first copy of each schematic (across all servers)
+        # is validated and promoted to clean_schematics.
+        store = SchematicStore(SCHEMATIC_STORE_DIR) if dedup != "off" else None
+        if store is not None:
+            for fp in raw_files:
+                store.add_file(fp)
+            if dedup == "near":
+                store.index_near_hashes()
+
+        def promotable(alias: str) -> bool:
+            # A representative from this server gets validated below; one from another
+            # server only counts once it has a clean copy there
+            alias_path = Path(alias)
+            if alias_path.parent == raw_s_dir.resolve():
+                return True
+            return (CLEAN_SCHEMATICS_DIR / alias_path.parent.name / alias_path.name).exists()
+
         for fp in raw_files:
             out_fp = clean_s_dir / fp.name
             if out_fp.exists() and not force:
                 validated += 1
                 continue
-            res = validate_schematic_with_minecraft(
-                fp,
-                max_entities=max_entities,
-                max_containers=max_containers,
-                max_blocks=max_blocks,
-            )
-            if res.valid:
-                out_fp.write_bytes(fp.read_bytes())
-                validated += 1
-            else:
-                errors.append({"filename": fp.name, "error": res.error or "unknown"})
+            if store is not None:
+                original = store.duplicate_of(fp, near=dedup == "near", accept=promotable)
+                if original is not None:
+                    duplicates.append({"filename": fp.name, "duplicate_of": Path(original).name})
+                    continue
+            to_validate.append(fp)
+
+        if store is not None:
+            store.close()
+
+        checked = 0
+
+        def schematics_status(state: str) -> dict[str, Any]:
+            return {
+                "state": state,
+                "total_raw": len(raw_files),
+                "total_validated": validated,
+                "pending_validation": len(to_validate) - checked,
+                "validation_errors": errors[:200],
+                "dedup_mode": dedup,
+                "duplicates_skipped": len(duplicates),
+                "duplicates": duplicates[:200],
+                "static_rejected": sum(1 for e in errors if e["error"].startswith("static_invalid:")),
+                "last_validated": _utc_now_iso(),
+            }
 
-        status["schematics"] = {
-            "total_raw": len(raw_files),
-            "total_validated": validated,
-            "validation_errors": errors[:200],
-            "last_validated": _utc_now_iso(),
-        }
+        # Each validation thread borrows a plot (paste origin) and returns it when done.
+        # Plots start on chunk boundaries so forceloading one never touches another.
+        plot_stride = -(-plot_spacing // 16) * 16
+        plots: Queue[tuple[int, int, int]] = Queue()
+        for k in range(max(1, validation_workers)):
+            plots.put((VALIDATION_PLOT_X + k * plot_stride, 100, 10000))
+
+        def validate(fp: Path) -> SchematicValidationResult:
+            origin = plots.get()
+            try:
+                return validate_schematic_with_minecraft(
+                    fp,
+                    paste_origin=origin,
+                    max_entities=max_entities,
+                    max_containers=max_containers,
+                    max_blocks=max_blocks,
+                    registry=registry,
+                    plot_width=plot_spacing,
+                    manage_world=False,
+                )
+            finally:
+                plots.put(origin)
+
+        # Tick freeze / fillUpdates are server-wide: set them once for all threads, so no
+        # finishing validation unfreezes the world under another one's half-built paste
+        world = None
+        if to_validate:
+            from simulation.bridge import MinecraftBridge
+            from simulation.replicator import freeze_world, restore_world
+
+            world = MinecraftBridge()
+            world.connect()
+            freeze_world(world)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, validation_workers), thread_name_prefix="validate") as pool:
+                futures = {pool.submit(validate, fp): fp for fp in to_validate}
+                for fut in as_completed(futures):
+                    fp = futures[fut]
+                    res = fut.result()
+                    checked += 1
+                    if res.valid:
+                        (clean_s_dir / fp.name).write_bytes(fp.read_bytes())
+                        validated += 1
+                    else:
+                        errors.append({"filename": fp.name, "error": res.error or "unknown"})
+                    if checked % 25 == 0:
+                        status["schematics"] = schematics_status("in_progress")
+                        _save_cleaning_status(server_id, status)
+        finally:
+            if world is not None:
+                restore_world(world)
+                world.disconnect()
+
+        status["schematics"] = schematics_status("complete")
+        _save_cleaning_status(server_id, status)
 
     # Messages cleaning
     if not schematics_only:
@@ -1256,51 +1790,48 @@ def _clean_server(
         filtered_total = 0
         filtered_reasons: dict[str, int] = {}
 
-        raw_message_files = _iter_raw_message_files(server_id=server_id)
-        for raw_path in raw_message_files:
-            parts = raw_path.parts
-            # .../raw_messages/{server_id}/{channel_id}/messages.jsonl
-            channel_id = parts[-2]
-            out_dir = CLEAN_MESSAGES_DIR / server_id / channel_id
-            out_dir.mkdir(parents=True, exist_ok=True)
-            out_path = out_dir / "messages.jsonl"
-            if out_path.exists() and force:
-                out_path.unlink()
-
-            existing_ids = _read_existing_message_ids(out_path)
-            with raw_path.open("r") as in_f, out_path.open("a") as out_f:
-                for line in in_f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        raw_msg = json.loads(line)
-                    except Exception:
-                        filtered_total += 1
-                        filtered_reasons["invalid_json"] = filtered_reasons.get("invalid_json", 0) + 1
-                        continue
-
-                    mid = str(raw_msg.get("message_id") or "")
-                    if mid and mid in existing_ids and not force:
-                        continue
+        done = 0
+
+        def messages_status() -> dict[str, Any]:
+            return {
+                "state": "complete" if done == len(jobs) else "in_progress",
+                "channel_files_done": done,
+                "channel_files_total": len(jobs),
+                "total_cleaned_added": cleaned_total,
+                "filtered_out": filtered_total,
+                "filtered_reasons": filtered_reasons,
+                "last_cleaned": _utc_now_iso(),
+            }
 
-                    res = clean_message(raw_msg)
-                    if res.cleaned is None:
-                        filtered_total += 1
-                        r = res.filtered_reason or "filtered"
-                        filtered_reasons[r] = filtered_reasons.get(r, 0) + 1
-                        continue
+        store = MessageStore(MESSAGE_STORE_PATH)
+        jobs = [(server_id, str(p), force) for p in sorted(_iter_raw_message_files(server_id=server_id))]
+        if workers > 1 and len(jobs) > 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = (f.result() for f in as_completed([pool.submit(_clean_message_file, job) for job in jobs]))
+        else:
+            pool = None
+            results = (_clean_message_file(job) for job in jobs)
 
-                    existing_ids.add(str(res.cleaned.get("message_id") or ""))
-                    out_f.write(json.dumps(res.cleaned) + "\n")
-                    cleaned_total += 1
+        try:
+            for result in results:
+                done += 1
+                # The store has a single writer: index each channel as its worker finishes
+                if result["rewritten"]:
+                    store.forget_channel(server_id, result["channel_id"])
+                store.sync_file(result["out_path"], server_id, result["channel_id"])
+                cleaned_total += result["cleaned"]
+                filtered_total += result["filtered"]
+                for r, n in result["filtered_reasons"].items():
+                    filtered_reasons[r] = filtered_reasons.get(r, 0) + n
+                if done % 10 == 0:
+                    status["messages"] = messages_status()
+                    _save_cleaning_status(server_id, status)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            store.close()
 
-        status["messages"] = {
-            "total_cleaned_added": cleaned_total,
-            "filtered_out": filtered_total,
-            "filtered_reasons": filtered_reasons,
-            "last_cleaned": _utc_now_iso(),
-        }
+        status["messages"] = messages_status()
 
     _save_cleaning_status(server_id, status)
 
@@ -1331,6 +1862,32 @@ def main():
     clean.add_argument("--max-entities", type=int, default=0, help="Max entities allowed (default: 0)")
     clean.add_argument("--max-containers", type=int, default=0, help="Max containers allowed (default: 0)")
     clean.add_argument("--max-blocks", type=int, default=5000, help="Max blocks allowed (default: 5000)")
+    clean.add_argument("--workers", type=int, default=1, help="Processes for message cleaning, one channel file each (default: 1)")
+    clean.add_argument(
+        "--validation-workers",
+        type=int,
+        default=1,
+        help="Concurrent schematic validations, each with its own RCON connection and paste plot (default: 1)",
+    )
+    clean.add_argument(
+        "--plot-spacing",
+        type=int,
+        default=2048,
+        help="X distance between validation paste plots, and the widest schematic accepted (default: 2048)",
+    )
+    clean.add_argument(
+        "--dedup",
+        choices=DEDUP_MODES,
+        default="exact",
+        help="Skip reposted schematics before validation: identical files (exact), "
+        "same blocks at any origin (near), or off (default: exact)",
+    )
+    clean.add_argument(
+        "--block-registry",
+        default=str(BLOCK_REGISTRY_PATH),
+        help="Block/property registry for static pre-validation; build it with "
+        "scripts/build_block_registry.py ('' to disable)",
+    )
 
     args = parser.parse_args()
 
@@ -1344,6 +1901,9 @@ def main():
         retry_on_429=bool(rl_cfg.get("retry_on_429", True)),
         max_retries=int(rl_cfg.get("max_retries", 5)),
         backoff_multiplier=float(rl_cfg.get("backoff_multiplier", 2)),
+        download_workers=int(rl_cfg.get("download_workers", 4)),
+        burst=int(rl_cfg.get("burst", 1)),
+        rate_limit_state_file=rl_cfg.get("state_file") or None,
     )
 
     if args.cmd == "scrape":
@@ -1355,7 +1915,8 @@ def main():
         server_filter = args.server
         channel_filter = args.channel
 
-        rate_limiter = RateLimiter(settings.requests_per_second)
+        # One limiter for channel listing, URL resolution and downloads alike
+        rate_limiter = settings.make_rate_limiter()
         api = DiscordApi(
             token,
             rate_limiter=rate_limiter,
@@ -1364,109 +1925,127 @@ def main():
             backoff_multiplier=settings.backoff_multiplier,
         )
 
-        _log("Scrape mode starting")
-        channels_seen = 0
-        while True:
-            for s in servers:
-                if not isinstance(s, dict):
-                    continue
-                if not s.get("enabled", True):
-                    continue
-                server_id = str(s.get("server_id") or "")
-                if not server_id:
-                    continue
-                if server_filter and server_id != server_filter:
-                    continue
+        # One downloader (connection pool) and schematic store for the whole run
+        schematic_store = SchematicStore(SCHEMATIC_STORE_DIR)
+        downloader = DiscordCdnDownloader(
+            token,
+            rate_limiter=rate_limiter,
+            retry_on_429=settings.retry_on_429,
+            max_retries=settings.max_retries,
+            backoff_multiplier=settings.backoff_multiplier,
+            store=schematic_store,
+            pool_size=settings.download_workers,
+        )
 
-                channels_cfg = s.get("channels", "all")
-                channel_ids: list[str] = []
-                if channel_filter:
-                    channel_ids = [str(channel_filter)]
-                elif channels_cfg == "all":
-                    try:
-                        _log(f"Listing channels for server_id={server_id}")
-                        chs = api.list_guild_channels(server_id)
-                        _log(f"Discovered {len(chs)} channel(s) for server_id={server_id}")
-                        cats_filter = s.get("categories_filter")
-                        if isinstance(cats_filter, list) and cats_filter:
-                            category_id_to_name: dict[str, str] = {
-                                c.id: c.name for c in chs if c.type == 4 and c.id and c.name
-                            }
-                            allowed_category_names = {str(x) for x in cats_filter}
-                            allowed_category_ids = {
-                                cid for cid, nm in category_id_to_name.items() if nm in allowed_category_names
-                            }
-                            channel_ids = [
-                                c.id
-                                for c in chs
-                                if c.id and c.type in SCRAPABLE_CHANNEL_TYPES and (c.parent_id in allowed_category_ids)
-                            ]
-                        else:
-                            # Only scrape text (0), forum (15), and thread (11) channels.
-                            channel_ids = [c.id for c in chs if c.id and c.type in SCRAPABLE_CHANNEL_TYPES]
-                    except Exception as e:
-                        print(f"Failed to list channels for server {server_id}: {e}")
+        try:
+            _log("Scrape mode starting")
+            channels_seen = 0
+            while True:
+                for s in servers:
+                    if not isinstance(s, dict):
+                        continue
+                    if not s.get("enabled", True):
+                        continue
+                    server_id = str(s.get("server_id") or "")
+                    if not server_id:
+                        continue
+                    if server_filter and server_id != server_filter:
                         continue
-                elif isinstance(channels_cfg, list):
-                    channel_ids = [str(x) for x in channels_cfg]
-                else:
-                    print(f"Invalid channels config for server {server_id}. Use \"all\" or a list.")
-                    continue
 
-                for cid in channel_ids:
-                    if not cid:
+                    channels_cfg = s.get("channels", "all")
+                    channel_ids: list[str] = []
+                    if channel_filter:
+                        channel_ids = [str(channel_filter)]
+                    elif channels_cfg == "all":
+                        try:
+                            _log(f"Listing channels for server_id={server_id}")
+                            chs = api.list_guild_channels(server_id)
+                            _log(f"Discovered {len(chs)} channel(s) for server_id={server_id}")
+                            cats_filter = s.get("categories_filter")
+                            if isinstance(cats_filter, list) and cats_filter:
+                                category_id_to_name: dict[str, str] = {
+                                    c.id: c.name for c in chs if c.type == 4 and c.id and c.name
+                                }
+                                allowed_category_names = {str(x) for x in cats_filter}
+                                allowed_category_ids = {
+                                    cid for cid, nm in category_id_to_name.items() if nm in allowed_category_names
+                                }
+                                channel_ids = [
+                                    c.id
+                                    for c in chs
+                                    if c.id and c.type in SCRAPABLE_CHANNEL_TYPES and (c.parent_id in allowed_category_ids)
+                                ]
+                            else:
+                                # Only scrape text (0), forum (15), and thread (11) channels.
+                                channel_ids = [c.id for c in chs if c.id and c.type in SCRAPABLE_CHANNEL_TYPES]
+                        except Exception as e:
+                            print(f"Failed to list channels for server {server_id}: {e}")
+                            continue
+                    elif isinstance(channels_cfg, list):
+                        channel_ids = [str(x) for x in channels_cfg]
+                    else:
+                        print(f"Invalid channels config for server {server_id}. Use \"all\" or a list.")
                         continue
-                    try:
-                        result = _scrape_channel(
-                            exporter=exporter,
-                            token=token,
-                            server_id=server_id,
-                            channel_id=cid,
-                            settings=settings,
-                            force=bool(args.force),
-                            max_messages=int(args.max_messages or 0),
-                            export_after=args.export_after,
-                            export_before=args.export_before,
-                            export_filter=args.export_filter,
-                        )
-                    except Exception as e:
-                        err_msg = str(e)
-                        if "forbidden" in err_msg.lower():
-                            _log(f"Skipping channel {cid} (forbidden)")
+
+                    for cid in channel_ids:
+                        if not cid:
                             continue
-                        else:
-                            _log(f"Error scraping channel {cid}: {e}")
-                            # Update status to error so we don't get stuck retrying
-                            status = _load_scrape_status(server_id)
-                            channels_status = status.get("channels", {}) if isinstance(status.get("channels", {}), dict) else {}
-                            channels_status[cid] = {
-                                "status": "error",
-                                "total_messages_added": 0,
-                                "total_schematics_found": 0,
-                                "downloaded_schematics": 0,
-                                "last_scraped": _utc_now_iso(),
-                                "errors": [err_msg[:200]],
-                            }
-                            status["channels"] = channels_status
-                            _save_scrape_status(server_id, status)
-                            result = "error"
-                    # Don't count skipped/forbidden channels toward max_channels
-                    if result in ("complete", "partial", "error"):
-                        channels_seen += 1
+                        try:
+                            result = _scrape_channel(
+                                exporter=exporter,
+                                token=token,
+                                server_id=server_id,
+                                channel_id=cid,
+                                settings=settings,
+                                force=bool(args.force),
+                                max_messages=int(args.max_messages or 0),
+                                export_after=args.export_after,
+                                export_before=args.export_before,
+                                export_filter=args.export_filter,
+                                rate_limiter=rate_limiter,
+                                downloader=downloader,
+                            )
+                        except Exception as e:
+                            err_msg = str(e)
+                            if "forbidden" in err_msg.lower():
+                                _log(f"Skipping channel {cid} (forbidden)")
+                                continue
+                            else:
+                                _log(f"Error scraping channel {cid}: {e}")
+                                # Update status to error so we don't get stuck retrying
+                                status = _load_scrape_status(server_id)
+                                channels_status = status.get("channels", {}) if isinstance(status.get("channels", {}), dict) else {}
+                                channels_status[cid] = {
+                                    "status": "error",
+                                    "total_messages_added": 0,
+                                    "total_schematics_found": 0,
+                                    "downloaded_schematics": 0,
+                                    "last_scraped": _utc_now_iso(),
+                                    "errors": [err_msg[:200]],
+                                }
+                                status["channels"] = channels_status
+                                _save_scrape_status(server_id, status)
+                                result = "error"
+                        # Don't count skipped/forbidden channels toward max_channels
+                        if result in ("complete", "partial", "error"):
+                            channels_seen += 1
+                        if args.max_channels and channels_seen >= args.max_channels:
+                            _log(f"Reached --max-channels {args.max_channels}, stopping scrape pass")
+                            break
+
                     if args.max_channels and channels_seen >= args.max_channels:
-                        _log(f"Reached --max-channels {args.max_channels}, stopping scrape pass")
                         break
 
                 if args.max_channels and channels_seen >= args.max_channels:
                     break
 
-            if args.max_channels and channels_seen >= args.max_channels:
-                break
-
-            if not args.loop:
-                break
-            _log("Looping enabled; sleeping 60s before next pass...")
-            time.sleep(60)
+                if not args.loop:
+                    break
+                _log("Looping enabled; sleeping 60s before next pass...")
+                time.sleep(60)
+        finally:
+            downloader.close()
+            schematic_store.close()
 
     elif args.cmd == "clean":
         if args.server:
@@ -1479,6 +2058,16 @@ def main():
                     if p.is_dir() and p.name not in server_ids:
                         server_ids.append(p.name)
 
+        registry = None
+        if args.block_registry and not args.messages_only:
+            if Path(args.block_registry).is_file():
+                from data_mining.block_registry import BlockRegistry
+
+                registry = BlockRegistry.load(args.block_registry)
+                _log(f"Static pre-validation: {len(registry)} known blocks from {args.block_registry}")
+            else:
+                _log(f"Block registry not found at {args.block_registry}; skipping static pre-validation")
+
         for sid in server_ids:
             _clean_server(
                 server_id=sid,
@@ -1488,6 +2077,11 @@ def main():
                 max_entities=int(args.max_entities),
                 max_containers=int(args.max_containers),
                 max_blocks=int(args.max_blocks),
+                dedup=str(args.dedup),
+                workers=int(args.workers),
+                validation_workers=int(args.validation_workers),
+                plot_spacing=int(args.plot_spacing),
+                registry=registry,
             )
     else:
         raise RuntimeError(f"Unknown command: {args.cmd}")
@@ -0,0 +1,102 @@
+"""
+Streaming reader for DiscordChatExporter JSON exports.
+
+An export is one JSON object whose ``messages`` array can run to hundreds of
+MB. ``ExportMessageStream`` decodes that array one element at a time from
+fixed-size chunks, so memory stays flat regardless of channel size, and it
+tolerates files that are still being written: iteration simply stops at the
+last complete message. ``offset`` is the byte position to resume from on a
+later pass, and ``complete`` tells whether the closing ``]`` was reached.
+"""
+
+import codecs
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator
+
+_MESSAGES_KEY = re.compile(r'"messages"\s*:\s*\[')
+_SKIP = " \t\r\n,"
+
+
+def read_export_header(path: str | Path, *, chunk_size: int = 1 << 16) -> tuple[dict[str, Any], int | None]:
+    """
+    Returns ``(header, array_offset)``: the top-level fields preceding the
+    ``messages`` array (guild, channel, ...) and the byte offset just past
+    its opening ``[``. ``array_offset`` is None if the array hasn't been
+    written yet.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            # Never final: a file cut mid-character just leaves bytes pending in the decoder
+            text += decoder.decode(chunk)
+            match = _MESSAGES_KEY.search(text)
+            if match:
+                prefix = text[: match.start()].rstrip().rstrip(",")
+                try:
+                    header = json.loads(prefix + "}") if prefix.lstrip().startswith("{") else {}
+                except json.JSONDecodeError:
+                    header = {}
+                return header, len(text[: match.end()].encode("utf-8"))
+            if not chunk:
+                return {}, None
+
+
+class ExportMessageStream:
+    """
+    Iterates the ``messages`` array of an export, optionally resuming at
+    *start_offset* (a previous ``offset``; it must point between elements).
+    """
+
+    def __init__(self, path: str | Path, *, start_offset: int | None = None, chunk_size: int = 1 << 20) -> None:
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.header, array_offset = read_export_header(self.path)
+        self.offset = start_offset if start_offset is not None else array_offset
+        self.complete = False
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if self.offset is None:
+            return
+        decoder = json.JSONDecoder()
+        utf8 = codecs.getincrementaldecoder("utf-8")()
+        buf = ""
+        pos = 0
+        # buf[:accounted] is already included in self.offset
+        accounted = 0
+        eof = False
+
+        with open(self.path, "rb") as fh:
+            fh.seek(self.offset)
+            while True:
+                while pos < len(buf) and buf[pos] in _SKIP:
+                    pos += 1
+                if pos < len(buf) and buf[pos] == "]":
+                    self.offset += len(buf[accounted:pos + 1].encode("utf-8"))
+                    self.complete = True
+                    return
+
+                try:
+                    if pos >= len(buf):
+                        raise json.JSONDecodeError("need more data", buf, pos)
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        # Truncated (still being written, possibly mid-character) or corrupt
+                        # tail; undecoded bytes stay in `utf8`, resume from self.offset later
+                        return
+                    chunk = fh.read(self.chunk_size)
+                    eof = not chunk
+                    # Drop what has been consumed before growing the buffer
+                    buf = buf[accounted:] + utf8.decode(chunk)
+                    pos -= accounted
+                    accounted = 0
+                    continue
+
+                self.offset += len(buf[accounted:end].encode("utf-8"))
+                accounted = pos = end
+                if isinstance(obj, dict):
+                    yield obj
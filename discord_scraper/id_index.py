@@ -0,0 +1,130 @@
+"""
+Sidecar message-ID index for append-only ``messages.jsonl`` files.
+
+``messages.ids`` next to a ``messages.jsonl`` holds a little-endian uint64
+header (the jsonl byte length it covers) followed by the message snowflakes
+as an append-only uint64 array. Loading it is a single read instead of
+JSON-decoding the whole archive; only lines appended after the covered
+length (e.g. by an interrupted run) are parsed, and a jsonl that shrank is
+treated as rewritten and reindexed from scratch.
+"""
+
+import json
+import os
+import sys
+from array import array
+from pathlib import Path
+
+_HEADER = array("Q", [0]).itemsize
+
+
+def _snowflake(mid: object) -> int | None:
+    text = str(mid)
+    if text.isdigit() and len(text) <= 20 and int(text) < 1 << 64:
+        return int(text)
+    return None
+
+
+def sidecar_path(jsonl_path: str | Path) -> Path:
+    return Path(jsonl_path).with_suffix(".ids")
+
+
+class MessageIdIndex:
+    """
+    Set-like view of the message IDs in a ``messages.jsonl``.
+
+    ``add`` records an ID in memory; ``flush`` persists the IDs added since
+    the last flush together with the jsonl length they cover. Call it after
+    the corresponding lines have been written and flushed.
+    """
+
+    def __init__(self, jsonl_path: str | Path) -> None:
+        self.jsonl_path = Path(jsonl_path)
+        self.path = sidecar_path(jsonl_path)
+        self._ids: set[int] = set()
+        self._other: set[str] = set()  # non-numeric IDs, kept in memory only
+        self._unsaved: array = array("Q")
+        self._covered = 0
+        self._load()
+
+    def _load(self) -> None:
+        size = self.jsonl_path.stat().st_size if self.jsonl_path.exists() else 0
+        loaded = False
+        if self.path.exists():
+            raw = self.path.read_bytes()
+            if len(raw) >= _HEADER:
+                header = array("Q")
+                header.frombytes(raw[:_HEADER])
+                ids = array("Q")
+                ids.frombytes(raw[_HEADER : len(raw) - (len(raw) - _HEADER) % _HEADER])
+                if sys.byteorder != "little":
+                    header.byteswap()
+                    ids.byteswap()
+                if header[0] <= size:
+                    self._covered = header[0]
+                    self._ids.update(ids)
+                    loaded = True
+        if not loaded:
+            # Missing, damaged, or the jsonl was rewritten shorter: reindex from scratch
+            self.path.unlink(missing_ok=True)
+        if size > self._covered:
+            self._index_tail()
+
+    def _index_tail(self) -> None:
+        covered = self._covered
+        with self.jsonl_path.open("rb") as fh:
+            fh.seek(covered)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break
+                covered += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    mid = json.loads(line).get("message_id")
+                except Exception:
+                    continue
+                if mid:
+                    self.add(str(mid))
+        self.flush(covered)
+
+    def __contains__(self, mid: object) -> bool:
+        value = _snowflake(mid)
+        if value is None:
+            return str(mid) in self._other
+        return value in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._other)
+
+    def add(self, mid: str) -> None:
+        value = _snowflake(mid)
+        if value is None:
+            self._other.add(str(mid))
+            return
+        if value not in self._ids:
+            self._ids.add(value)
+            self._unsaved.append(value)
+
+    def flush(self, covered: int) -> None:
+        """Persists pending IDs and records that the jsonl is indexed up to byte *covered*."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = array("Q", [covered])
+        ids = self._unsaved
+        if sys.byteorder != "little":
+            header.byteswap()
+            ids = array("Q", ids)
+            ids.byteswap()
+        mode = "r+b" if self.path.exists() else "w+b"
+        with self.path.open(mode) as fh:
+            # IDs first, then the header: a crash in between only re-reads a tail
+            fh.seek(0, os.SEEK_END)
+            if fh.tell() < _HEADER:
+                fh.seek(0)
+                fh.write(bytes(_HEADER))
+            fh.write(ids.tobytes())
+            fh.seek(0)
+            fh.write(header.tobytes())
+        self._unsaved = array("Q")
+        self._covered = covered
@@ -0,0 +1,163 @@
+"""
+Persistent message index for cleaned Discord messages.
+
+The clean step appends to per-channel ``messages.jsonl`` files; this SQLite
+store mirrors them with a ``message_id`` primary key (plus server, channel and
+category columns) so consumers such as ``scripts/ingest_discord.py`` can look
+messages up on demand instead of loading the whole archive into memory.
+
+Each source file's consumed byte offset is recorded, so syncing after an
+append only reads the new tail, and an unchanged file costs a single stat.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+MESSAGE_STORE_FILENAME = "message_index.sqlite"
+
+
+def default_store_path(data_dir: str | Path) -> Path:
+    """Returns the store location inside a scraper data directory."""
+    return Path(data_dir) / "metadata" / MESSAGE_STORE_FILENAME
+
+
+class MessageStore:
+    """
+    SQLite-backed ``message_id -> message`` index.
+
+    ``get`` mirrors ``dict.get`` so the store can stand in wherever an
+    in-memory message index was used. Open one store per process; connections
+    are not shared across forks.
+    """
+
+    def __init__(self, path: str | Path, *, read_only: bool = False) -> None:
+        self.path = Path(path)
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                message_id TEXT PRIMARY KEY,
+                server_id TEXT,
+                channel_id TEXT,
+                category TEXT,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_channel ON messages (server_id, channel_id);
+            CREATE INDEX IF NOT EXISTS messages_category ON messages (category);
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                server_id TEXT,
+                channel_id TEXT,
+                offset INTEGER NOT NULL
+            );
+            """
+        )
+
+    def get(self, message_id: str, default: Any = None) -> dict[str, Any] | None:
+        row = self.conn.execute(
+            "SELECT payload FROM messages WHERE message_id = ?", (str(message_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __contains__(self, message_id: object) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM messages WHERE message_id = ?", (str(message_id),)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def put(self, msg: dict[str, Any]) -> None:
+        mid = str(msg.get("message_id") or "")
+        if not mid:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)",
+            (
+                mid,
+                str(msg.get("server_id") or ""),
+                str(msg.get("channel_id") or ""),
+                str(msg.get("category") or ""),
+                json.dumps(msg),
+            ),
+        )
+
+    def forget_channel(self, server_id: str, channel_id: str) -> None:
+        self.conn.execute(
+            "DELETE FROM messages WHERE server_id = ? AND channel_id = ?", (server_id, channel_id)
+        )
+        self.conn.execute(
+            "DELETE FROM sources WHERE server_id = ? AND channel_id = ?", (server_id, channel_id)
+        )
+        self.conn.commit()
+
+    def sync_file(self, jsonl_path: str | Path, server_id: str, channel_id: str) -> int:
+        """
+        Indexes messages appended to *jsonl_path* since the last sync.
+        A file that shrank was rewritten, so its channel is reindexed from the
+        start. Returns the number of messages indexed.
+        """
+        key = str(Path(jsonl_path).resolve())
+        try:
+            size = os.path.getsize(jsonl_path)
+        except OSError:
+            return 0
+
+        row = self.conn.execute("SELECT offset FROM sources WHERE path = ?", (key,)).fetchone()
+        offset = row[0] if row else 0
+        if size == offset:
+            return 0
+        if size < offset:
+            self.forget_channel(server_id, channel_id)
+            offset = 0
+
+        added = 0
+        with open(jsonl_path, "rb") as fh:
+            fh.seek(offset)
+            for raw in fh:
+                if not raw.endswith(b"\n"):
+                    # Partial trailing line; pick it up once the writer finishes it
+                    break
+                offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    msg = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                msg.setdefault("server_id", server_id)
+                msg.setdefault("channel_id", channel_id)
+                self.put(msg)
+                added += 1
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+            (key, server_id, channel_id, offset),
+        )
+        self.conn.commit()
+        return added
+
+    def sync_dir(self, clean_messages_dir: str | Path) -> int:
+        """Syncs every ``{server_id}/{channel_id}/messages.jsonl`` under *clean_messages_dir*."""
+        root = Path(clean_messages_dir)
+        if not root.is_dir():
+            return 0
+        added = 0
+        for jsonl_path in sorted(root.glob("*/*/messages.jsonl")):
+            added += self.sync_file(jsonl_path, jsonl_path.parts[-3], jsonl_path.parts[-2])
+        return added
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
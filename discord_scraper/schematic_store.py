@@ -0,0 +1,238 @@
+"""
+Content-addressed store for downloaded schematics.
+
+Every schematic file is kept once under ``objects/<sha[:2]>/<sha><ext>``;
+the per-message files in ``raw_schematics/`` are filename aliases (hard links
+where the filesystem allows, copies otherwise) recorded in a SQLite index.
+Reposts of the same file across channels or servers therefore share one
+object, and later stages can skip every alias but the first.
+
+Near-duplicate mode groups objects by ``canonical_block_hash`` instead, which
+catches the same build re-saved at another origin or with other metadata.
+Block hashes are computed lazily; call ``index_near_hashes`` before a
+near-mode pass so every object can be matched regardless of visiting order.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+SCHEMATIC_STORE_DIRNAME = "objects"
+
+
+def default_schematic_store_path(data_dir: str | Path) -> Path:
+    """Returns the store root inside a scraper data directory."""
+    return Path(data_dir) / SCHEMATIC_STORE_DIRNAME
+
+
+def file_sha256(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def schematic_near_hash(path: str | Path) -> str | None:
+    """Origin-independent block hash of a schematic file, or None if it can't be parsed."""
+    try:
+        # Import lazily so the store works without litemapy/mcschematic installed.
+        from data_mining.parser import SchematicParser
+        from data_mining.records import canonical_block_hash
+
+        return canonical_block_hash(SchematicParser(str(path)).parse_blocks())
+    except Exception:
+        return None
+
+
+class SchematicStore:
+    """
+    SHA-256 keyed object store plus ``alias path -> object`` index.
+
+    Hashes of existing files are cached by size and mtime, so re-registering
+    an unchanged alias costs a stat. The first alias registered for an object
+    (or, in near mode, for any object with the same block hash) is its
+    representative; the others are duplicates.
+
+    Safe to share between download threads: index writes are serialized.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS objects (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                near_hash TEXT
+            );
+            CREATE INDEX IF NOT EXISTS objects_near ON objects (near_hash);
+            CREATE TABLE IF NOT EXISTS aliases (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT NOT NULL UNIQUE,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                added_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS aliases_sha ON aliases (sha256);
+            """
+        )
+
+    def object_path(self, sha: str, ext: str = "") -> Path:
+        return self.root / sha[:2] / f"{sha}{ext}"
+
+    def put_bytes(self, data: bytes, alias_path: str | Path) -> str:
+        """
+        Stores *data* (once per distinct content) and materializes it at
+        *alias_path*. Returns the content hash.
+        """
+        alias_path = Path(alias_path)
+        sha = hashlib.sha256(data).hexdigest()
+        obj = self.object_path(sha, alias_path.suffix.lower())
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp = obj.with_name(f"{obj.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, obj)
+
+        alias_path.parent.mkdir(parents=True, exist_ok=True)
+        if alias_path.exists():
+            alias_path.unlink()
+        try:
+            os.link(obj, alias_path)
+        except OSError:
+            shutil.copyfile(obj, alias_path)
+
+        self._record(alias_path, sha, len(data))
+        return sha
+
+    def add_file(self, path: str | Path) -> str:
+        """Registers an existing file as an alias (hashing it only if it changed) and returns its hash."""
+        path = Path(path)
+        st = path.stat()
+        row = self.conn.execute(
+            "SELECT sha256, size, mtime FROM aliases WHERE path = ?", (str(path.resolve()),)
+        ).fetchone()
+        if row and row[1] == st.st_size and row[2] == st.st_mtime:
+            return row[0]
+        sha = file_sha256(path)
+        self._record(path, sha, st.st_size)
+        return sha
+
+    def _record(self, path: Path, sha: str, size: int) -> None:
+        st = path.stat()
+        key = str(path.resolve())
+        with self._lock:
+            self.conn.execute("INSERT OR IGNORE INTO objects (sha256, size) VALUES (?, ?)", (sha, size))
+            updated = self.conn.execute(
+                "UPDATE aliases SET sha256 = ?, size = ?, mtime = ? WHERE path = ?",
+                (sha, st.st_size, st.st_mtime, key),
+            ).rowcount
+            if not updated:
+                self.conn.execute(
+                    "INSERT INTO aliases (path, sha256, size, mtime, added_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, sha, st.st_size, st.st_mtime, time.time()),
+                )
+            self.conn.commit()
+
+    def near_hash(self, sha: str, path: str | Path) -> str | None:
+        """Returns (computing and caching on first use) the block hash of object *sha*."""
+        row = self.conn.execute("SELECT near_hash FROM objects WHERE sha256 = ?", (sha,)).fetchone()
+        if row and row[0] is not None:
+            # "" caches "not parseable"
+            return row[0] or None
+        near = schematic_near_hash(path)
+        with self._lock:
+            self.conn.execute("UPDATE objects SET near_hash = ? WHERE sha256 = ?", (near or "", sha))
+            self.conn.commit()
+        return near
+
+    def index_near_hashes(self) -> int:
+        """
+        Computes the block hash of every object that doesn't have one yet, so
+        near-mode ``duplicate_of`` sees all objects and not only those visited
+        so far. Returns how many objects were hashed.
+        """
+        rows = self.conn.execute(
+            "SELECT o.sha256, a.path FROM objects o JOIN aliases a ON a.sha256 = o.sha256 "
+            "WHERE o.near_hash IS NULL ORDER BY o.sha256, a.id"
+        ).fetchall()
+        done: set[str] = set()
+        for sha, alias in rows:
+            if sha in done or not os.path.exists(alias):
+                continue
+            self.near_hash(sha, alias)
+            done.add(sha)
+        return len(done)
+
+    def _group_key(self, path: str | Path, near: bool) -> str:
+        sha = self.add_file(path)
+        if near:
+            block_hash = self.near_hash(sha, path)
+            if block_hash:
+                return f"near:{block_hash}"
+        return f"sha:{sha}"
+
+    def duplicate_of(
+        self,
+        path: str | Path,
+        *,
+        near: bool = False,
+        accept: Callable[[str], bool] | None = None,
+    ) -> str | None:
+        """
+        Returns the representative alias of *path*'s content if that is a
+        different, still existing file, otherwise None (*path* is the first copy).
+
+        Only aliases for which *accept* returns True can be representatives;
+        e.g. the clean stage accepts aliases that will be, or already were,
+        promoted, so an alias from a never-cleaned server can't hide the others.
+        """
+        key = str(Path(path).resolve())
+        kind, value = self._group_key(path, near).split(":", 1)
+        if kind == "near":
+            cur = self.conn.execute(
+                "SELECT a.path FROM aliases a JOIN objects o ON o.sha256 = a.sha256 "
+                "WHERE o.near_hash = ? ORDER BY a.id",
+                (value,),
+            )
+        else:
+            cur = self.conn.execute("SELECT path FROM aliases WHERE sha256 = ? ORDER BY id", (value,))
+        for (alias,) in cur:
+            if alias == key:
+                return None
+            if os.path.exists(alias) and (accept is None or accept(alias)):
+                return alias
+        return None
+
+    def dedup(self, paths: Iterable[str], *, near: bool = False) -> tuple[list[str], dict[str, str]]:
+        """
+        Keeps the first of each group of identical (or, with *near*, same
+        block hash) files in *paths*. Returns ``(unique, {duplicate: kept})``.
+        """
+        unique: list[str] = []
+        duplicates: dict[str, str] = {}
+        first: dict[str, str] = {}
+        for path in paths:
+            group = self._group_key(path, near)
+            if group in first:
+                duplicates[path] = first[group]
+                continue
+            first[group] = path
+            unique.append(path)
+        return unique, duplicates
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from discord_scraper.export_stream import ExportMessageStream, read_export_header
+
+
+def _export_bytes(messages):
+    doc = {
+        "guild": {"id": "1", "name": "Rédstone ⚡ Archive"},
+        "channel": {"id": "2", "name": "circuits-回路"},
+        "messages": messages,
+    }
+    return json.dumps(doc, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+class TestExportStreamTruncation(unittest.TestCase):
+    def setUp(self):
+        self.messages = [
+            {"id": str(i), "content": f"Türschaltung #{i} — 高速 🧱 {'é' * i}"}
+            for i in range(12)
+        ]
+        self.data = _export_bytes(self.messages)
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _write(self, data):
+        with open(self.path, "wb") as fh:
+            fh.write(data)
+
+    def test_full_read(self):
+        self._write(self.data)
+        stream = ExportMessageStream(self.path, chunk_size=7)
+        self.assertEqual(list(stream), self.messages)
+        self.assertTrue(stream.complete)
+        self.assertEqual(stream.header["channel"]["name"], "circuits-回路")
+
+    def test_truncated_at_every_byte_then_resumed(self):
+        # Every cut point, including the middle of multi-byte characters
+        for cut in range(len(self.data) + 1):
+            self._write(self.data[:cut])
+            first = ExportMessageStream(self.path, chunk_size=5)
+            got = list(first)
+            if first.complete:
+                self.assertEqual(got, self.messages, f"cut={cut}")
+                continue
+            # The writer finishes the file; resume from the last complete offset
+            # (from the start if the messages array hadn't been reached yet)
+            self._write(self.data)
+            second = ExportMessageStream(self.path, start_offset=first.offset, chunk_size=5)
+            self.assertEqual(got + list(second), self.messages, f"cut={cut}")
+            self.assertTrue(second.complete, f"cut={cut}")
+
+    def test_header_truncated_mid_character(self):
+        cut = self.data.index("⚡".encode("utf-8")) + 1
+        self._write(self.data[:cut])
+        self.assertEqual(read_export_header(self.path, chunk_size=3), ({}, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
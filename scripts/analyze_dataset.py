@@ -2,11 +2,18 @@
 """
 MIRA Dataset Analyzer — quality report for the training dataset.
 
-Analyzes a MIRA training JSONL file (produced by ingest_discord.py) and
+Analyzes a MIRA training JSONL file (produced by ingest_discord.py), or the
+same entries in Parquet form (see data_mining/columnar.py) or as a binary
+block corpus (scripts/build_block_corpus.py), and
 produces a structured quality report covering overview stats, quality issues,
 category distribution, block type analysis, corruption analysis, and
 description quality.
 
+The input is read once, as a stream: each entry is handed to one accumulator
+per report section and then dropped, so memory depends on the number of
+distinct IDs and block states rather than the size of the file. With
+--workers the file is split into ranges whose partial results are merged.
+
 Auto-detects both the standard Discord-ingested format (discord_dataset.jsonl)
 and the older reverse_dataset.jsonl format.
 
@@ -16,18 +23,27 @@ Usage:
     python scripts/analyze_dataset.py --verbose
     python scripts/analyze_dataset.py --json
     python scripts/analyze_dataset.py --json --verbose > report.json
+    python scripts/analyze_dataset.py --input data/training/discord_dataset.jsonl --workers 8
 """
 
 import argparse
+import itertools
 import json
 import os
 import sys
+from abc import ABC, abstractmethod
 from collections import Counter
-from typing import Any, Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type
 
 # Add project root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from data_mining.block_corpus import BlockCorpus, is_corpus_path
+from data_mining.columnar import is_parquet_path, iter_parquet_entries, parquet_row_groups
+from data_mining.dataset_io import find_shards
+from data_mining.json_codec import loads
+
 # ---------------------------------------------------------------------------
 # ANSI color helpers
 # ---------------------------------------------------------------------------
@@ -100,21 +116,58 @@ DIFFICULTY_TIERS = [
 ]
 
 
-def load_entries(path: str) -> List[Dict[str, Any]]:
-    """Load all entries from a JSONL file."""
-    entries = []
-    with open(path, "r", encoding="utf-8") as f:
+def dataset_ranges(path: str, count: int) -> List[Tuple[int, int]]:
+    """Split a dataset into up to *count* ``(start, end)`` ranges for ``iter_dataset``.
+
+    Ranges are line-aligned byte offsets for JSONL, row groups for Parquet and
+    rows for a block corpus.
+    """
+    if is_parquet_path(path):
+        total = parquet_row_groups(path)
+    elif is_corpus_path(path):
+        with BlockCorpus(path) as corpus:
+            total = len(corpus)
+    else:
+        return find_shards(path, count)
+    count = max(1, min(count, total))
+    return [(total * k // count, total * (k + 1) // count) for k in range(count)]
+
+
+def iter_dataset(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream entries from a JSONL file, a Parquet dataset (``.parquet``) or a block corpus (``.blocks``).
+
+    *start* / *end* select one of the ``dataset_ranges``; by default the whole
+    file is read. Entries are yielded one at a time and never collected.
+    """
+    if is_parquet_path(path):
+        row_groups = None
+        if start or end is not None:
+            row_groups = list(range(start, parquet_row_groups(path) if end is None else end))
+        yield from iter_parquet_entries(path, row_groups=row_groups)
+        return
+    if is_corpus_path(path):
+        with BlockCorpus(path) as corpus:
+            yield from corpus.entries(start, end)
+        return
+    offset = start
+    with open(path, "rb") as f:
+        f.seek(start)
         for line in f:
+            if end is not None and offset >= end:
+                break
+            offset += len(line)
             line = line.strip()
             if not line:
                 continue
-            entries.append(json.loads(line))
-    return entries
+            yield loads(line)
 
 
 def detect_format(entries: List[Dict[str, Any]]) -> str:
     """Detect whether entries use the standard or legacy format.
 
+    Only the first few entries are inspected, so callers can pass a short
+    prefix of the dataset.
+
     Returns:
         ``"standard"`` — entries have a ``type`` field (``generation``/``corruption``)
             as produced by ``ingest_discord.py``.
@@ -155,339 +208,511 @@ def _extract_blocks_from_decon(decon_steps: List[Dict]) -> List[Dict[str, Any]]:
     return blocks
 
 
-def normalize_entries(entries: List[Dict[str, Any]], fmt: str) -> List[Dict[str, Any]]:
-    """Normalize entries to the standard format for analysis.
+def normalize_entry(e: Dict[str, Any], fmt: str) -> Dict[str, Any]:
+    """Normalize one entry to the standard format for analysis.
 
     Legacy entries (from reverse_dataset.jsonl) are restructured to look like
     standard generation entries.
     """
-    if fmt == "standard":
-        return entries  # already in the expected format
-
-    normalized = []
-    for e in entries:
-        if "data" not in e or not isinstance(e["data"], dict):
-            # Can't normalize; include as-is
-            normalized.append(e)
-            continue
-
-        data = e["data"]
-        meta = data.get("metadata", {})
-
-        # Build block_list from deconstruction steps
-        decon_steps = data.get("deconstruction_steps", [])
-        block_list = _extract_blocks_from_decon(decon_steps)
-
-        norm = {
-            "type": "generation",
-            "schematic_id": e.get("schematic_id", "unknown"),
-            "source": "legacy",
-            "discord_metadata": {
-                "message_id": "",
-                "channel_name": "",
-                "category": meta.get("category", ""),
-                "author_name": meta.get("author", ""),
-                "description": meta.get("description", ""),
-            },
-            "schematic_metadata": {
-                "name": meta.get("name", ""),
-                "author": meta.get("author", ""),
-                "description": meta.get("description", ""),
-                "regions": meta.get("regions", []),
-            },
-            "block_list": block_list,
-            "deconstruction_steps": decon_steps,
-            "build_steps": data.get("build_steps", []),
-            "verify_contract": data.get("verify_contract", ""),
-            "contract_prompt": data.get("contract_prompt", {"system": "", "user": ""}),
-            "_legacy_status": e.get("status", ""),
-        }
-        normalized.append(norm)
+    if fmt == "standard" or "data" not in e or not isinstance(e["data"], dict):
+        # Already in the expected format, or can't normalize; use as-is
+        return e
+
+    data = e["data"]
+    meta = data.get("metadata", {})
+
+    # Build block_list from deconstruction steps
+    decon_steps = data.get("deconstruction_steps", [])
+    block_list = _extract_blocks_from_decon(decon_steps)
 
-    return normalized
+    return {
+        "type": "generation",
+        "schematic_id": e.get("schematic_id", "unknown"),
+        "source": "legacy",
+        "discord_metadata": {
+            "message_id": "",
+            "channel_name": "",
+            "category": meta.get("category", ""),
+            "author_name": meta.get("author", ""),
+            "description": meta.get("description", ""),
+        },
+        "schematic_metadata": {
+            "name": meta.get("name", ""),
+            "author": meta.get("author", ""),
+            "description": meta.get("description", ""),
+            "regions": meta.get("regions", []),
+        },
+        "block_list": block_list,
+        "deconstruction_steps": decon_steps,
+        "build_steps": data.get("build_steps", []),
+        "verify_contract": data.get("verify_contract", ""),
+        "contract_prompt": data.get("contract_prompt", {"system": "", "user": ""}),
+        "_legacy_status": e.get("status", ""),
+    }
 
 
 # ---------------------------------------------------------------------------
-# Analysis functions
+# Section accumulators
 # ---------------------------------------------------------------------------
 
-def analyze_overview(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+class Accumulator(ABC):
+    """One report section, built in a single pass over the dataset.
+
+    ``add`` sees each (normalized) entry once, ``merge`` folds in the partial
+    state of the same section from another shard, and ``result`` returns the
+    section dict. Accumulators keep counters, not entries, and must be
+    picklable so shard results can be sent back from worker processes.
+    """
+
+    @abstractmethod
+    def add(self, entry: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def merge(self, other: "Accumulator") -> None:
+        ...
+
+    @abstractmethod
+    def result(self) -> Dict[str, Any]:
+        ...
+
+
+def _histogram_median(histogram: Counter) -> int:
+    """``sorted(values)[n // 2]`` for values given as a value -> count histogram."""
+    target = sum(histogram.values()) // 2
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen > target:
+            return value
+    raise ValueError("empty histogram")
+
+
+class OverviewStats(Accumulator):
     """Section 1: Overview statistics."""
-    total = len(entries)
-    gen_entries = [e for e in entries if e.get("type") == "generation"]
-    corr_entries = [e for e in entries if e.get("type") == "corruption"]
 
-    schematic_ids = set()
-    for e in entries:
-        sid = e.get("schematic_id")
+    def __init__(self) -> None:
+        self.total = 0
+        self.generation = 0
+        self.corruption = 0
+        self.schematic_ids: Set[str] = set()
+        # Block count -> number of generation entries with that many blocks
+        self.block_counts: Counter = Counter()
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.total += 1
+        etype = entry.get("type")
+        if etype == "generation":
+            self.generation += 1
+            self.block_counts[len(entry.get("block_list", []))] += 1
+        elif etype == "corruption":
+            self.corruption += 1
+        sid = entry.get("schematic_id")
         if sid:
-            schematic_ids.add(sid)
-
-    # Block counts per generation entry
-    block_counts = []
-    total_blocks = 0
-    for e in gen_entries:
-        bl = e.get("block_list", [])
-        n = len(bl)
-        block_counts.append(n)
-        total_blocks += n
-
-    block_stats: Dict[str, Any] = {}
-    if block_counts:
-        block_stats = {
-            "total": total_blocks,
-            "average": round(sum(block_counts) / len(block_counts), 1),
-            "min": min(block_counts),
-            "max": max(block_counts),
-            "median": sorted(block_counts)[len(block_counts) // 2],
+            self.schematic_ids.add(sid)
+
+    def merge(self, other: "OverviewStats") -> None:
+        self.total += other.total
+        self.generation += other.generation
+        self.corruption += other.corruption
+        self.schematic_ids |= other.schematic_ids
+        self.block_counts.update(other.block_counts)
+
+    def result(self) -> Dict[str, Any]:
+        block_stats: Dict[str, Any] = {}
+        if self.block_counts:
+            circuits = sum(self.block_counts.values())
+            total_blocks = sum(n * count for n, count in self.block_counts.items())
+            block_stats = {
+                "total": total_blocks,
+                "average": round(total_blocks / circuits, 1),
+                "min": min(self.block_counts),
+                "max": max(self.block_counts),
+                "median": _histogram_median(self.block_counts),
+            }
+
+        return {
+            "total_entries": self.total,
+            "generation_entries": self.generation,
+            "corruption_entries": self.corruption,
+            "unique_schematic_ids": len(self.schematic_ids),
+            "block_stats": block_stats,
         }
 
-    return {
-        "total_entries": total,
-        "generation_entries": len(gen_entries),
-        "corruption_entries": len(corr_entries),
-        "unique_schematic_ids": len(schematic_ids),
-        "block_stats": block_stats,
-    }
-
 
-def analyze_quality(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+class QualityStats(Accumulator):
     """Section 2: Quality issues."""
+
     # Thresholds
     OVERSIZE_THRESHOLDS = [1000, 5000, 10000]
     UNDERSIZE_THRESHOLD = 5
 
-    gen_entries = [e for e in entries if e.get("type") == "generation"]
-
-    entity_blocks = 0
-    float_coords = 0
-    empty_descriptions = 0
-    missing_metadata: Dict[str, int] = Counter()
-    schematic_id_counts: Counter = Counter()
-    oversize_counts = {t: 0 for t in OVERSIZE_THRESHOLDS}
-    undersize_count = 0
-
-    for e in entries:
-        sid = e.get("schematic_id")
-        if sid:
-            schematic_id_counts[sid] += 1
-
     # Required fields per entry type
-    required_fields = {
+    REQUIRED_FIELDS = {
         "generation": ["schematic_id", "block_list", "source", "discord_metadata"],
         "corruption": ["schematic_id", "corruption_type", "original_blocks",
                        "corrupted_blocks", "modifications"],
     }
+    # Diff records reference their generation entry instead of embedding blocks
+    DIFF_REQUIRED_FIELDS = ["schematic_id", "corruption_type", "parent_id", "modifications"]
+
+    def __init__(self) -> None:
+        self.entity_blocks = 0
+        self.float_coords = 0
+        self.empty_descriptions = 0
+        self.missing_metadata: Counter = Counter()
+        self.schematic_id_counts: Counter = Counter()
+        self.oversize_counts = {t: 0 for t in self.OVERSIZE_THRESHOLDS}
+        self.undersize_count = 0
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        sid = entry.get("schematic_id")
+        if sid:
+            self.schematic_id_counts[sid] += 1
+
+        etype = entry.get("type", "")
+        fields = self.REQUIRED_FIELDS.get(etype, [])
+        if entry.get("record") == "diff":
+            fields = self.DIFF_REQUIRED_FIELDS
+        for field in fields:
+            if field not in entry or entry[field] is None or entry[field] == "":
+                self.missing_metadata[f"{etype}.{field}"] += 1
 
-    for e in entries:
-        etype = e.get("type", "")
-
-        # Check required fields
-        for field in required_fields.get(etype, []):
-            if field not in e or e[field] is None or e[field] == "":
-                missing_metadata[f"{etype}.{field}"] += 1
-            elif isinstance(e[field], (list, dict)) and len(e[field]) == 0:
-                # Only flag empty lists/dicts for certain fields
-                if field not in ("deconstruction_steps", "build_steps",
-                                 "contract_prompt", "discord_metadata"):
-                    pass  # allow empty metadata
-                pass
-
-    # Per-generation-entry checks
-    for e in gen_entries:
-        bl = e.get("block_list", [])
+        if etype != "generation":
+            return
+
+        # Per-generation-entry checks
+        bl = entry.get("block_list", [])
         block_count = len(bl)
 
         # Oversize / undersize
-        if block_count < UNDERSIZE_THRESHOLD:
-            undersize_count += 1
-        for t in OVERSIZE_THRESHOLDS:
+        if block_count < self.UNDERSIZE_THRESHOLD:
+            self.undersize_count += 1
+        for t in self.OVERSIZE_THRESHOLDS:
             if block_count > t:
-                oversize_counts[t] += 1
+                self.oversize_counts[t] += 1
 
-        # Entity blocks
         for b in bl:
-            state = b.get("state", "")
-            if state.startswith("entity:"):
-                entity_blocks += 1
-
-            # Float coordinates
-            for coord in ("x", "y", "z"):
-                val = b.get(coord)
-                if val is not None and not isinstance(val, int):
-                    # Check if it's a float with non-zero fractional part
-                    if isinstance(val, float) and val != int(val):
-                        float_coords += 1
-                        break
-                    # Also catch cases where it's stored as float but is whole
-                    # (e.g. 13.0) - still report as it's not an integer type
-                    if isinstance(val, float):
-                        float_coords += 1
-                        break
+            # Entity blocks
+            if b.get("state", "").startswith("entity:"):
+                self.entity_blocks += 1
+            # Float coordinates, including whole ones (e.g. 13.0): not an integer type
+            if (isinstance(b.get("x"), float) or isinstance(b.get("y"), float)
+                    or isinstance(b.get("z"), float)):
+                self.float_coords += 1
 
         # Empty description
-        desc = e.get("discord_metadata", {}).get("description", "")
+        desc = entry.get("discord_metadata", {}).get("description", "")
         if not desc or not desc.strip():
-            empty_descriptions += 1
-
-    # Duplicate schematic IDs
-    duplicates = {sid: count for sid, count in schematic_id_counts.items()
-                  if count > 1}
-
-    return {
-        "entity_blocks": entity_blocks,
-        "float_coordinate_blocks": float_coords,
-        "empty_descriptions": empty_descriptions,
-        "missing_metadata": dict(missing_metadata),
-        "duplicate_schematic_ids": len(duplicates),
-        "duplicate_schematic_id_list": duplicates,
-        "oversize_circuits": oversize_counts,
-        "undersize_circuits_lt_5": undersize_count,
-    }
+            self.empty_descriptions += 1
+
+    def merge(self, other: "QualityStats") -> None:
+        self.entity_blocks += other.entity_blocks
+        self.float_coords += other.float_coords
+        self.empty_descriptions += other.empty_descriptions
+        self.missing_metadata.update(other.missing_metadata)
+        self.schematic_id_counts.update(other.schematic_id_counts)
+        for t, count in other.oversize_counts.items():
+            self.oversize_counts[t] += count
+        self.undersize_count += other.undersize_count
+
+    def result(self) -> Dict[str, Any]:
+        # Duplicate schematic IDs
+        duplicates = {sid: count for sid, count in self.schematic_id_counts.items()
+                      if count > 1}
+
+        return {
+            "entity_blocks": self.entity_blocks,
+            "float_coordinate_blocks": self.float_coords,
+            "empty_descriptions": self.empty_descriptions,
+            "missing_metadata": dict(self.missing_metadata),
+            "duplicate_schematic_ids": len(duplicates),
+            "duplicate_schematic_id_list": duplicates,
+            "oversize_circuits": dict(self.oversize_counts),
+            "undersize_circuits_lt_5": self.undersize_count,
+        }
 
 
-def analyze_categories(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+class CategoryStats(Accumulator):
     """Section 3: Category distribution."""
-    gen_entries = [e for e in entries if e.get("type") == "generation"]
 
-    category_counts: Counter = Counter()
-    difficulty_counts: Counter = Counter()
+    def __init__(self) -> None:
+        self.category_counts: Counter = Counter()
+        self.difficulty_counts: Counter = Counter()
 
-    for e in gen_entries:
-        cat = e.get("discord_metadata", {}).get("category", "unknown")
+    def add(self, entry: Dict[str, Any]) -> None:
+        if entry.get("type") != "generation":
+            return
+        cat = entry.get("discord_metadata", {}).get("category", "unknown")
         if not cat:
             cat = "unknown"
-        category_counts[cat] += 1
+        self.category_counts[cat] += 1
 
         # Difficulty tier
-        bl = e.get("block_list", [])
-        n = len(bl)
+        n = len(entry.get("block_list", []))
         for tier_name, lo, hi in DIFFICULTY_TIERS:
             if lo <= n <= hi:
-                difficulty_counts[tier_name] += 1
+                self.difficulty_counts[tier_name] += 1
                 break
         else:
-            difficulty_counts["unknown"] += 1
-
-    return {
-        "category_counts": dict(category_counts),
-        "difficulty_counts": dict(difficulty_counts),
-    }
+            self.difficulty_counts["unknown"] += 1
 
+    def merge(self, other: "CategoryStats") -> None:
+        self.category_counts.update(other.category_counts)
+        self.difficulty_counts.update(other.difficulty_counts)
 
-def analyze_blocks(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Section 4: Block type analysis."""
-    gen_entries = [e for e in entries if e.get("type") == "generation"]
-
-    # Full block state counter (e.g. "minecraft:redstone_wire[east=none,...]")
-    full_state_counter: Counter = Counter()
-    # Just the base block type (e.g. "minecraft:redstone_wire")
-    base_type_counter: Counter = Counter()
-    redstone_counter: Counter = Counter()
+    def result(self) -> Dict[str, Any]:
+        return {
+            "category_counts": dict(self.category_counts),
+            "difficulty_counts": dict(self.difficulty_counts),
+        }
 
-    for e in gen_entries:
-        for b in e.get("block_list", []):
-            state = b.get("state", "")
-            full_state_counter[state] += 1
 
-            # Extract base type (everything before the first '[')
-            base = state.split("[")[0] if "[" in state else state
-            base_type_counter[base] += 1
+class BlockStats(Accumulator):
+    """Section 4: Block type analysis."""
 
-            # Check for redstone-specific blocks
-            # base is like "minecraft:redstone_wire"
+    def __init__(self) -> None:
+        # Full block state counter (e.g. "minecraft:redstone_wire[east=none,...]");
+        # base types and redstone totals are derived from it in result()
+        self.state_counts: Counter = Counter()
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        if entry.get("type") == "generation":
+            self.state_counts.update(b.get("state", "") for b in entry.get("block_list", []))
+
+    def merge(self, other: "BlockStats") -> None:
+        self.state_counts.update(other.state_counts)
+
+    def result(self) -> Dict[str, Any]:
+        base_types: Set[str] = set()
+        redstone_counter: Counter = Counter()
+        for state, count in self.state_counts.items():
+            # Base type is everything before the first '[' (e.g. "minecraft:redstone_wire")
+            base = state.split("[", 1)[0]
+            base_types.add(base)
             block_name = base.split(":", 1)[1] if ":" in base else base
             if block_name in REDSTONE_BLOCKS:
-                redstone_counter[base] += 1
-
-    top20 = full_state_counter.most_common(20)
-
-    return {
-        "top_20_block_states": [(s, c) for s, c in top20],
-        "unique_block_types": len(base_type_counter),
-        "unique_block_states": len(full_state_counter),
-        "redstone_block_types": dict(redstone_counter),
-        "total_redstone_blocks": sum(redstone_counter.values()),
-    }
+                redstone_counter[base] += count
+
+        return {
+            "top_20_block_states": self.state_counts.most_common(20),
+            "unique_block_types": len(base_types),
+            "unique_block_states": len(self.state_counts),
+            "redstone_block_types": dict(redstone_counter),
+            "total_redstone_blocks": sum(redstone_counter.values()),
+        }
 
 
-def analyze_corruptions(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+class CorruptionStats(Accumulator):
     """Section 5: Corruption analysis."""
-    corr_entries = [e for e in entries if e.get("type") == "corruption"]
 
-    corruption_type_counts: Counter = Counter()
-    modifications_counts = []
+    def __init__(self) -> None:
+        self.total = 0
+        self.corruption_type_counts: Counter = Counter()
+        self.modifications = 0
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        if entry.get("type") != "corruption":
+            return
+        self.total += 1
+        self.corruption_type_counts[entry.get("corruption_type", "unknown")] += 1
+        self.modifications += len(entry.get("modifications", []))
+
+    def merge(self, other: "CorruptionStats") -> None:
+        self.total += other.total
+        self.corruption_type_counts.update(other.corruption_type_counts)
+        self.modifications += other.modifications
+
+    def result(self) -> Dict[str, Any]:
+        avg_mods = 0.0
+        if self.total:
+            avg_mods = round(self.modifications / self.total, 2)
+
+        return {
+            "total_corruption_entries": self.total,
+            "corruption_type_counts": dict(self.corruption_type_counts),
+            "average_modifications_per_entry": avg_mods,
+        }
 
-    for e in corr_entries:
-        ct = e.get("corruption_type", "unknown")
-        corruption_type_counts[ct] += 1
 
-        mods = e.get("modifications", [])
-        modifications_counts.append(len(mods))
+class DescriptionStats(Accumulator):
+    """Section 6: Description quality."""
 
-    avg_mods = 0.0
-    if modifications_counts:
-        avg_mods = round(sum(modifications_counts) / len(modifications_counts), 2)
+    def __init__(self) -> None:
+        self.total = 0
+        self.empty_count = 0
+        self.non_empty = 0
+        self.total_length = 0
+        self.min_length: Optional[int] = None
+        self.max_length: Optional[int] = None
+        self.starts_with_dash = 0
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        if entry.get("type") != "generation":
+            return
+        self.total += 1
+        desc = entry.get("discord_metadata", {}).get("description", "")
+        if not desc or not desc.strip():
+            self.empty_count += 1
+            return
 
-    return {
-        "total_corruption_entries": len(corr_entries),
-        "corruption_type_counts": dict(corruption_type_counts),
-        "average_modifications_per_entry": avg_mods,
-    }
+        n = len(desc)
+        self.non_empty += 1
+        self.total_length += n
+        self.min_length = n if self.min_length is None else min(self.min_length, n)
+        self.max_length = n if self.max_length is None else max(self.max_length, n)
 
+        # Archiver Bot structured format typically starts with "-"
+        if desc.strip().startswith("-"):
+            self.starts_with_dash += 1
+
+    def merge(self, other: "DescriptionStats") -> None:
+        self.total += other.total
+        self.empty_count += other.empty_count
+        self.non_empty += other.non_empty
+        self.total_length += other.total_length
+        lengths = [v for v in (self.min_length, other.min_length) if v is not None]
+        self.min_length = min(lengths) if lengths else None
+        lengths = [v for v in (self.max_length, other.max_length) if v is not None]
+        self.max_length = max(lengths) if lengths else None
+        self.starts_with_dash += other.starts_with_dash
+
+    def result(self) -> Dict[str, Any]:
+        avg_length = 0.0
+        if self.non_empty:
+            avg_length = round(self.total_length / self.non_empty, 1)
+
+        return {
+            "total_descriptions": self.total,
+            "empty_descriptions": self.empty_count,
+            "non_empty_descriptions": self.non_empty,
+            "average_length_chars": avg_length,
+            "min_length_chars": self.min_length or 0,
+            "max_length_chars": self.max_length or 0,
+            "archiver_bot_format_starts_with_dash": self.starts_with_dash,
+        }
 
-def analyze_descriptions(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Section 6: Description quality."""
-    gen_entries = [e for e in entries if e.get("type") == "generation"]
 
-    lengths = []
-    starts_with_dash = 0
-    empty_count = 0
+class CircuitDetails(Accumulator):
+    """Per-circuit details for verbose mode (one small dict per generation entry)."""
 
-    for e in gen_entries:
-        desc = e.get("discord_metadata", {}).get("description", "")
-        if not desc or not desc.strip():
-            empty_count += 1
-            continue
+    def __init__(self) -> None:
+        self.details: List[Dict[str, Any]] = []
 
-        lengths.append(len(desc))
+    def add(self, entry: Dict[str, Any]) -> None:
+        if entry.get("type") != "generation":
+            return
+        bl = entry.get("block_list", [])
+        desc = entry.get("discord_metadata", {}).get("description", "")
 
-        # Archiver Bot structured format typically starts with "-"
-        if desc.strip().startswith("-"):
-            starts_with_dash += 1
+        entity_count = sum(1 for b in bl
+                           if b.get("state", "").startswith("entity:"))
+        redstone_count = sum(1 for b in bl
+                             if b.get("state", "").split("[")[0].split(":", 1)[-1]
+                             in REDSTONE_BLOCKS)
 
-    avg_length = 0.0
-    if lengths:
-        avg_length = round(sum(lengths) / len(lengths), 1)
+        self.details.append({
+            "schematic_id": entry.get("schematic_id", "?"),
+            "author": entry.get("schematic_metadata", {}).get("author", "?"),
+            "category": entry.get("discord_metadata", {}).get("category", "?"),
+            "blocks": len(bl),
+            "entity_blocks": entity_count,
+            "redstone_blocks": redstone_count,
+            "deconstruction_steps": len(entry.get("deconstruction_steps", [])),
+            "build_steps": len(entry.get("build_steps", [])),
+            "description_preview": desc[:120] + "..." if len(desc) > 120 else desc,
+            "has_contract": bool(entry.get("verify_contract", "")),
+        })
 
-    min_length = min(lengths) if lengths else 0
-    max_length = max(lengths) if lengths else 0
+    def merge(self, other: "CircuitDetails") -> None:
+        self.details.extend(other.details)
 
-    return {
-        "total_descriptions": len(gen_entries),
-        "empty_descriptions": empty_count,
-        "non_empty_descriptions": len(lengths),
-        "average_length_chars": avg_length,
-        "min_length_chars": min_length,
-        "max_length_chars": max_length,
-        "archiver_bot_format_starts_with_dash": starts_with_dash,
-    }
+    def result(self) -> Dict[str, Any]:
+        return {"per_circuit": self.details}
 
 
 # ---------------------------------------------------------------------------
 # Report assembly
 # ---------------------------------------------------------------------------
 
-def build_report(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Build the full analysis report."""
-    return {
-        "overview": analyze_overview(entries),
-        "quality_issues": analyze_quality(entries),
-        "category_distribution": analyze_categories(entries),
-        "block_type_analysis": analyze_blocks(entries),
-        "corruption_analysis": analyze_corruptions(entries),
-        "description_quality": analyze_descriptions(entries),
-    }
+# Report key -> accumulator, in report order. Add a section by appending here.
+SECTIONS: List[Tuple[str, Type[Accumulator]]] = [
+    ("overview", OverviewStats),
+    ("quality_issues", QualityStats),
+    ("category_distribution", CategoryStats),
+    ("block_type_analysis", BlockStats),
+    ("corruption_analysis", CorruptionStats),
+    ("description_quality", DescriptionStats),
+]
+VERBOSE_SECTIONS = SECTIONS + [("per_circuit", CircuitDetails)]
+
+
+class DatasetAnalyzer:
+    """Feeds every entry, normalized for *fmt*, to one accumulator per section."""
+
+    def __init__(self, sections: Optional[List[Tuple[str, Type[Accumulator]]]] = None,
+                 fmt: str = "standard") -> None:
+        self.fmt = fmt
+        self.sections: Dict[str, Accumulator] = {
+            name: cls() for name, cls in (SECTIONS if sections is None else sections)
+        }
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        entry = normalize_entry(entry, self.fmt)
+        for acc in self.sections.values():
+            acc.add(entry)
+
+    def merge(self, other: "DatasetAnalyzer") -> None:
+        """Fold in the results of another shard; merge shards in file order."""
+        for name, acc in self.sections.items():
+            acc.merge(other.sections[name])
+
+    def report(self) -> Dict[str, Any]:
+        return {name: acc.result() for name, acc in self.sections.items()}
+
+
+def build_report(entries: Iterable[Dict[str, Any]], fmt: str = "standard") -> Dict[str, Any]:
+    """Build the full analysis report from an iterable of entries."""
+    analyzer = DatasetAnalyzer(fmt=fmt)
+    for entry in entries:
+        analyzer.add(entry)
+    return analyzer.report()
+
+
+def _analyze_range(
+    job: Tuple[str, int, Optional[int], str, Optional[List[Tuple[str, Type[Accumulator]]]]],
+) -> DatasetAnalyzer:
+    """Worker: analyze one ``dataset_ranges`` range of the input."""
+    path, start, end, fmt, sections = job
+    analyzer = DatasetAnalyzer(sections, fmt)
+    for entry in iter_dataset(path, start, end):
+        analyzer.add(entry)
+    return analyzer
+
+
+def analyze_path(
+    path: str,
+    fmt: str = "standard",
+    workers: int = 1,
+    sections: Optional[List[Tuple[str, Type[Accumulator]]]] = None,
+) -> DatasetAnalyzer:
+    """Analyze a dataset file in one streaming pass.
+
+    With ``workers > 1`` the file is split into ranges that worker processes
+    analyze independently; their partial results are merged in file order,
+    so the report is the same as a single-process run.
+    """
+    ranges = dataset_ranges(path, workers) if workers > 1 else [(0, None)]
+    jobs = [(path, start, end, fmt, sections) for start, end in ranges]
+    if len(jobs) == 1:
+        return _analyze_range(jobs[0])
+
+    with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+        parts = list(pool.map(_analyze_range, jobs))
+    analyzer = parts[0]
+    for part in parts[1:]:
+        analyzer.merge(part)
+    return analyzer
 
 
 # ---------------------------------------------------------------------------
@@ -688,47 +913,6 @@ def format_report_json(report: Dict[str, Any]) -> str:
     return json.dumps(report, indent=2, default=str)
 
 
-# ---------------------------------------------------------------------------
-# Verbose helpers
-# ---------------------------------------------------------------------------
-
-def build_verbose_details(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Build per-circuit details for verbose mode."""
-    gen_entries = [e for e in entries if e.get("type") == "generation"]
-
-    details = []
-    for e in gen_entries:
-        bl = e.get("block_list", [])
-        desc = e.get("discord_metadata", {}).get("description", "")
-        cat = e.get("discord_metadata", {}).get("category", "?")
-        sid = e.get("schematic_id", "?")
-        author = e.get("schematic_metadata", {}).get("author", "?")
-
-        entity_count = sum(1 for b in bl
-                           if b.get("state", "").startswith("entity:"))
-        redstone_count = sum(1 for b in bl
-                             if b.get("state", "").split("[")[0].split(":", 1)[-1]
-                             in REDSTONE_BLOCKS)
-
-        ds_len = len(e.get("deconstruction_steps", []))
-        bs_len = len(e.get("build_steps", []))
-
-        details.append({
-            "schematic_id": sid,
-            "author": author,
-            "category": cat,
-            "blocks": len(bl),
-            "entity_blocks": entity_count,
-            "redstone_blocks": redstone_count,
-            "deconstruction_steps": ds_len,
-            "build_steps": bs_len,
-            "description_preview": desc[:120] + "..." if len(desc) > 120 else desc,
-            "has_contract": bool(e.get("verify_contract", "")),
-        })
-
-    return {"per_circuit": details}
-
-
 def format_verbose_text(report: Dict[str, Any],
                         verbose_details: Dict[str, Any]) -> str:
     """Format verbose per-circuit details as colored text."""
@@ -784,7 +968,7 @@ def main() -> None:
     parser.add_argument(
         "--input",
         default="data/training/discord_dataset.jsonl",
-        help="Input JSONL file (default: data/training/discord_dataset.jsonl)",
+        help="Input JSONL, .parquet or .blocks file (default: data/training/discord_dataset.jsonl)",
     )
     parser.add_argument(
         "--verbose",
@@ -796,6 +980,12 @@ def main() -> None:
         action="store_true",
         help="Output report as JSON instead of formatted text",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes; splits the input into one range per worker (default: 1)",
+    )
 
     args = parser.parse_args()
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -826,9 +1016,14 @@ def main() -> None:
                       file=sys.stderr)
                 sys.exit(1)
 
-    # Load data
+    # Detect format from the first entries, then analyze everything in one pass
     try:
-        entries = load_entries(input_path)
+        fmt = detect_format(list(itertools.islice(iter_dataset(input_path), 5)))
+        if fmt == "unknown":
+            print(f"{Colors.warn('Warning:')} No entries found in {input_path}.")
+            sys.exit(0)
+        sections = VERBOSE_SECTIONS if args.verbose else SECTIONS
+        analyzer = analyze_path(input_path, fmt, workers=max(1, args.workers), sections=sections)
     except json.JSONDecodeError as e:
         print(f"{Colors.error('Error:')} Invalid JSONL file: {e}",
               file=sys.stderr)
@@ -838,23 +1033,14 @@ def main() -> None:
               file=sys.stderr)
         sys.exit(1)
 
-    if not entries:
-        print(f"{Colors.warn('Warning:')} No entries found in {input_path}.")
-        sys.exit(0)
-
-    # Detect format and normalize
-    fmt = detect_format(entries)
+    report = analyzer.report()
     if fmt == "legacy":
         print(f"{Colors.info('Info:')} Detected legacy dataset format "
-              f"({len(entries)} entries). Normalizing for analysis.",
+              f"({report['overview']['total_entries']} entries). Normalized for analysis.",
               file=sys.stderr)
-    entries = normalize_entries(entries, fmt)
-
-    # Build report
-    report = build_report(entries)
 
     # Verbose details
-    verbose_details = build_verbose_details(entries) if args.verbose else {}
+    verbose_details = report.pop("per_circuit", {})
 
     if args.json:
         # Merge verbose details into report for JSON output
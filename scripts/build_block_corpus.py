@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+MIRA: Build a memory-mapped binary block corpus from a dataset file.
+
+Packs the block lists of a JSONL or Parquet dataset (``ingest_discord.py`` /
+``convert_dataset.py`` output) into a ``.blocks`` corpus (see
+``data_mining/block_corpus.py``): one global state palette, packed
+(x, y, z, state_id) records per circuit and an offset index, so circuits can
+be fetched by ID without scanning or re-parsing JSON. ``analyze_dataset.py``
+and ``generate_training_data.py`` accept the result as ``--input``.
+
+Usage:
+    python scripts/build_block_corpus.py --input data/training/converted/block_list.jsonl
+    python scripts/build_block_corpus.py --input data/training/discord_dataset.jsonl --output data/training/discord_dataset.blocks
+    python scripts/build_block_corpus.py --input data/training/converted/block_list.blocks --get discord_12345
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_mining.block_corpus import CORPUS_SUFFIX, BlockCorpus, build_corpus, is_corpus_path
+from data_mining.columnar import is_parquet_path, iter_parquet_entries
+from data_mining.json_codec import JSONDecodeError, loads
+
+
+def iter_dataset(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield entries from a JSONL or Parquet dataset."""
+    if is_parquet_path(path):
+        yield from iter_parquet_entries(path)
+        return
+    with open(path, "r", encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except JSONDecodeError as e:
+                print(f"WARNING: Skipping line {line_no} — JSON decode error: {e}", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Pack a MIRA dataset's block lists into a memory-mapped binary corpus."
+    )
+    parser.add_argument("--input", required=True, help="Dataset JSONL/.parquet file (or a corpus, with --get)")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help=f"Corpus file to write (default: input path with {CORPUS_SUFFIX} extension)",
+    )
+    parser.add_argument("--get", default=None, help="Print the entry with this key from an existing corpus")
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.input):
+        print(f"ERROR: Input file not found: {args.input}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.get:
+        if not is_corpus_path(args.input):
+            print(f"ERROR: --get needs a {CORPUS_SUFFIX} corpus as --input", file=sys.stderr)
+            sys.exit(1)
+        with BlockCorpus(args.input) as corpus:
+            entry = corpus.entry(args.get)
+        if entry is None:
+            print(f"ERROR: No entry with key {args.get!r}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(entry, indent=2, ensure_ascii=False))
+        return
+
+    output = args.output or os.path.splitext(args.input)[0] + CORPUS_SUFFIX
+    start = time.time()
+    count = build_corpus(iter_dataset(args.input), output)
+    with BlockCorpus(output) as corpus:
+        palette = len(corpus.palette)
+    print(
+        f"Wrote {count} entries ({palette} distinct states) to {output} "
+        f"({os.path.getsize(output) / 1e6:.1f} MB, {time.time() - start:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
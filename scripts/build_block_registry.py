@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+MIRA: Build the block/property registry used for static schematic validation.
+
+Runs the server's data generator once (or reuses an existing
+``reports/blocks.json``) and writes a compact registry that
+``discord_scraper/export_discord.py clean`` loads to reject schematics with
+unknown blocks or impossible block states before pasting them in-game.
+
+Usage:
+    python scripts/build_block_registry.py
+    python scripts/build_block_registry.py --server-jar simulation/server/server.jar
+    python scripts/build_block_registry.py --reports path/to/reports/blocks.json
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_mining.block_registry import BlockRegistry, generate_reports
+
+DEFAULT_OUTPUT = "discord_scraper/data/metadata/block_registry.json"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Extract the block/property registry from the Minecraft data generator."
+    )
+    parser.add_argument(
+        "--server-jar",
+        default="simulation/server/server.jar",
+        help="Vanilla server jar to run the data generator from (default: simulation/server/server.jar)",
+    )
+    parser.add_argument(
+        "--reports",
+        default=None,
+        help="Use an existing reports/blocks.json instead of running the data generator",
+    )
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_OUTPUT,
+        help=f"Registry file to write (default: {DEFAULT_OUTPUT})",
+    )
+    parser.add_argument("--version", default=None, help="Game version label stored in the registry")
+    parser.add_argument("--java", default="java", help="Java executable (default: java)")
+
+    args = parser.parse_args()
+
+    if args.reports:
+        if not os.path.isfile(args.reports):
+            print(f"ERROR: Reports file not found: {args.reports}", file=sys.stderr)
+            sys.exit(1)
+        registry = BlockRegistry.from_reports(args.reports, version=args.version)
+    else:
+        if not os.path.isfile(args.server_jar):
+            print(f"ERROR: Server jar not found: {args.server_jar}", file=sys.stderr)
+            sys.exit(1)
+        with tempfile.TemporaryDirectory(prefix="mira_reports_") as tmp:
+            print(f"Running data generator from {args.server_jar}...")
+            blocks_json = generate_reports(args.server_jar, tmp, java=args.java)
+            registry = BlockRegistry.from_reports(blocks_json, version=args.version)
+
+    registry.save(args.output)
+    n_props = sum(len(p) for p in registry.blocks.values())
+    print(f"Wrote {len(registry)} blocks ({n_props} properties) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,23 +9,37 @@ Input formats:
   - ``generation`` entries → ``block_list`` format
   - ``corruption`` entries → ``repair`` format
 
+The input is converted in a single streaming pass: each entry is written as
+soon as it is converted, and repair entries find their parent through a
+compact id → (category, offset) index, so memory does not grow with the
+dataset.
+
 Usage:
     python scripts/convert_dataset.py --help
     python scripts/convert_dataset.py --dry-run
     python scripts/convert_dataset.py --formats block_list,repair
     python scripts/convert_dataset.py --max-blocks 5000
+    python scripts/convert_dataset.py --workers 16
+    python scripts/convert_dataset.py --workers 16 --shard-output
+    python scripts/convert_dataset.py --output-format parquet
 """
 
 import argparse
-import json
 import os
 import re
+import shutil
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 # Add project root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from data_mining.columnar import ParquetDatasetWriter, dataset_schema, merge_parquet
+from data_mining.dataset_io import find_shards
+from data_mining.json_codec import JSONDecodeError, JsonlStream, loads
+from data_mining.records import is_diff_record, materialize_corruption
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -362,13 +376,15 @@ def _describe_mod_action(
 
 def convert_corruption_to_repair(
     entry: Dict[str, Any],
-    generation_entries: Dict[str, Dict[str, Any]],
+    parents: "ParentIndex",
     max_blocks: int,
 ) -> Optional[Dict[str, Any]]:
     """Convert a single corruption entry to ``repair`` format.
 
-    Attempts to find the parent generation entry from *generation_entries*
-    (indexed by schematic_id) to fill in category and other metadata.
+    Looks up the parent generation entry in *parents* (by parent_id, then
+    schematic_id) for its category.  Diff records (``record: "diff"``) are
+    expanded against the parent's block list, which is re-read from the
+    input on demand, so full block lists only exist while writing the output.
 
     Returns the converted entry, or ``None`` if it should be skipped.
     """
@@ -376,11 +392,17 @@ def convert_corruption_to_repair(
     variant = entry.get("variant", 0)
 
     # Try to get category from the parent generation entry
-    category = FALLBACK_CATEGORY
-    parent = generation_entries.get(schematic_id)
-    if parent is not None:
-        discord_meta = parent.get("discord_metadata", {})
-        category = _extract_category(discord_meta)
+    category = (
+        parents.category(entry.get("parent_id", ""))
+        or parents.category(schematic_id)
+        or FALLBACK_CATEGORY
+    )
+
+    if is_diff_record(entry):
+        entry = materialize_corruption(entry, parents.entry(entry.get("parent_id", "")))
+        if entry is None:
+            # Parent missing or its block list changed since the diff was taken
+            return None
 
     # Filter original blocks
     original_blocks_raw = entry.get("original_blocks", [])
@@ -482,54 +504,134 @@ def _normalize_modifications(
 # ---------------------------------------------------------------------------
 
 
-def read_entries(input_path: str) -> List[Dict[str, Any]]:
-    """Read all entries from a JSONL file."""
-    entries: List[Dict[str, Any]] = []
-    if not os.path.isfile(input_path):
-        print(f"ERROR: Input file not found: {input_path}", file=sys.stderr)
-        return entries
-
-    with open(input_path, "r", encoding="utf-8") as fh:
-        for line_no, line in enumerate(fh, start=1):
-            line = line.strip()
-            if not line:
+def iter_entries(
+    input_path: str,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(byte_offset, entry)`` for each line starting in ``[start, end)``, one line at a time."""
+    offset = start
+    with open(input_path, "rb") as fh:
+        fh.seek(start)
+        for line_no, raw in enumerate(fh, start=1):
+            if end is not None and offset >= end:
+                break
+            line_offset = offset
+            offset += len(raw)
+            if not raw.strip():
                 continue
             try:
-                entry = json.loads(line)
-                entries.append(entry)
-            except json.JSONDecodeError as e:
+                entry = loads(raw)
+            except JSONDecodeError as e:
+                where = f"line {line_no}" if start == 0 else f"line at byte {line_offset}"
                 print(
-                    f"WARNING: Skipping line {line_no} — JSON decode error: {e}",
+                    f"WARNING: Skipping {where} — JSON decode error: {e}",
                     file=sys.stderr,
                 )
-    return entries
+                continue
+            if isinstance(entry, dict):
+                yield line_offset, entry
 
 
-def index_generation_entries(
-    entries: List[Dict[str, Any]],
-) -> Dict[str, Dict[str, Any]]:
-    """Build an index of generation entries keyed by schematic_id."""
-    index: Dict[str, Dict[str, Any]] = {}
-    for entry in entries:
-        if entry.get("type") == "generation":
-            sid = entry.get("schematic_id", "")
-            if sid:
-                index[sid] = entry
-    return index
+class ParentIndex:
+    """Compact index of generation entries for repair conversion.
 
+    Keeps only ``id -> (category, byte offset)`` per generation entry (keyed
+    by schematic_id and entry_id).  The full parent, needed to expand diff
+    records, is re-read from the input at its offset; the most recent one is
+    cached since corruption variants directly follow their parent.
+    """
 
-def process(
-    input_path: str,
-    output_dir: str,
-    max_blocks: int,
-    formats: List[str],
-    dry_run: bool,
-) -> Dict[str, int]:
-    """Run the full conversion pipeline.
+    def __init__(self, input_path: str) -> None:
+        self._fh = open(input_path, "rb")
+        self.refs: Dict[str, Tuple[str, int]] = {}
+        self._last: Optional[Tuple[int, Dict[str, Any]]] = None
 
-    Returns a dict with counts of entries read, converted, and skipped.
+    def __contains__(self, key: str) -> bool:
+        return key in self.refs
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def add(self, entry: Dict[str, Any], offset: int) -> None:
+        ref = (_extract_category(entry.get("discord_metadata", {})), offset)
+        for key in (entry.get("schematic_id", ""), entry.get("entry_id", "")):
+            if key:
+                self.refs[key] = ref
+        self._last = (offset, entry)
+
+    def category(self, key: str) -> Optional[str]:
+        ref = self.refs.get(key)
+        return ref[0] if ref else None
+
+    def entry(self, key: str) -> Optional[Dict[str, Any]]:
+        ref = self.refs.get(key)
+        if ref is None:
+            return None
+        offset = ref[1]
+        if self._last is None or self._last[0] != offset:
+            self._fh.seek(offset)
+            self._last = (offset, loads(self._fh.readline()))
+        return self._last[1]
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class JsonlWriter:
+    """Appends entries to ``<path>.tmp`` and renames it into place on ``commit``.
+
+    The file is only created once the first entry is written (or on
+    ``commit`` with *always_create*), so a format with no output leaves any
+    previous file untouched.
     """
-    stats: Dict[str, int] = {
+
+    def __init__(self, path: str, always_create: bool = False) -> None:
+        self.path = path
+        self.always_create = always_create
+        self.count = 0
+        self._fh = None
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        if self._fh is None:
+            self._fh = JsonlStream(self.path + ".tmp")
+        self._fh.write(entry)
+        self.count += 1
+
+    def commit(self) -> None:
+        if self._fh is None and self.always_create:
+            self._fh = JsonlStream(self.path + ".tmp")
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            os.replace(self.path + ".tmp", self.path)
+
+    def abort(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            os.remove(self.path + ".tmp")
+
+
+FORMAT_NAMES = ("block_list", "repair")
+# File extension per --output-format
+OUTPUT_EXTENSIONS = {"jsonl": ".jsonl", "parquet": ".parquet"}
+
+
+def shard_path(output_dir: str, fmt: str, index: int, count: int, ext: str = ".jsonl") -> str:
+    """Path of shard *index* (0-based) of *count*, e.g. ``block_list-00001-of-00016.jsonl``."""
+    return os.path.join(output_dir, f"{fmt}-{index + 1:05d}-of-{count:05d}{ext}")
+
+
+def _open_writer(path: str, output_format: str, always_create: bool = False) -> Any:
+    """Returns a ``JsonlWriter`` or, for ``parquet``, a ``ParquetDatasetWriter``."""
+    if output_format == "parquet":
+        return ParquetDatasetWriter(path, always_create)
+    return JsonlWriter(path, always_create)
+
+
+def _new_stats() -> Dict[str, int]:
+    return {
         "generation_read": 0,
         "corruption_read": 0,
         "generation_converted": 0,
@@ -539,62 +641,249 @@ def process(
         "other_entry_types": 0,
     }
 
-    # 1. Read entries
-    print(f"Reading entries from: {input_path}")
-    entries = read_entries(input_path)
-    print(f"  Total entries read: {len(entries)}")
 
-    if not entries:
-        return stats
+def _emit(
+    stats: Dict[str, int],
+    writers: Dict[str, JsonlWriter],
+    fmt: str,
+    etype: str,
+    converted: Optional[Dict[str, Any]],
+) -> None:
+    if converted is None:
+        stats[f"{etype}_skipped"] += 1
+        return
+    stats[f"{etype}_converted"] += 1
+    if fmt in writers:
+        writers[fmt].write(converted)
 
-    # Count by type
-    for entry in entries:
+
+def convert_range(
+    input_path: str,
+    parents: ParentIndex,
+    writers: Dict[str, JsonlWriter],
+    max_blocks: int,
+    formats: List[str],
+    stats: Dict[str, int],
+    start: int = 0,
+    end: Optional[int] = None,
+) -> List[int]:
+    """Convert the entries in one byte range of the input, writing as it goes.
+
+    Generation entries are added to *parents*.  Corruption entries whose
+    parent has not been seen yet are not converted; their offsets are
+    returned so the caller can convert them once every parent is indexed.
+    """
+    want_block_list = "block_list" in formats
+    want_repair = "repair" in formats
+    deferred: List[int] = []
+
+    for offset, entry in iter_entries(input_path, start, end):
         etype = entry.get("type", "unknown")
+
         if etype == "generation":
             stats["generation_read"] += 1
+            parents.add(entry, offset)
+            if want_block_list:
+                _emit(stats, writers, "block_list", "generation",
+                      convert_generation_to_block_list(entry, max_blocks))
+
         elif etype == "corruption":
             stats["corruption_read"] += 1
+            if not want_repair:
+                continue
+            parent_key = entry.get("parent_id") or entry.get("schematic_id", "")
+            if parent_key and parent_key not in parents:
+                deferred.append(offset)
+                continue
+            _emit(stats, writers, "repair", "corruption",
+                  convert_corruption_to_repair(entry, parents, max_blocks))
+
         else:
             stats["other_entry_types"] += 1
 
-    print(
-        f"  Generation: {stats['generation_read']}, "
-        f"Corruption: {stats['corruption_read']}, "
-        f"Other: {stats['other_entry_types']}"
-    )
+    return deferred
 
-    # Build index of generation entries (needed by repair conversion)
-    generation_index = index_generation_entries(entries)
 
-    # 2. Convert
-    want_block_list = "block_list" in formats
-    want_repair = "repair" in formats
+def convert_deferred(
+    input_path: str,
+    offsets: List[int],
+    parents: ParentIndex,
+    writers: Dict[str, JsonlWriter],
+    max_blocks: int,
+    stats: Dict[str, int],
+) -> None:
+    """Convert corruption entries set aside by ``convert_range``."""
+    if not offsets:
+        return
+    with open(input_path, "rb") as fh:
+        for offset in offsets:
+            fh.seek(offset)
+            entry = loads(fh.readline())
+            _emit(stats, writers, "repair", "corruption",
+                  convert_corruption_to_repair(entry, parents, max_blocks))
+
+
+def _convert_shard(
+    job: Tuple[str, int, int, Dict[str, str], int, List[str], bool, str],
+) -> Tuple[Dict[str, int], Dict[str, Tuple[str, int]], List[int]]:
+    """Worker entry point: converts one shard into its own output files."""
+    input_path, start, end, out_paths, max_blocks, formats, always_create, output_format = job
+    stats = _new_stats()
+    writers = {fmt: _open_writer(path, output_format, always_create) for fmt, path in out_paths.items()}
+    parents = ParentIndex(input_path)
+    try:
+        deferred = convert_range(input_path, parents, writers, max_blocks, formats, stats, start, end)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    finally:
+        parents.close()
+    for writer in writers.values():
+        writer.commit()
+    return stats, parents.refs, deferred
+
+
+def _concat_files(parts: List[str], dest: str, output_format: str = "jsonl") -> None:
+    """Concatenate *parts* (skipping missing ones) into *dest* and delete them."""
+    if output_format == "parquet":
+        merge_parquet(parts, dest)
+        for part in parts:
+            if os.path.exists(part) and part != dest:
+                os.remove(part)
+        return
+    with open(dest + ".tmp", "wb") as out:
+        for part in parts:
+            if os.path.exists(part):
+                with open(part, "rb") as fh:
+                    shutil.copyfileobj(fh, out, 1 << 20)
+                os.remove(part)
+    os.replace(dest + ".tmp", dest)
 
-    block_list_entries: List[Dict[str, Any]] = []
-    repair_entries: List[Dict[str, Any]] = []
 
-    for entry in entries:
-        etype = entry.get("type", "")
+def process(
+    input_path: str,
+    output_dir: str,
+    max_blocks: int,
+    formats: List[str],
+    dry_run: bool,
+    workers: int = 1,
+    shard_output: bool = False,
+    output_format: str = "jsonl",
+) -> Dict[str, int]:
+    """Run the full conversion pipeline in one streaming pass.
 
-        if etype == "generation" and want_block_list:
-            converted = convert_generation_to_block_list(entry, max_blocks)
-            if converted is not None:
-                block_list_entries.append(converted)
-                stats["generation_converted"] += 1
-            else:
-                stats["generation_skipped"] += 1
-
-        elif etype == "corruption" and want_repair:
-            converted = convert_corruption_to_repair(
-                entry, generation_index, max_blocks
-            )
-            if converted is not None:
-                repair_entries.append(converted)
-                stats["corruption_converted"] += 1
+    Each entry is converted and written as soon as it is read, so memory
+    stays bounded by the largest single entry plus the compact parent index.
+    Corruption entries that appear before their parent are set aside (by
+    offset) and converted after the pass.
+
+    With *workers* > 1 the input is split into byte-range shards converted
+    in parallel processes.  Their outputs are concatenated in input order,
+    or kept as ``<format>-NNNNN-of-NNNNN.jsonl`` files with *shard_output*.
+    *output_format* ``parquet`` writes columnar files (``data_mining.columnar``)
+    instead of JSONL.
+
+    Returns a dict with counts of entries read, converted, and skipped.
+    """
+    stats = _new_stats()
+
+    if not os.path.isfile(input_path):
+        print(f"ERROR: Input file not found: {input_path}", file=sys.stderr)
+        return stats
+
+    ext = OUTPUT_EXTENSIONS[output_format]
+    out_formats = [] if dry_run else [f for f in formats if f in FORMAT_NAMES]
+    if out_formats:
+        os.makedirs(output_dir, exist_ok=True)
+        # Drop shards of a previous run, which may have used another worker count
+        for name in os.listdir(output_dir):
+            if re.match(r"(%s)-\d{5}-of-\d{5}%s$" % ("|".join(out_formats), re.escape(ext)), name):
+                os.remove(os.path.join(output_dir, name))
+
+    shards = find_shards(input_path, workers) if workers > 1 else [(0, os.path.getsize(input_path))]
+    written: Dict[str, int] = {fmt: 0 for fmt in out_formats}
+
+    print(f"Converting entries from: {input_path}")
+
+    if len(shards) == 1:
+        writers = {
+            fmt: _open_writer(os.path.join(output_dir, fmt + ext), output_format) for fmt in out_formats
+        }
+        parents = ParentIndex(input_path)
+        try:
+            deferred = convert_range(input_path, parents, writers, max_blocks, formats, stats)
+            convert_deferred(input_path, deferred, parents, writers, max_blocks, stats)
+        except BaseException:
+            for writer in writers.values():
+                writer.abort()
+            raise
+        finally:
+            parents.close()
+        for fmt, writer in writers.items():
+            writer.commit()
+            written[fmt] = writer.count
+        outputs = {fmt: [writer.path] for fmt, writer in writers.items() if writer.count}
+
+    else:
+        print(f"  Sharding into {len(shards)} ranges across {workers} workers")
+        part_paths = [
+            {fmt: shard_path(output_dir, fmt, i, len(shards), ext) + ("" if shard_output else ".part")
+             for fmt in out_formats}
+            for i in range(len(shards))
+        ]
+        jobs = [
+            (input_path, start, end, part_paths[i], max_blocks, formats, shard_output, output_format)
+            for i, (start, end) in enumerate(shards)
+        ]
+
+        parents = ParentIndex(input_path)
+        deferred: List[int] = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() keeps shard order, so later generation entries win as in a serial pass
+            for shard_stats, refs, shard_deferred in pool.map(_convert_shard, jobs):
+                for key, value in shard_stats.items():
+                    stats[key] += value
+                parents.refs.update(refs)
+                deferred.extend(shard_deferred)
+
+        # Corruptions whose parent lives in a later shard
+        tail = {
+            fmt: _open_writer(os.path.join(output_dir, f"{fmt}.tail.part"), output_format) for fmt in out_formats
+        }
+        try:
+            convert_deferred(input_path, deferred, parents, tail, max_blocks, stats)
+        finally:
+            parents.close()
+            for writer in tail.values():
+                writer.commit()
+
+        outputs = {}
+        for fmt in out_formats:
+            parts = [paths[fmt] for paths in part_paths]
+            if shard_output:
+                if os.path.exists(tail[fmt].path):
+                    _concat_files([parts[-1], tail[fmt].path], parts[-1], output_format)
+                outputs[fmt] = parts
             else:
-                stats["corruption_skipped"] += 1
+                final = os.path.join(output_dir, fmt + ext)
+                parts.append(tail[fmt].path)
+                if any(os.path.exists(p) for p in parts):
+                    _concat_files(parts, final, output_format)
+                    outputs[fmt] = [final]
+            written[fmt] = stats["generation_converted" if fmt == "block_list" else "corruption_converted"]
+
+    print(
+        f"  Total entries read: "
+        f"{stats['generation_read'] + stats['corruption_read'] + stats['other_entry_types']}"
+    )
+    print(
+        f"  Generation: {stats['generation_read']}, "
+        f"Corruption: {stats['corruption_read']}, "
+        f"Other: {stats['other_entry_types']}"
+    )
 
-    # 3. Summary
+    # Summary
     print(f"\nConversion summary:")
     print(
         f"  block_list: {stats['generation_converted']} written, "
@@ -609,26 +898,12 @@ def process(
         print("\nDRY RUN — no files written.")
         return stats
 
-    # 4. Write output files
-    os.makedirs(output_dir, exist_ok=True)
-
-    if want_block_list and block_list_entries:
-        block_list_path = os.path.join(output_dir, "block_list.jsonl")
-        with open(block_list_path, "w", encoding="utf-8") as fh:
-            for entry in block_list_entries:
-                fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
-        print(f"  Wrote {len(block_list_entries)} entries to: {block_list_path}")
-
-    if want_repair and repair_entries:
-        repair_path = os.path.join(output_dir, "repair.jsonl")
-        with open(repair_path, "w", encoding="utf-8") as fh:
-            for entry in repair_entries:
-                fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
-        print(f"  Wrote {len(repair_entries)} entries to: {repair_path}")
+    for fmt, paths in outputs.items():
+        where = paths[0] if len(paths) == 1 else f"{len(paths)} shards in {output_dir}"
+        print(f"  Wrote {written[fmt]} entries to: {where}")
 
     return stats
 
-
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
@@ -681,6 +956,23 @@ def main() -> None:
         action="store_true",
         help="Show conversion statistics without writing files",
     )
+    parser.add_argument(
+        "--output-format",
+        choices=sorted(OUTPUT_EXTENSIONS),
+        default="jsonl",
+        help="Row-wise JSONL, or columnar Parquet (needs pyarrow) (default: jsonl)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Convert byte-range shards of the input in N processes (default: 1)",
+    )
+    parser.add_argument(
+        "--shard-output",
+        action="store_true",
+        help="With --workers, keep one file per shard (block_list-00001-of-00016.jsonl) instead of merging",
+    )
 
     args = parser.parse_args()
 
@@ -689,6 +981,17 @@ def main() -> None:
         print("ERROR: --max-blocks must be at least 1.", file=sys.stderr)
         sys.exit(1)
 
+    if args.workers < 1:
+        print("ERROR: --workers must be at least 1.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output_format == "parquet" and not args.dry_run:
+        try:
+            dataset_schema()
+        except ImportError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+
     # Parse formats
     formats = parse_formats(args.formats)
     if not formats:
@@ -708,7 +1011,9 @@ def main() -> None:
     print(f"  Input:     {args.input}")
     print(f"  Output:    {args.output_dir}")
     print(f"  Max blocks: {args.max_blocks}")
-    print(f"  Formats:   {', '.join(formats)}")
+    print(f"  Formats:   {', '.join(formats)} ({args.output_format})")
+    if args.workers > 1:
+        print(f"  Workers:   {args.workers}{' (sharded output)' if args.shard_output else ''}")
     if args.dry_run:
         print(f"  Mode:      DRY RUN\n")
     else:
@@ -720,6 +1025,9 @@ def main() -> None:
         max_blocks=args.max_blocks,
         formats=formats,
         dry_run=args.dry_run,
+        workers=args.workers,
+        shard_output=args.shard_output,
+        output_format=args.output_format,
     )
 
     total_read = stats["generation_read"] + stats["corruption_read"]
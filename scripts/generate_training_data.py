@@ -23,6 +23,8 @@ from pathlib import Path
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from data_mining.block_corpus import BlockCorpus, is_corpus_path
+from data_mining.columnar import is_parquet_path, iter_parquet_entries
 from simulation.llm_client import OpenRouterClient, ChatMessage
 
 # ── Cost per model (USD per million tokens) ──────────────────────────────────
@@ -269,8 +271,15 @@ def resolve_model_id(model_key: str) -> str:
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
+def _iter_jsonl(path: Path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
 def load_circuits(input_path: str, max_blocks: int = 300) -> list[dict]:
-    """Load circuits from converted dataset, filtering by block count."""
+    """Load circuits from converted dataset (JSONL, .parquet or .blocks corpus), filtering by block count."""
     path = Path(input_path)
     if not path.exists():
         print(f"ERROR: Input file not found: {path}")
@@ -278,15 +287,27 @@ def load_circuits(input_path: str, max_blocks: int = 300) -> list[dict]:
 
     circuits = []
     skipped_big = 0
-    with open(path) as f:
-        for line in f:
-            if line.strip():
-                entry = json.loads(line)
-                block_count = len(entry.get("blocks", []))
-                if block_count <= max_blocks:
+    if is_corpus_path(str(path)):
+        # Block counts come from the corpus index; only circuits that fit get decoded
+        with BlockCorpus(str(path)) as corpus:
+            # By row, not key: keys can repeat (e.g. colliding schematic names)
+            for row, block_count in enumerate(corpus.block_counts()):
+                if block_count is not None and block_count > max_blocks:
+                    skipped_big += 1
+                    continue
+                entry = corpus.entry_at(row)
+                if len(entry.get("blocks", [])) <= max_blocks:
                     circuits.append(entry)
                 else:
                     skipped_big += 1
+    else:
+        entries = iter_parquet_entries(str(path)) if is_parquet_path(str(path)) else _iter_jsonl(path)
+        for entry in entries:
+            block_count = len(entry.get("blocks", []))
+            if block_count <= max_blocks:
+                circuits.append(entry)
+            else:
+                skipped_big += 1
 
     if skipped_big:
         print(f"  Skipped {skipped_big} circuits with >{max_blocks} blocks")
@@ -584,7 +605,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--input",
         default="data/training/converted/block_list.jsonl",
-        help="Path to input block_list.jsonl (default: data/training/converted/block_list.jsonl)",
+        help="Path to input block_list.jsonl, .parquet or .blocks (default: data/training/converted/block_list.jsonl)",
     )
     parser.add_argument(
         "--output",
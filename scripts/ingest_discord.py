@@ -11,26 +11,44 @@ training data pipeline.  For each discovered schematic:
   4. Optionally generate N corruption variants via CircuitCorruptor
   5. Write everything to a single JSONL file
 
+With ``--workers N`` steps 1-4 (and JSON encoding) run in a process pool
+while the main process is the single writer.
+
 Usage:
     python scripts/ingest_discord.py --dry-run --max-schematics 5
     python scripts/ingest_discord.py --corruptions 3
     python scripts/ingest_discord.py --force
+    python scripts/ingest_discord.py --workers 8 --unordered
+
+Re-runs skip schematics whose content hash is already recorded in the ingest
+manifest (``<output-file>.manifest.sqlite``) for the same pipeline settings.
 """
 
 import argparse
+import bisect
+import hashlib
 import json
 import os
 import re
+import sqlite3
 import sys
+import time
 import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from typing import Any, Dict, List, Optional, Tuple
 
 # Add project root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from data_mining.corruptor import CircuitCorruptor
+from data_mining.corruptor import CircuitCorruptor, apply_modifications
+from data_mining.json_codec import JsonlStream, dumpb
 from data_mining.parser import SchematicParser
-from simulation.dataset_generator import NBTEncoder, ReverseDatasetGenerator
+from data_mining.records import block_list_hash
+from discord_scraper.message_store import MessageStore, default_store_path
+from discord_scraper.schematic_store import SchematicStore, default_schematic_store_path
+from simulation.dataset_generator import ReverseDatasetGenerator
 
 
 # ---------------------------------------------------------------------------
@@ -60,54 +78,34 @@ def parse_schematic_filename(filename: str) -> Optional[str]:
     return None
 
 
-def build_message_index(clean_messages_dir: str) -> Dict[str, Dict[str, Any]]:
-    """Walk *clean_messages_dir* and index every message by message_id.
+def schematic_entry_id(schematic_path: str) -> str:
+    """Return a stable, unique entry id for a discovered schematic.
 
-    Returns a dict::
-
-        {
-            "<message_id>": {
-                "message_id": ...,
-                "channel_id": ...,
-                "channel_name": ...,
-                "category": ...,
-                "author_id": ...,
-                "author_name": ...,
-                "content": ...,
-                "schematics": [...],
-            },
-            ...
-        }
+    The same filename can exist under both ``raw_schematics`` and
+    ``clean_schematics`` (and under several servers), so the id is the path
+    relative to the source dir without extension, e.g.
+    ``clean_schematics/<server_id>/<message_id>_0_door``.
     """
-    index: Dict[str, Dict[str, Any]] = {}
-    if not os.path.isdir(clean_messages_dir):
-        return index
+    server_dir, fname = os.path.split(os.path.abspath(schematic_path))
+    tree_dir, server_id = os.path.split(server_dir)
+    stem = os.path.splitext(fname)[0]
+    return "/".join((os.path.basename(tree_dir), server_id, stem))
 
-    for server_dir in os.listdir(clean_messages_dir):
-        server_path = os.path.join(clean_messages_dir, server_dir)
-        if not os.path.isdir(server_path):
-            continue
-        for channel_dir in os.listdir(server_path):
-            jsonl_path = os.path.join(server_path, channel_dir, "messages.jsonl")
-            if not os.path.isfile(jsonl_path):
-                continue
-            try:
-                with open(jsonl_path, "r", encoding="utf-8") as fh:
-                    for line in fh:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            msg = json.loads(line)
-                        except json.JSONDecodeError:
-                            continue
-                        mid = msg.get("message_id", "")
-                        if mid:
-                            index[mid] = msg
-            except Exception:
-                # Silently skip unreadable files
-                pass
-    return index
+
+def build_message_index(clean_messages_dir: str, store_path: Optional[str] = None) -> MessageStore:
+    """Open the persistent message index for *clean_messages_dir*.
+
+    The store (default ``<source-dir>/metadata/message_index.sqlite``, kept
+    up to date by ``export_discord.py clean``) is first synced with any
+    ``messages.jsonl`` lines it has not seen yet, which reads only appended
+    data. Lookups then go through ``MessageStore.get`` one message at a time,
+    so memory and startup cost do not grow with the archive size.
+    """
+    if store_path is None:
+        store_path = str(default_store_path(os.path.dirname(os.path.abspath(clean_messages_dir))))
+    store = MessageStore(store_path)
+    store.sync_dir(clean_messages_dir)
+    return store
 
 
 def extract_description(msg: Optional[Dict[str, Any]]) -> str:
@@ -202,14 +200,25 @@ def discover_schematics(
 def process_schematic(
     schematic_path: str,
     filename: str,
-    message_index: Dict[str, Dict[str, Any]],
+    message_index: Any,
     generator: ReverseDatasetGenerator,
     num_corruptions: int,
+    corruption_seed: int = 0,
+    corruption_faults: Any = 1,
+    corruption_format: str = "diff",
 ) -> List[Dict[str, Any]]:
     """Process a single schematic and return a list of output entries.
 
-    Returns one generation entry and (optionally) N corruption entries.
+    Returns one generation entry and (optionally) up to N distinct corruption
+    entries. Variants are reproducible from *corruption_seed* and the
+    schematic id; *corruption_faults* is the number of simultaneous
+    modifications per variant (int or inclusive ``(min, max)``).
     Returns an empty list on failure (error already printed to stderr).
+
+    With ``corruption_format="diff"`` corruption entries carry only their
+    modifications plus ``parent_id``/``parent_hash`` referencing the
+    generation entry; ``"full"`` embeds ``original_blocks`` and
+    ``corrupted_blocks`` as before.
     """
     entries: List[Dict[str, Any]] = []
 
@@ -262,8 +271,12 @@ def process_schematic(
     data = result.get("data", {})
 
     # --- Generation entry ---
+    entry_id = schematic_entry_id(schematic_path)
+    content_hash = block_list_hash(block_list)
     generation_entry: Dict[str, Any] = {
         "type": "generation",
+        "entry_id": entry_id,
+        "content_hash": content_hash,
         "schematic_id": meta.get("name") or filename,
         "source": "discord",
         "discord_metadata": discord_meta,
@@ -280,62 +293,467 @@ def process_schematic(
 
     # --- Corruption variants ---
     if num_corruptions > 0:
-        for variant_idx in range(num_corruptions):
-            try:
-                corruptor = CircuitCorruptor(blocks_raw)
-                corrupted_blocks, modifications = corruptor.corrupt(mode="random")
-
-                # Build a repair description from the modifications
-                repair_parts = []
-                for mod in modifications:
-                    mtype = mod.get("type", "unknown")
-                    pos = mod.get("pos", (0, 0, 0))
-                    if mtype == "break_wire":
-                        repair_parts.append(
-                            f"Break the redstone wire at {pos} and replace with air"
-                        )
-                    elif mtype == "rotate_component":
-                        repair_parts.append(
-                            f"Rotate the component at {pos} back to original state"
-                        )
-                    elif mtype == "remove_source":
-                        repair_parts.append(
-                            f"Restore the power source at {pos}"
-                        )
-                    else:
-                        repair_parts.append(
-                            f"Fix the modification at {pos}"
-                        )
-                repair_desc = "; ".join(repair_parts) if repair_parts else "Unknown repair"
-
-                # Pick the first modification's type as the overall corruption_type
-                corruption_type = modifications[0]["type"] if modifications else "unknown"
-
-                corruption_entry: Dict[str, Any] = {
-                    "type": "corruption",
-                    "schematic_id": meta.get("name") or filename,
-                    "source": "discord",
-                    "variant": variant_idx,
-                    "corruption_type": corruption_type,
-                    "original_blocks": [_block_tuple_to_dict(b) for b in blocks_raw],
-                    "corrupted_blocks": [
-                        _block_tuple_to_dict(b) for b in corrupted_blocks
-                    ],
-                    "modifications": modifications,
-                    "repair_description": repair_desc,
-                }
-                entries.append(corruption_entry)
-
-            except Exception as exc:
-                print(
-                    f"  FAILED corruption variant {variant_idx}: {exc}",
-                    file=sys.stderr,
-                )
-                traceback.print_exc(file=sys.stderr)
+        # One candidate index per circuit; variants are drawn as a seeded batch
+        schematic_id = meta.get("name") or filename
+        try:
+            variants = CircuitCorruptor(blocks_raw).generate_batch(
+                num_corruptions,
+                seed=f"{corruption_seed}:{schematic_id}",
+                faults=corruption_faults,
+            )
+        except Exception as exc:
+            print(f"  FAILED corruption batch: {exc}", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+            variants = []
+
+        for variant in variants:
+            modifications = variant["modifications"]
+
+            # Build a repair description from the modifications
+            repair_parts = []
+            for mod in modifications:
+                mtype = mod.get("type", "unknown")
+                pos = mod.get("pos", (0, 0, 0))
+                if mtype == "break_wire":
+                    repair_parts.append(
+                        f"Break the redstone wire at {pos} and replace with air"
+                    )
+                elif mtype == "rotate_component":
+                    repair_parts.append(
+                        f"Rotate the component at {pos} back to original state"
+                    )
+                elif mtype == "remove_source":
+                    repair_parts.append(
+                        f"Restore the power source at {pos}"
+                    )
+                else:
+                    repair_parts.append(
+                        f"Fix the modification at {pos}"
+                    )
+            repair_desc = "; ".join(repair_parts) if repair_parts else "Unknown repair"
+
+            corruption_entry: Dict[str, Any] = {
+                "type": "corruption",
+                "schematic_id": schematic_id,
+                "source": "discord",
+                "variant": variant["variant"],
+                "variant_seed": variant["seed"],
+                "corruption_type": variant["corruption_type"],
+            }
+            if corruption_format == "diff":
+                corruption_entry["record"] = "diff"
+                corruption_entry["parent_id"] = entry_id
+                corruption_entry["parent_hash"] = content_hash
+            else:
+                corrupted_blocks = apply_modifications(blocks_raw, modifications)
+                corruption_entry["original_blocks"] = block_list
+                corruption_entry["corrupted_blocks"] = [
+                    _block_tuple_to_dict(b) for b in corrupted_blocks
+                ]
+            corruption_entry["modifications"] = modifications
+            corruption_entry["repair_description"] = repair_desc
+            entries.append(corruption_entry)
 
     return entries
 
 
+# ---------------------------------------------------------------------------
+# Incremental manifest
+# ---------------------------------------------------------------------------
+
+# Bump when process_schematic output changes in a way option hashing can't see.
+INGEST_PIPELINE_VERSION = "1"
+
+
+def pipeline_version(options: Dict[str, Any]) -> str:
+    """Return a version string for the code version plus output-affecting *options*."""
+    digest = hashlib.sha256(
+        json.dumps(options, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return f"{INGEST_PIPELINE_VERSION}-{digest[:12]}"
+
+
+class IngestManifest:
+    """SQLite record of which schematics already have entries in an output file.
+
+    Rows are keyed by schematic content hash, pipeline version and output
+    file, so renamed or reposted copies of a schematic are skipped and any
+    change to the file or the pipeline settings makes it pending again.
+    Content hashes are cached per path by size and mtime to avoid rereading
+    unchanged files.
+
+    Each row also holds the byte range of its entries in the output file.
+    When a schematic is re-ingested (new content at the same path, or new
+    pipeline settings) its old row moves to ``superseded`` and ``compact``
+    cuts those ranges out of the appended file, so readers never see two
+    versions of one schematic.
+
+    ``outputs`` holds the end of the last recorded range per output file.
+    Entries written after it were never recorded (the run died between the
+    write and ``record``), and ``trim_unrecorded`` cuts them off before the
+    next run appends, since those schematics get processed again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS processed (
+                content_hash TEXT NOT NULL,
+                pipeline_version TEXT NOT NULL,
+                output_file TEXT NOT NULL,
+                schematic_path TEXT NOT NULL,
+                generation_entries INTEGER NOT NULL,
+                corruption_entries INTEGER NOT NULL,
+                processed_at REAL NOT NULL,
+                start_offset INTEGER,
+                end_offset INTEGER,
+                PRIMARY KEY (content_hash, pipeline_version, output_file)
+            );
+            CREATE TABLE IF NOT EXISTS superseded (
+                output_file TEXT NOT NULL,
+                schematic_path TEXT NOT NULL,
+                start_offset INTEGER,
+                end_offset INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS outputs (
+                output_file TEXT PRIMARY KEY,
+                end_offset INTEGER NOT NULL
+            );
+            """
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(processed)")}
+        for column in ("start_offset", "end_offset"):
+            if column not in columns:
+                # Manifests from before offsets were recorded
+                self.conn.execute(f"ALTER TABLE processed ADD COLUMN {column} INTEGER")
+        self.conn.commit()
+
+    def content_hash(self, path: str) -> str:
+        st = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime, content_hash FROM file_hashes WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime:
+            return row[2]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime, digest),
+        )
+        return digest
+
+    def is_done(self, content_hash: str, version: str, output_file: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM processed WHERE content_hash = ? AND pipeline_version = ? "
+            "AND output_file = ?",
+            (content_hash, version, output_file),
+        ).fetchone()
+        return row is not None
+
+    def record(
+        self,
+        content_hash: str,
+        version: str,
+        output_file: str,
+        schematic_path: str,
+        generation_entries: int,
+        corruption_entries: int,
+        start_offset: Optional[int] = None,
+        end_offset: Optional[int] = None,
+    ) -> None:
+        """Records entries at ``[start_offset, end_offset)`` of *output_file*, superseding
+        earlier rows for the same path or content."""
+        old = (
+            "FROM processed WHERE output_file = ? AND (schematic_path = ? OR content_hash = ?) "
+            "AND NOT (content_hash = ? AND pipeline_version = ?)"
+        )
+        params = (output_file, schematic_path, content_hash, content_hash, version)
+        self.conn.execute(
+            "INSERT INTO superseded SELECT output_file, schematic_path, start_offset, end_offset " + old,
+            params,
+        )
+        self.conn.execute("DELETE " + old, params)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (content_hash, version, output_file, schematic_path,
+             generation_entries, corruption_entries, time.time(), start_offset, end_offset),
+        )
+        if end_offset is not None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?)", (output_file, end_offset)
+            )
+        self.conn.commit()
+
+    def trim_unrecorded(self, output_file: str, path: str) -> int:
+        """Truncates *path* (the file behind *output_file*) to the end of its last
+        recorded entries and returns the number of bytes cut.
+
+        The first call for an output file only notes its current size, so files
+        written before this was tracked (or without a manifest) are left alone.
+        """
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        row = self.conn.execute(
+            "SELECT end_offset FROM outputs WHERE output_file = ?", (output_file,)
+        ).fetchone()
+        cut = 0
+        if row is not None and size > row[0]:
+            with open(path, "r+b") as fh:
+                fh.truncate(row[0])
+            cut = size - row[0]
+        else:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?)", (output_file, size)
+            )
+            self.conn.commit()
+        return cut
+
+    def compact(self, output_file: str, path: str) -> Tuple[int, int]:
+        """Cuts superseded entries out of *path* (the file behind *output_file*).
+
+        Returns ``(removed, stale)``: schematics whose old entries were dropped,
+        and superseded schematics recorded without offsets (before they were
+        tracked), whose old entries stay until the file is rebuilt with --force.
+        """
+        rows = self.conn.execute(
+            "SELECT rowid, start_offset, end_offset FROM superseded WHERE output_file = ?",
+            (output_file,),
+        ).fetchall()
+        ranges = sorted((start, end) for _, start, end in rows if start is not None)
+        stale = len(rows) - len(ranges)
+        if not ranges:
+            return 0, stale
+
+        tmp = path + ".compact.tmp"
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            pos = 0
+            for start, end in ranges:
+                _copy_bytes(src, dst, start - pos)
+                src.seek(end)
+                pos = end
+            _copy_bytes(src, dst, None)
+
+        # Shift every surviving range by the bytes removed before it
+        ends = [end for _, end in ranges]
+        removed = [0]
+        for start, end in ranges:
+            removed.append(removed[-1] + end - start)
+        shifted = [
+            (start - removed[bisect.bisect_right(ends, start)],
+             end - removed[bisect.bisect_right(ends, end)], key)
+            for key, start, end in self.conn.execute(
+                "SELECT rowid, start_offset, end_offset FROM processed "
+                "WHERE output_file = ? AND start_offset IS NOT NULL",
+                (output_file,),
+            ).fetchall()
+        ]
+        self.conn.executemany(
+            "UPDATE processed SET start_offset = ?, end_offset = ? WHERE rowid = ?", shifted
+        )
+        self.conn.execute(
+            "DELETE FROM superseded WHERE output_file = ? AND start_offset IS NOT NULL",
+            (output_file,),
+        )
+        self.conn.execute(
+            "UPDATE outputs SET end_offset = end_offset - ? WHERE output_file = ?",
+            (removed[-1], output_file),
+        )
+        # Swap the file in before committing the new offsets
+        os.replace(tmp, path)
+        self.conn.commit()
+        return len(ranges), stale
+
+    def forget_output(self, output_file: str) -> None:
+        self.conn.execute("DELETE FROM processed WHERE output_file = ?", (output_file,))
+        self.conn.execute("DELETE FROM superseded WHERE output_file = ?", (output_file,))
+        # The file is about to be rewritten from scratch
+        self.conn.execute("INSERT OR REPLACE INTO outputs VALUES (?, 0)", (output_file,))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+
+def _copy_bytes(src, dst, count: Optional[int]) -> None:
+    """Copy *count* bytes (or the rest of the file) from *src* to *dst*."""
+    while count is None or count > 0:
+        chunk = src.read(1 << 20 if count is None else min(count, 1 << 20))
+        if not chunk:
+            break
+        dst.write(chunk)
+        if count is not None:
+            count -= len(chunk)
+
+
+def filter_pending(
+    schematics: List[Tuple[str, str]],
+    manifest: IngestManifest,
+    version: str,
+    output_file: str,
+) -> Tuple[List[Tuple[str, str]], Dict[str, str], int]:
+    """Drop schematics already in the manifest or repeated earlier in this run.
+
+    Returns ``(pending, hashes_by_path, skipped_count)``.
+    """
+    pending: List[Tuple[str, str]] = []
+    hashes: Dict[str, str] = {}
+    seen = set()
+    for path, fname in schematics:
+        digest = manifest.content_hash(path)
+        if digest in seen or manifest.is_done(digest, version, output_file):
+            continue
+        seen.add(digest)
+        hashes[path] = digest
+        pending.append((path, fname))
+    manifest.conn.commit()
+    return pending, hashes, len(schematics) - len(pending)
+
+
+# ---------------------------------------------------------------------------
+# Parallel pipeline
+# ---------------------------------------------------------------------------
+
+# Per-process state, set once by _init_worker so jobs only carry file paths.
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(
+    message_store_path: str,
+    generator_kwargs: Dict[str, Any],
+    process_kwargs: Dict[str, Any],
+) -> None:
+    # Each worker opens its own read-only connection to the message store
+    _WORKER["message_index"] = MessageStore(message_store_path, read_only=True)
+    _WORKER["generator"] = ReverseDatasetGenerator(**generator_kwargs)
+    _WORKER["process_kwargs"] = process_kwargs
+
+
+def _process_job(
+    job: Tuple[int, str, str],
+) -> Tuple[int, str, Optional[List[Tuple[str, str]]], Optional[str]]:
+    """Worker entry point: process one schematic and JSON-encode its entries.
+
+    Returns ``(idx, filename, [(entry_type, json_line), ...], error)``; any
+    exception is returned as a formatted traceback instead of raised, so one
+    bad file never takes down the pool.
+    """
+    idx, schematic_path, filename = job
+    try:
+        entries = process_schematic(
+            schematic_path=schematic_path,
+            filename=filename,
+            message_index=_WORKER["message_index"],
+            generator=_WORKER["generator"],
+            **_WORKER["process_kwargs"],
+        )
+        lines = [(e["type"], dumpb(e)) for e in entries]
+        return idx, filename, lines, None
+    except Exception:
+        return idx, filename, None, traceback.format_exc()
+
+
+def run_pipeline(
+    schematics: List[Tuple[str, str]],
+    workers: int,
+    initargs: Tuple[Any, ...],
+    ordered: bool = True,
+    max_pending: Optional[int] = None,
+):
+    """Yield ``_process_job`` results for *schematics* from a process pool.
+
+    At most *max_pending* schematics (default ``4 * workers``) are submitted
+    or buffered ahead of the writer at any time.  With *ordered* results are
+    yielded in input order; otherwise as soon as they complete.
+
+    If a worker process dies, the pool is recreated and every job that was
+    in flight is re-run alone, so only the job that kills its worker is
+    reported as failed.
+    """
+    max_pending = max_pending or 4 * workers
+    jobs = [(idx, path, fname) for idx, (path, fname) in enumerate(schematics, 1)]
+    next_submit = 0
+    next_yield = 1
+    buffered: Dict[int, Any] = {}
+    in_flight: Dict[Any, Tuple[int, str, str]] = {}
+    # Jobs lost with a broken pool, and the one of them currently running alone
+    suspects: deque = deque()
+    isolated = None
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=initargs
+        )
+
+    pool = new_pool()
+
+    def submit(job: Tuple[int, str, str]) -> Any:
+        nonlocal pool
+        try:
+            future = pool.submit(_process_job, job)
+        except BrokenProcessPool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = new_pool()
+            future = pool.submit(_process_job, job)
+        in_flight[future] = job
+        return future
+
+    try:
+        while next_submit < len(jobs) or suspects or in_flight:
+            if suspects:
+                # Re-run suspects one at a time once the rest has drained
+                if not in_flight:
+                    isolated = submit(suspects.popleft())
+            else:
+                # Bound both in-flight work and results waiting on an earlier file
+                while next_submit < len(jobs) and (
+                    len(in_flight) + len(buffered) < max_pending
+                ):
+                    submit(jobs[next_submit])
+                    next_submit += 1
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = in_flight.pop(future)
+                idx, _, filename = job
+                try:
+                    result = future.result()
+                except BrokenProcessPool as exc:
+                    if future is not isolated:
+                        # Maybe just a bystander of another job's crash
+                        suspects.append(job)
+                        continue
+                    result = (idx, filename, None, f"worker failed: {exc!r}")
+                except Exception as exc:
+                    # Errors inside a job are already returned by _process_job
+                    result = (idx, filename, None, f"worker failed: {exc!r}")
+                if ordered:
+                    buffered[idx] = result
+                else:
+                    yield result
+
+            while next_yield in buffered:
+                yield buffered.pop(next_yield)
+                next_yield += 1
+    finally:
+        pool.shutdown()
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Ingest Discord scraper output into the MIRA training pipeline."
@@ -356,6 +774,80 @@ def main() -> None:
         default=3,
         help="Number of corruption variants per circuit (default: 3, 0 to skip)",
     )
+    parser.add_argument(
+        "--corruption-seed",
+        type=int,
+        default=0,
+        help="Seed for corruption variants; same seed reproduces the same variants (default: 0)",
+    )
+    parser.add_argument(
+        "--faults",
+        type=int,
+        default=1,
+        help="Simultaneous modifications per corruption variant (default: 1)",
+    )
+    parser.add_argument(
+        "--corruption-format",
+        choices=("diff", "full"),
+        default="diff",
+        help=(
+            "Store corruption entries as diffs referencing their generation "
+            "entry, or with full original/corrupted block lists (default: diff)"
+        ),
+    )
+    parser.add_argument(
+        "--snapshot-mode",
+        choices=("delta", "full"),
+        default="delta",
+        help=(
+            "Deconstruction snapshots: removals plus periodic keyframes, or a "
+            "full snapshot per step (default: delta)"
+        ),
+    )
+    parser.add_argument(
+        "--deconstruction-strategy",
+        choices=("teacher", "dependency"),
+        default="teacher",
+        help=(
+            "Choose removal layers with the teacher (Y-layer heuristic in mock "
+            "mode) or by peeling the support/attachment DAG (default: teacher)"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for parse/deconstruct/corrupt (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="With --workers, write entries as schematics finish instead of in input order",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="Ingest manifest path (default: <output-file>.manifest.sqlite)",
+    )
+    parser.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help="Process every schematic without consulting or updating the manifest",
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=("off", "exact", "near"),
+        default="exact",
+        help=(
+            "Drop repeated schematics before processing: identical files "
+            "(exact), same blocks at any origin (near), or off (default: exact)"
+        ),
+    )
+    parser.add_argument(
+        "--message-store",
+        default=None,
+        help="Message index path (default: <source-dir>/metadata/message_index.sqlite)",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -376,7 +868,7 @@ def main() -> None:
     parser.add_argument(
         "--force",
         action="store_true",
-        help="Overwrite output file instead of appending",
+        help="Overwrite output file instead of appending (and reset its manifest records)",
     )
 
     args = parser.parse_args()
@@ -399,16 +891,28 @@ def main() -> None:
             print(f"  {i:>3}/{total}: [{mid}] {fname}")
         print(f"\nOutput file      : {args.output_file}")
         print(f"Corruptions      : {args.corruptions}")
+        print(f"Corruption seed  : {args.corruption_seed} (faults={args.faults})")
         print("Dry-run complete — no files written.")
         return
 
+    if args.dedup != "off":
+        store = SchematicStore(default_schematic_store_path(args.source_dir))
+        unique, duplicates = store.dedup(
+            [path for path, _ in schematics], near=args.dedup == "near"
+        )
+        store.close()
+        keep = set(unique)
+        schematics = [(path, fname) for path, fname in schematics if path in keep]
+        total = len(schematics)
+        print(f"Dedup ({args.dedup}): {len(duplicates)} duplicate(s) dropped, {total} unique.")
+
     # ------------------------------------------------------------------
     # 2. Build message index
     # ------------------------------------------------------------------
     clean_messages_dir = os.path.join(args.source_dir, "clean_messages")
-    print("Building message index from clean_messages/ ...", end=" ", flush=True)
-    message_index = build_message_index(clean_messages_dir)
-    print(f"done ({len(message_index)} messages indexed).")
+    print("Syncing message index with clean_messages/ ...", end=" ", flush=True)
+    message_index = build_message_index(clean_messages_dir, args.message_store)
+    print(f"done ({len(message_index)} messages indexed, {message_index.path}).")
 
     # ------------------------------------------------------------------
     # 3. Prepare output
@@ -423,10 +927,60 @@ def main() -> None:
         mode = "a"
         print(f"Appending to {output_path}.")
 
+    process_kwargs = {
+        "num_corruptions": args.corruptions,
+        "corruption_seed": args.corruption_seed,
+        "corruption_faults": args.faults,
+        "corruption_format": args.corruption_format,
+    }
+    generator_kwargs = {
+        "snapshot_mode": args.snapshot_mode,
+        "strategy": args.deconstruction_strategy,
+    }
+
+    manifest: Optional[IngestManifest] = None
+    hashes: Dict[str, str] = {}
+    version = pipeline_version({**process_kwargs, **generator_kwargs})
+    manifest_key = os.path.abspath(output_path)
+    if not args.no_manifest:
+        manifest = IngestManifest(args.manifest or f"{output_path}.manifest.sqlite")
+        if args.force:
+            manifest.forget_output(manifest_key)
+        else:
+            cut = manifest.trim_unrecorded(manifest_key, output_path)
+            if cut:
+                print(
+                    f"Trimmed {cut} bytes of unrecorded entries from the end of {output_path} "
+                    "(an earlier run stopped before recording them)."
+                )
+        schematics, hashes, skipped = filter_pending(
+            schematics, manifest, version, manifest_key
+        )
+        total = len(schematics)
+        print(
+            f"Manifest {manifest.path}: {skipped} skipped (already ingested or duplicate), "
+            f"{total} pending (pipeline {version})."
+        )
+
+        if total == 0:
+            manifest.close()
+            message_index.close()
+            print("Nothing new to ingest.")
+            return
+
+    def record_done(outfile, schematic_path: str, start: int, gen_count: int, corr_count: int) -> None:
+        if manifest is not None:
+            # Entries must be on disk before the manifest claims they exist
+            outfile.flush()
+            manifest.record(
+                hashes[schematic_path], version, manifest_key,
+                schematic_path, gen_count, corr_count, start, outfile.tell(),
+            )
+
     # ------------------------------------------------------------------
     # 4. Initialize generator (mock mode by default)
     # ------------------------------------------------------------------
-    generator = ReverseDatasetGenerator()
+    generator = ReverseDatasetGenerator(**generator_kwargs)
     if not args.mock:
         # TeacherClient defaults to mock_mode=True; setting mock=False would
         # require an OpenRouter client.  We keep it in mock mode regardless
@@ -439,34 +993,81 @@ def main() -> None:
     entries_written = 0
     corrupted = 0
 
-    with open(output_path, mode, encoding="utf-8") as outfile:
-        for idx, (schematic_path, filename) in enumerate(schematics, 1):
-            print(f"Processing {idx}/{total}: {filename} ...", end=" ", flush=True)
-            try:
-                entries = process_schematic(
-                    schematic_path=schematic_path,
-                    filename=filename,
-                    message_index=message_index,
-                    generator=generator,
-                    num_corruptions=args.corruptions,
-                )
-            except Exception as exc:
-                print(f"FAILED: {exc}")
-                traceback.print_exc(file=sys.stderr)
-                continue
+    if args.workers > 1:
+        print(
+            f"Processing with {args.workers} workers "
+            f"({'unordered' if args.unordered else 'ordered'} output) ..."
+        )
+        with JsonlStream(output_path, mode) as outfile:
+            for idx, filename, lines, error in run_pipeline(
+                schematics,
+                workers=args.workers,
+                initargs=(str(message_index.path), generator_kwargs, process_kwargs),
+                ordered=not args.unordered,
+            ):
+                label = f"{idx}/{total}: {filename}"
+                if error is not None:
+                    print(f"Processed {label} ... FAILED")
+                    print(error, file=sys.stderr)
+                    continue
+                if not lines:
+                    print(f"Processed {label} ... FAILED (no entries produced)")
+                    continue
+                gen_count = sum(1 for entry_type, _ in lines if entry_type == "generation")
+                start = outfile.tell()
+                for _, line in lines:
+                    outfile.write_line(line)
+                entries_written += gen_count
+                corrupted += len(lines) - gen_count
+                record_done(outfile, schematics[idx - 1][0], start, gen_count, len(lines) - gen_count)
+                print(f"Processed {label} ... OK")
 
-            if not entries:
-                print("FAILED (no entries produced)")
-                continue
+    else:
+        with JsonlStream(output_path, mode) as outfile:
+            for idx, (schematic_path, filename) in enumerate(schematics, 1):
+                print(f"Processing {idx}/{total}: {filename} ...", end=" ", flush=True)
+                try:
+                    entries = process_schematic(
+                        schematic_path=schematic_path,
+                        filename=filename,
+                        message_index=message_index,
+                        generator=generator,
+                        **process_kwargs,
+                    )
+                except Exception as exc:
+                    print(f"FAILED: {exc}")
+                    traceback.print_exc(file=sys.stderr)
+                    continue
 
-            for entry in entries:
-                outfile.write(json.dumps(entry, cls=NBTEncoder) + "\n")
-                if entry["type"] == "generation":
-                    entries_written += 1
-                else:
-                    corrupted += 1
+                if not entries:
+                    print("FAILED (no entries produced)")
+                    continue
 
-            print("OK")
+                gen_count = 0
+                start = outfile.tell()
+                for entry in entries:
+                    outfile.write(entry)
+                    if entry["type"] == "generation":
+                        gen_count += 1
+                entries_written += gen_count
+                corrupted += len(entries) - gen_count
+                record_done(outfile, schematic_path, start, gen_count, len(entries) - gen_count)
+
+                print("OK")
+
+    if manifest is not None:
+        # Re-ingested schematics were appended again; drop their old entries
+        removed, stale = manifest.compact(manifest_key, output_path)
+        if removed:
+            print(f"Compacted {output_path}: dropped old entries of {removed} re-ingested schematic(s).")
+        if stale:
+            print(
+                f"WARNING: {stale} re-ingested schematic(s) still have old entries in {output_path} "
+                "(ingested before entry offsets were recorded); rerun with --force to rebuild it.",
+                file=sys.stderr,
+            )
+        manifest.close()
+    message_index.close()
 
     # ------------------------------------------------------------------
     # 6. Summary
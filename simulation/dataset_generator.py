@@ -1,5 +1,4 @@
 import argparse
-import json
 import os
 import sys
 from typing import Any, Dict, List, Tuple
@@ -7,30 +6,24 @@ from typing import Any, Dict, List, Tuple
 # Add project root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from data_mining.json_codec import JsonlStream, NativeJSONEncoder
 from data_mining.parser import SchematicParser
 from simulation.deconstructor import ReverseDeconstructor
 from simulation.teacher_client import TeacherClient
 
-class NBTEncoder(json.JSONEncoder):
-    def default(self, obj):
-        # Handle nbtlib types that are not JSON serializable by default
-        if hasattr(obj, 'snbt'):
-            return obj.snbt()
-        if hasattr(obj, 'tolist'): # Handle numpy arrays or similar
-            return obj.tolist()
-        try:
-            return super().default(obj)
-        except TypeError:
-            return str(obj)
+# Kept for callers that pass cls= to json.dumps; NBT becomes plain JSON values
+NBTEncoder = NativeJSONEncoder
 
 class ReverseDatasetGenerator:
     """
     Phase 4 dataset generator implementing Reverse Deconstruction.
     """
 
-    def __init__(self):
+    def __init__(self, snapshot_mode: str = "full", keyframe_interval: int = 16, strategy: str = "teacher"):
         self.teacher = TeacherClient()
-        self.deconstructor = ReverseDeconstructor(self.teacher)
+        self.deconstructor = ReverseDeconstructor(
+            self.teacher, snapshot_mode=snapshot_mode, keyframe_interval=keyframe_interval, strategy=strategy
+        )
 
     def process_schematic(self, schematic_path: str) -> Dict[str, Any]:
         parser = SchematicParser(schematic_path)
@@ -78,10 +71,15 @@ def main():
     parser.add_argument("--input-dir", default="data/raw_schematics", help="Directory containing .litematic files")
     parser.add_argument("--output-file", default="data/training/reverse_dataset.jsonl", help="Output JSONL file")
     parser.add_argument("--single-file", help="Process a single schematic file")
+    parser.add_argument("--snapshot-mode", choices=["full", "delta"], default="full", help="Store full snapshots per step, or removals plus periodic keyframes")
+    parser.add_argument("--keyframe-interval", type=int, default=16, help="Steps between full keyframes in delta mode")
+    parser.add_argument("--strategy", choices=["teacher", "dependency"], default="teacher", help="Let the teacher choose layers, or peel the support/attachment DAG")
 
     args = parser.parse_args()
 
-    generator = ReverseDatasetGenerator()
+    generator = ReverseDatasetGenerator(
+        snapshot_mode=args.snapshot_mode, keyframe_interval=args.keyframe_interval, strategy=args.strategy
+    )
 
     if args.single_file:
         files = [args.single_file]
@@ -96,12 +94,12 @@ def main():
     print(f"Found {len(files)} schematics to process.")
     os.makedirs(os.path.dirname(args.output_file), exist_ok=True)
 
-    with open(args.output_file, "a") as outfile:
+    with JsonlStream(args.output_file, "a") as outfile:
         for path in files:
             print(f"Processing {path} ...")
             try:
                 result = generator.process_schematic(path)
-                outfile.write(json.dumps(result, cls=NBTEncoder) + "\n")
+                outfile.write(result)
             except Exception as exc:
                 print(f"Failed to process {path}: {exc}")
 
@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Tuple
 
+from data_mining.support_graph import peel_layers
 from simulation.teacher_client import TeacherClient
 
 
@@ -19,13 +20,55 @@ class DeconstructionStep:
     snapshot_after: List[Dict[str, Any]] = field(default_factory=list)
 
 
+SNAPSHOT_MODES = ("full", "delta")
+STRATEGIES = ("teacher", "dependency")
+
+
+class LayerIndex:
+    """
+    Blocks bucketed by Y so the heuristic engine can pop the top layer in
+    O(layer size) instead of rescanning every remaining block.
+    """
+
+    def __init__(self, positions):
+        self.buckets: Dict[int, List[Tuple[int, int, int]]] = {}
+        for pos in positions:
+            self.buckets.setdefault(pos[1], []).append(pos)
+        self._order = sorted(self.buckets)
+
+    def __bool__(self) -> bool:
+        return bool(self._order)
+
+    def pop_top(self) -> Tuple[int, List[Tuple[int, int, int]]]:
+        """Removes and returns (y, positions) for the highest remaining layer."""
+        y = self._order.pop()
+        return y, self.buckets.pop(y)
+
+
 class ReverseDeconstructor:
     """
     Iteratively calls the TeacherClient to obtain reverse-construction steps.
+
+    snapshot_mode="full" stores the complete remaining structure in every step
+    (``snapshot_after``), which is O(n^2) in output size. snapshot_mode="delta"
+    stores only each step's ``removed_blocks`` plus a full ``keyframe`` every
+    ``keyframe_interval`` steps; use SnapshotReader to rebuild any snapshot.
+
+    strategy="teacher" lets the teacher (LLM or Y-layer heuristic) choose each
+    layer. strategy="dependency" derives layers from the support/attachment
+    DAG (data_mining.support_graph) and only asks the teacher to annotate them.
     """
 
-    def __init__(self, teacher: TeacherClient):
+    def __init__(self, teacher: TeacherClient, snapshot_mode: str = "full", keyframe_interval: int = 16,
+                 strategy: str = "teacher"):
+        if snapshot_mode not in SNAPSHOT_MODES:
+            raise ValueError(f"Unknown snapshot_mode '{snapshot_mode}', expected one of {SNAPSHOT_MODES}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {STRATEGIES}")
         self.teacher = teacher
+        self.strategy = strategy
+        self.snapshot_mode = snapshot_mode
+        self.keyframe_interval = max(1, keyframe_interval)
 
     def plan(self, blocks: List[BlockRecord]) -> List[Dict[str, Any]]:
         remaining: Dict[Tuple[int, int, int], Dict[str, Any]] = {
@@ -37,13 +80,28 @@ class ReverseDeconstructor:
         max_iters = len(remaining) + 5
         iteration = 0
 
+        peeled = peel_layers(blocks) if self.strategy == "dependency" else None
+        # Without an LLM the teacher's answer is always the top Y layer, so pop it
+        # from a prebuilt index rather than handing it the whole structure each step.
+        # The dependency strategy picks every layer itself and needs no index.
+        layers = None if self.teacher.uses_llm or peeled is not None else LayerIndex(remaining.keys())
+
         while remaining and iteration < max_iters:
-            current_blocks = [
-                (x, y, z, data["state"], data["nbt"])
-                for (x, y, z), data in remaining.items()
-            ]
+            if peeled is not None:
+                _, positions = next(peeled)
+                layer_blocks = [(*pos, remaining[pos]["state"], remaining[pos]["nbt"]) for pos in positions]
+                payload = self.teacher.annotate_deconstruction_layer(
+                    layer_blocks, len(remaining) - len(layer_blocks)
+                )
+            elif layers is not None:
+                payload = self.teacher.heuristic_deconstruction_layer(*layers.pop_top())
+            else:
+                current_blocks = [
+                    (x, y, z, data["state"], data["nbt"])
+                    for (x, y, z), data in remaining.items()
+                ]
+                payload = self.teacher.suggest_deconstruction_layer(current_blocks, iteration)
 
-            payload = self.teacher.suggest_deconstruction_layer(current_blocks, iteration)
             response = payload["response"]
             suggested = [
                 tuple(block)
@@ -69,16 +127,18 @@ class ReverseDeconstructor:
                     "nbt": data["nbt"],
                 })
 
-            snapshot_after = self._serialize_snapshot(remaining)
-
-            steps.append({
+            step = {
                 "step": iteration,
                 "reasoning": reasoning.strip(),
                 "removed_blocks": removed_blocks,
                 "remaining_count": len(remaining),
                 "prompt": payload["prompt"],
-                "snapshot_after": snapshot_after,
-            })
+            }
+            if self.snapshot_mode == "full":
+                step["snapshot_after"] = self._serialize_snapshot(remaining)
+            elif (iteration + 1) % self.keyframe_interval == 0:
+                step["keyframe"] = self._serialize_snapshot(remaining)
+            steps.append(step)
 
             iteration += 1
 
@@ -97,4 +157,61 @@ class ReverseDeconstructor:
         return serialized
 
 
+class SnapshotReader:
+    """
+    Reconstructs ``snapshot_after`` for any step of a deconstruction plan,
+    whether it was produced in "full" or "delta" snapshot mode.
+
+    The initial structure is the union of all removed blocks (a converged plan
+    removes everything), so only keyframes and removals are needed.
+    """
 
+    def __init__(self, steps: List[Dict[str, Any]]):
+        self.steps = steps
+        self._initial: Dict[Tuple[int, int, int], str] = {}
+        for step in steps:
+            for block in step.get("removed_blocks", []):
+                self._initial[tuple(block["pos"])] = block["state"]
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def snapshot_after(self, index: int) -> List[Dict[str, Any]]:
+        """Returns the remaining blocks after step *index*, sorted like ReverseDeconstructor output."""
+        if index < 0:
+            index += len(self.steps)
+        if not 0 <= index < len(self.steps):
+            raise IndexError(f"Step {index} out of range for {len(self.steps)} steps")
+
+        if "snapshot_after" in self.steps[index]:
+            return self.steps[index]["snapshot_after"]
+
+        # Start from the closest keyframe at or before index, else from the full structure.
+        start = -1
+        current = dict(self._initial)
+        for k in range(index, -1, -1):
+            keyframe = self.steps[k].get("keyframe", self.steps[k].get("snapshot_after"))
+            if keyframe is not None:
+                start = k
+                current = {tuple(b["pos"]): b["state"] for b in keyframe}
+                break
+
+        for step in self.steps[start + 1:index + 1]:
+            for block in step.get("removed_blocks", []):
+                current.pop(tuple(block["pos"]), None)
+
+        return [
+            {"pos": list(pos), "state": state}
+            for pos, state in sorted(current.items(), key=lambda item: (item[0][1], item[0][0], item[0][2]))
+        ]
+
+    def __iter__(self):
+        """Yields every snapshot in order, applying removals incrementally."""
+        current = dict(self._initial)
+        for step in self.steps:
+            for block in step.get("removed_blocks", []):
+                current.pop(tuple(block["pos"]), None)
+            yield [
+                {"pos": list(pos), "state": state}
+                for pos, state in sorted(current.items(), key=lambda item: (item[0][1], item[0][0], item[0][2]))
+            ]
@@ -40,7 +40,27 @@ def replicate_schematic(schematic_path, origin=(0, 100, 0), rate_limit=MAX_COMMA
     replicate_blocks(blocks, origin, bounds, bridge, rate_limit)
     bridge.disconnect()
 
-def replicate_blocks(blocks, origin, bounds, bridge, rate_limit=MAX_COMMANDS_PER_TICK, use_updates=False, force_update_region=False):
+def freeze_world(bridge, use_updates=False):
+    """
+    Server-wide build settings: command feedback off, ticks frozen and
+    fillUpdates set from use_updates. These are global, so concurrent builds
+    must share one freeze_world / restore_world pair.
+    """
+    print("Disabling command feedback & Freezing time...")
+    bridge.run_command("gamerule sendCommandFeedback false")
+    bridge.run_command("tick freeze")
+    
+    # Enable fillUpdates based on flag
+    fill_updates_val = "true" if use_updates else "false"
+    bridge.run_command(f"carpet fillUpdates {fill_updates_val}")
+
+def restore_world(bridge):
+    """Undoes freeze_world."""
+    bridge.run_command("gamerule sendCommandFeedback true")
+    bridge.run_command("carpet fillUpdates true") # Always restore to true
+    bridge.run_command("tick unfreeze")
+
+def replicate_blocks(blocks, origin, bounds, bridge, rate_limit=MAX_COMMANDS_PER_TICK, use_updates=False, force_update_region=False, manage_world=True):
     """
     Core building logic.
     blocks: List of (x, y, z, block_state, nbt)
@@ -49,19 +69,16 @@ def replicate_blocks(blocks, origin, bounds, bridge, rate_limit=MAX_COMMANDS_PER
     bridge: Connected MinecraftBridge instance
     use_updates: If True, enables block updates (fillUpdates true). Slower but allows physics.
     force_update_region: If True, calls mira_api update_region on the bounding box after building.
+    manage_world: If False, skip freeze_world / restore_world; the caller holds them
+                  around several concurrent builds.
     """
     print("Connected. preparing to build...")
     
     ox, oy, oz = origin
     
     # 1. Disable Feedback & Freeze Time
-    print("Disabling command feedback & Freezing time...")
-    bridge.run_command("gamerule sendCommandFeedback false")
-    bridge.run_command("tick freeze")
-    
-    # Enable fillUpdates based on flag
-    fill_updates_val = "true" if use_updates else "false"
-    bridge.run_command(f"carpet fillUpdates {fill_updates_val}")
+    if manage_world:
+        freeze_world(bridge, use_updates)
     
     # 2. Clear Area (Set Air)
     (p_min_x, p_min_y, p_min_z), (p_max_x, p_max_y, p_max_z) = bounds
@@ -255,9 +272,8 @@ def replicate_blocks(blocks, origin, bounds, bridge, rate_limit=MAX_COMMANDS_PER
             print(f"Update Region Response: {resp}")
 
     # 4. Restore
-    bridge.run_command("gamerule sendCommandFeedback true")
-    bridge.run_command("carpet fillUpdates true") # Always restore to true
-    bridge.run_command("tick unfreeze")
+    if manage_world:
+        restore_world(bridge)
     print("Build complete.")
 
 if __name__ == "__main__":
@@ -58,6 +58,18 @@ class TeacherClient:
         """
     )
 
+    ANNOTATION_SYSTEM_PROMPT = textwrap.dedent(
+        """\
+        [SYSTEM PROMPT]
+
+        You are a Reverse-Engineering Architect.
+
+        You are given a Minecraft Redstone Machine and a layer of blocks that has already been chosen for **REMOVAL** while simulating its construction in reverse. Nothing remaining rests on or is attached to these blocks.**Your Goal:**
+
+        Explain in one or two sentences why this layer is a sensible next step to remove. Output **ONLY** the explanation.
+        """
+    )
+
     def __init__(self, llm_client: Optional[Any] = None, mock_mode: bool = True):
         self.llm_client = llm_client
         self.mock_mode = mock_mode
@@ -167,29 +179,87 @@ class TeacherClient:
         reasoning. In the architectural stage, it utilizes a Y-layer heuristic to
         demonstrate pipeline functionality.
         """
+        if not self.uses_llm:
+            # Heuristic: Remove the entire top-most layer (highest Y)
+            if not blocks:
+                return self._heuristic_payload({"reasoning": "Structure already empty.", "remove_blocks": []})
+            highest_y = max(b[1] for b in blocks)
+            return self.heuristic_deconstruction_layer(
+                highest_y, [b[:3] for b in blocks if b[1] == highest_y]
+            )
+
         system_prompt = self.DECONSTRUCTOR_SYSTEM_PROMPT.strip()
         user_prompt = self._build_deconstruction_user_prompt(blocks)
+        raw = self.llm_client.complete(system_prompt=system_prompt, user_prompt=user_prompt)
+        response = json.loads(raw)
 
-        if self.mock_mode or self.llm_client is None:
-            # Heuristic: Remove the entire top-most layer (highest Y)
-            if not blocks:
-                response = {"reasoning": "Structure already empty.", "remove_blocks": []}
-            else:
-                highest_y = max(b[1] for b in blocks)
-                layer_blocks = [list(b[:3]) for b in blocks if b[1] == highest_y]
-                response = {
-                    "reasoning": f"[HEURISTIC] Removing all blocks at Y={highest_y} to simulate layer-by-layer deconstruction.",
-                    "remove_blocks": layer_blocks
-                }
-        else:
-            raw = self.llm_client.complete(system_prompt=system_prompt, user_prompt=user_prompt)
-            response = json.loads(raw)
+        return {
+            "prompt": {
+                "system": system_prompt,
+                "user": user_prompt,
+            },
+            "response": response,
+        }
+
+    @property
+    def uses_llm(self) -> bool:
+        """True when deconstruction and contracts go to a real LLM rather than heuristics."""
+        return not self.mock_mode and self.llm_client is not None
 
+    def heuristic_deconstruction_layer(
+        self, y: int, positions: List[Tuple[int, int, int]]
+    ) -> Dict[str, Any]:
+        """
+        Mock-mode payload for removing the given layer at height *y*. The user
+        prompt is left empty since no LLM will read it.
+        """
+        return self._heuristic_payload({
+            "reasoning": f"[HEURISTIC] Removing all blocks at Y={y} to simulate layer-by-layer deconstruction.",
+            "remove_blocks": [list(p) for p in positions],
+        })
+
+    def annotate_deconstruction_layer(
+        self,
+        layer_blocks: List[Tuple[int, int, int, str, Any]],
+        remaining_count: int,
+    ) -> Dict[str, Any]:
+        """
+        Explains a removal layer chosen by a deterministic planner. The LLM (if
+        attached) only writes the reasoning; the layer itself is never changed.
+        """
+        remove_blocks = [list(b[:3]) for b in layer_blocks]
+
+        if not self.uses_llm:
+            ys = sorted({b[1] for b in layer_blocks})
+            where = f"Y={ys[0]}" if len(ys) == 1 else f"Y={ys[0]}..{ys[-1]}"
+            return self._heuristic_payload({
+                "reasoning": f"[DEPENDENCY] Removing {len(layer_blocks)} blocks at {where}; nothing among the {remaining_count} remaining blocks rests on or is attached to them.",
+                "remove_blocks": remove_blocks,
+            })
+
+        system_prompt = self.ANNOTATION_SYSTEM_PROMPT.strip()
+        lines = ["[USER PROMPT]", "[LAYER_TO_REMOVE]"]
+        for x, y, z, state, _ in sorted(layer_blocks, key=lambda b: (b[1], b[0], b[2])):
+            lines.append(f"({x}, {y}, {z}): {state}")
+        lines.append("")
+        lines.append(f"Blocks remaining after removal: {remaining_count}")
+        user_prompt = "\n".join(lines)
+
+        reasoning = self.llm_client.complete(system_prompt=system_prompt, user_prompt=user_prompt)
         return {
             "prompt": {
                 "system": system_prompt,
                 "user": user_prompt,
             },
+            "response": {"reasoning": reasoning.strip(), "remove_blocks": remove_blocks},
+        }
+
+    def _heuristic_payload(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "prompt": {
+                "system": self.DECONSTRUCTOR_SYSTEM_PROMPT.strip(),
+                "user": "",
+            },
             "response": response,
         }
 